@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput and memory benchmark of the tissue models in pmonitor/bank.
+
+Every case times setP() + step() + health() over one of the synthetic inputs
+of the script_* experiments and reports samples per second (tissues x steps
+per second of wall time) and the peak memory allocated during the run. The
+cases vary the model class, the history length, the TissueAveraging filter
+length, the number of neighbours and the number of tissues. Whole-trace
+simulate() and TissueArray are benchmarked alongside the stepwise loop.
+
+Results are written as JSON so that runs can be compared over time:
+
+    python benchmarks/benchmark_tissues.py --out results/today.json
+    python benchmarks/benchmark_tissues.py --compare results/old.json results/today.json
+
+@author: Bethel Osuagwu
+"""
+import os;
+import sys;
+import json;
+import time;
+import platform;
+import argparse;
+import tracemalloc;
+import numpy as np;
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'));
+
+from pmonitor.bank.Tissue import Tissue;
+from pmonitor.bank.TissueArray import TissueArray;
+from pmonitor.bank.TissueAveraging import TissueAveraging;
+from pmonitor.bank.TissueBinned import TissueBinned;
+from pmonitor.bank.TissueContinuous import TissueContinuous;
+from pmonitor.bank.TissueFixed import TissueFixed;
+from pmonitor.bank.TissueInverse import TissueInverse;
+from pmonitor.bank.TissueLinear import TissueLinear;
+from pmonitor.bank.TissueSpecial import TissueSpecial;
+from pmonitor.inc.PressureTimeThreshold import PressureTimeThreshold;
+from pmonitor.inc.EffectEstimator import EffectEstimator;
+from pmonitor.inc.Helpers import Helpers;
+from pmonitor.inc.Signals import Signals;
+
+
+DT=0.1; # Sampling time as in the script_* experiments
+RELIEF_TIME=5*60; # Relief time as in the script_* experiments
+
+CLASSES=['Tissue','TissueAveraging','TissueBinned','TissueContinuous',
+         'TissueFixed','TissueInverse','TissueLinear','TissueSpecial'];
+
+SIGNALS=['impulse','step','sinusoid','stationary','prolonged_repetitive'];
+
+# Stationary inputs, for which TissueSpecial is designed
+STATIONARY_SIGNALS=['stationary','prolonged_stationary'];
+
+
+def makeSignal(name,nsteps):
+    """
+    Synthetic input of the given name @see pmonitor.inc.Signals.
+    """
+    if(name=='impulse'):
+        return Signals.impulse(nsteps);
+    elif(name=='step'):
+        return Signals.step(nsteps);
+    elif(name=='sinusoid'):
+        return Signals.sinusoid(nsteps,DT);
+    elif(name=='stationary'):
+        return Signals.stationary(nsteps,seed=0);
+    elif(name=='prolonged_stationary'):
+        # Relief over the last fifth of the trace
+        return Signals.prolongedStationary(nsteps,DT,relief_after=nsteps*DT*0.8,seed=0);
+    elif(name=='prolonged_repetitive'):
+        # Compress the 30 minute period so that the benchmark sees on/off
+        # switching within its length.
+        return Signals.prolongedRepetitive(nsteps,DT,ifreq=1/(nsteps*DT/4),relief_after=nsteps*DT*0.8);
+    raise Exception('Unknown signal: '+name);
+
+
+def makeTissue(cls,history_len=50,flen=None,k_gi=0):
+    """
+    A tissue configured as in the script_* experiments.
+    """
+    ptt=PressureTimeThreshold();
+    ee=EffectEstimator();
+    beta=Helpers.beta(RELIEF_TIME,DT);
+    linear_beta=Helpers.linearBeta(RELIEF_TIME,DT);
+    flen=flen or round(RELIEF_TIME/DT);
+    k_dpi=1-k_gi;
+
+    if(cls=='Tissue'):
+        return Tissue('bench',ptt,ee,beta,beta,beta,k_dpi,0,k_gi,history_len);
+    elif(cls=='TissueAveraging'):
+        return TissueAveraging('bench',ptt,ee,flen,flen,flen,k_dpi,0,k_gi);
+    elif(cls=='TissueBinned'):
+        return TissueBinned('bench',ptt,ee,beta,beta,beta,k_dpi,0,k_gi);
+    elif(cls=='TissueContinuous'):
+        return TissueContinuous('bench',ptt,ee,beta,beta,beta,k_dpi,0,k_gi,history_len);
+    elif(cls=='TissueFixed'):
+        return TissueFixed('bench',ptt,ee,k_dpi,0,k_gi);
+    elif(cls=='TissueInverse'):
+        return TissueInverse('bench',ptt,ee,k_dpi,0,k_gi);
+    elif(cls=='TissueLinear'):
+        return TissueLinear('bench',ptt,ee,linear_beta,linear_beta,linear_beta,k_dpi,0,k_gi,history_len);
+    elif(cls=='TissueSpecial'):
+        return TissueSpecial('bench',ptt,ee,beta,beta,beta,k_dpi,0,k_gi);
+    raise Exception('Unknown class: '+cls);
+
+
+def runStep(case,Ps):
+    """
+    Stepwise run: n_tissues tissues each with n_neighbours neighbours.
+    """
+    n_tissues=case['n_tissues'];
+    n_neighbours=case['n_neighbours'];
+    k_gi=0.5 if n_neighbours else 0;
+
+    tissues=[makeTissue(case['class'],case['history_len'],case['flen'],k_gi) for i in range(n_tissues)];
+    neighbours=[makeTissue(case['class'],case['history_len'],case['flen']) for i in range(n_neighbours)];
+
+    def run():
+        for n in range(len(Ps)):
+            P=Ps[n];
+            for T in neighbours:
+                T.setP(0.5*P);
+            for T in tissues:
+                T.setP(P);
+                T.step(DT,neighbours);
+                T.health(DT);
+    return run;
+
+
+def runSimulate(case,Ps):
+    """
+    Whole-trace run with Tissue.simulate().
+    """
+    n_neighbours=case['n_neighbours'];
+    k_gi=0.5 if n_neighbours else 0;
+    tissues=[makeTissue(case['class'],case['history_len'],case['flen'],k_gi) for i in range(case['n_tissues'])];
+    Pn=np.tile(0.5*Ps,(n_neighbours,1)) if n_neighbours else None;
+
+    def run():
+        for T in tissues:
+            T.simulate(Ps,DT,Pn);
+    return run;
+
+
+def runArray(case,Ps):
+    """
+    TissueArray run over n_tissues cells in a square-ish grid.
+    """
+    n=case['n_tissues'];
+    rows=int(np.sqrt(n));
+    shape=(rows,n//rows);
+    k_gi=0.5 if case['n_neighbours'] else 0;
+    beta=Helpers.beta(RELIEF_TIME,DT);
+    A=TissueArray('bench',shape,PressureTimeThreshold(),EffectEstimator(),case['method'],
+                  beta,beta,beta,1-k_gi,0,k_gi,case['history_len'],
+                  neighbourhood=case['n_neighbours'] or None);
+    rng=np.random.default_rng(0);
+    gain=rng.random(shape);
+
+    def run():
+        for n in range(len(Ps)):
+            A.setP(Ps[n]*gain);
+            A.step(DT);
+            A.health(DT);
+    return run;
+
+
+def measure(case,nsteps,repeat):
+    """
+    Run a case and return its throughput and peak memory.
+    """
+    Ps=makeSignal(case['signal'],nsteps);
+    runner={'step':runStep,'simulate':runSimulate,'array':runArray}[case['mode']];
+
+    # Time, best of repeats, each on freshly initialised tissues.
+    seconds=np.inf;
+    for r in range(repeat):
+        run=runner(case,Ps);
+        t0=time.perf_counter();
+        run();
+        seconds=min(seconds,time.perf_counter()-t0);
+
+    # Peak memory in a separate run since tracing slows the run down.
+    tracemalloc.start();
+    run=runner(case,Ps);
+    run();
+    peak=tracemalloc.get_traced_memory()[1];
+    tracemalloc.stop();
+
+    samples=case['n_tissues']*nsteps;
+    result=dict(case);
+    result.update({'nsteps':nsteps,'seconds':seconds,
+                   'samples_per_second':samples/seconds,'peak_memory_bytes':peak});
+    return result;
+
+
+def cases(quick=False):
+    """
+    The benchmark cases. Quick mode keeps one value per swept parameter
+    besides the defaults.
+    """
+    default={'class':'Tissue','mode':'step','signal':'stationary','history_len':50,
+             'flen':None,'n_neighbours':0,'n_tissues':1,'method':None};
+
+    def case(**kw):
+        c=dict(default);
+        c.update(kw);
+        c['name']='/'.join(str(c[k]) for k in ('mode','class','method','signal','history_len','flen','n_neighbours','n_tissues'));
+        return c;
+
+    out=[];
+
+    # Every class on every input
+    for cls in CLASSES:
+        for sig in (SIGNALS[-2:] if quick else SIGNALS):
+            out.append(case(**{'class':cls,'signal':sig}));
+            out.append(case(**{'class':cls,'signal':sig,'mode':'simulate'}));
+
+    # Stepwise against whole-trace TissueSpecial on stationary inputs
+    for sig in STATIONARY_SIGNALS:
+        for n in ([10] if quick else [1,10,100]):
+            out.append(case(**{'class':'TissueSpecial','signal':sig,'n_tissues':n}));
+            out.append(case(**{'class':'TissueSpecial','signal':sig,'n_tissues':n,'mode':'simulate'}));
+
+    # History length
+    for cls in ['Tissue','TissueContinuous','TissueLinear']:
+        for h in ([10,1000] if quick else [10,50,500,5000]):
+            out.append(case(**{'class':cls,'history_len':h}));
+
+    # Averaging filter length
+    for flen in ([30,30000] if quick else [30,300,3000,30000]):
+        out.append(case(**{'class':'TissueAveraging','flen':flen}));
+
+    # Neighbours
+    for cls in ['Tissue','TissueContinuous','TissueBinned']:
+        for nb in ([1,8] if quick else [1,4,8,24]):
+            out.append(case(**{'class':cls,'n_neighbours':nb}));
+
+    # Number of tissues
+    for cls in ['Tissue','TissueContinuous']:
+        for n in ([10] if quick else [10,100]):
+            out.append(case(**{'class':cls,'n_tissues':n}));
+    for method in ['exponential','continuous','inverse']:
+        for n in ([1024] if quick else [64,1024,4096]):
+            out.append(case(**{'class':'TissueArray','mode':'array','method':method,'n_tissues':n}));
+            out.append(case(**{'class':'TissueArray','mode':'array','method':method,'n_tissues':n,'n_neighbours':8}));
+
+    return out;
+
+
+def speedups(results):
+    """
+    Print the throughput ratio simulate/step of the cases run in both modes.
+    """
+    step={r['name'].split('/',1)[1]:r for r in results if r['mode']=='step'};
+    sim=[r for r in results if r['mode']=='simulate' and r['name'].split('/',1)[1] in step];
+    if(not sim):
+        return;
+
+    print('%-70s %12s %12s %7s'%('simulate against step','step [S/s]','sim [S/s]','speedup'));
+    for r in sim:
+        a=step[r['name'].split('/',1)[1]]['samples_per_second'];
+        b=r['samples_per_second'];
+        print('%-70s %12.0f %12.0f %7.1f'%(r['name'].split('/',1)[1],a,b,b/a));
+
+
+def compare(old_file,new_file):
+    """
+    Print the throughput ratio new/old of the cases common to two runs.
+    """
+    with open(old_file) as f:
+        old={r['name']:r for r in json.load(f)['results']};
+    with open(new_file) as f:
+        new={r['name']:r for r in json.load(f)['results']};
+
+    print('%-70s %12s %12s %7s'%('case','old [S/s]','new [S/s]','ratio'));
+    for name in new:
+        if(name in old):
+            a=old[name]['samples_per_second'];
+            b=new[name]['samples_per_second'];
+            print('%-70s %12.0f %12.0f %7.2f'%(name,a,b,b/a));
+
+
+def main():
+    parser=argparse.ArgumentParser(description='Benchmark the pmonitor tissue models.');
+    parser.add_argument('--out',default=None,help='JSON file for the results. The default is benchmarks/results/<timestamp>.json');
+    parser.add_argument('--nsteps',type=int,default=2000,help='Samples per case.');
+    parser.add_argument('--repeat',type=int,default=3,help='Timed repeats per case, the best is kept.');
+    parser.add_argument('--quick',action='store_true',help='Run a reduced set of cases.');
+    parser.add_argument('--filter',default='',help='Only run cases whose name contains this string.');
+    parser.add_argument('--compare',nargs=2,metavar=('OLD','NEW'),help='Compare two result files instead of running.');
+    args=parser.parse_args();
+
+    if(args.compare):
+        compare(*args.compare);
+        return;
+
+    out=args.out;
+    if(out is None):
+        out=os.path.join(os.path.dirname(os.path.abspath(__file__)),'results',time.strftime('%Y%m%d-%H%M%S')+'.json');
+    os.makedirs(os.path.dirname(os.path.abspath(out)),exist_ok=True);
+
+    results=[];
+    for c in cases(args.quick):
+        if(args.filter not in c['name']):
+            continue;
+        r=measure(c,args.nsteps,args.repeat);
+        results.append(r);
+        print('%-70s %12.0f S/s %10.1f kB'%(r['name'],r['samples_per_second'],r['peak_memory_bytes']/1024));
+    speedups(results);
+
+    meta={'time':time.strftime('%Y-%m-%dT%H:%M:%S'),'python':platform.python_version(),
+          'numpy':np.__version__,'machine':platform.machine(),'platform':platform.platform(),
+          'nsteps':args.nsteps,'repeat':args.repeat,'dt':DT};
+    with open(out,'w') as f:
+        json.dump({'meta':meta,'results':results},f,indent=1);
+    print('Results written to '+out);
+
+
+if __name__=='__main__':
+    main();
@@ -3,6 +3,7 @@ import numpy as np;
 from ..inc.PressureTimeThreshold import PressureTimeThreshold;
 from ..inc.EffectEstimator import EffectEstimator;
 from ..inc.Helpers import Helpers;
+from ..inc.RingBuffer import RingBuffer;
 
 class Tissue:
 
@@ -34,6 +35,17 @@ class Tissue:
     PRESSURE_TIME_THRESHOLD_SHORT_TIME=5;# i.e damaging pressure according to this definition.
     PRESSURE_TIME_THRESHOLD_LONG_TIME=180; # i.e non-damaging/harmless pressure according to this definition 
     
+    # Injury mechanisms
+    MECHANISMS=('iri','dpi','gi');
+    
+    # Attributes that make up the state of a tissue @see self.getState()
+    STATE=('iri','dpi','gi','P','n','reliefCounter','Ps');
+    
+    # Whether the relief depends on the load ratio u, i.e. the effect of the 
+    # mean pressure history relative to that of self.Pmin @see 
+    # self._stepContext()
+    LOAD_RATIO=False;
+    
     def __init__(self,code,pressureTimeThreshold,effectEstimator,beta_dpi=1,beta_iri=1,beta_gi=1,k_dpi=1,k_iri=0,k_gi=0,history_len=50):
         """
         This base class Implements an approximation of the monitoring filter. It 
@@ -96,6 +108,10 @@ class Tissue:
         self.beta_dpi=beta_dpi ;
         self.beta_gi=beta_gi;
         
+        # Mechanisms selected with self.setMechanisms(), None for those with 
+        # a non-zero damage contribution.
+        self._selected_mechanisms=None;
+        
         # Damage contributions
         self.k_iri=k_iri; # #ischeamiaReperfutionInjury
         self.k_dpi=k_dpi; # deepPressureInjury
@@ -111,8 +127,22 @@ class Tissue:
         # Current Interface pressure
         self.P=0;
         
-        # Stores the history of Ps up to a certain length
-        self.Ps=[0]* history_len;
+        # Pressure gradients handed over for the next step @see self.setGradient()
+        self.G=None;
+        self.G_avg=None;
+        
+        # Newest-first pressure histories of the neighbours at the end of the 
+        # last self.simulate(), one row per neighbour @see 
+        # self._simulateMeanGradient()
+        self.Pn_history=None;
+        
+        # Quantities shared by the mechanisms during a step @see self._stepContext()
+        self.context=None;
+        
+        # Stores the history of Ps up to a certain length, newest first. Only 
+        # the newest history_len-1 samples are kept; the oldest slot always 
+        # reads as zero as it did with the former list based history. 
+        self.Ps=RingBuffer(history_len,max(history_len-1,1));
         
         # Pressure-time cell death threshold
         if(isinstance(pressureTimeThreshold, PressureTimeThreshold)):
@@ -139,6 +169,102 @@ class Tissue:
         #
         self.reset();
         
+    @property
+    def k_iri(self):
+        return self._k_iri;
+    
+    @k_iri.setter
+    def k_iri(self,k):
+        self._k_iri=k;
+        self._updateMechanisms();
+    
+    @property
+    def k_dpi(self):
+        return self._k_dpi;
+    
+    @k_dpi.setter
+    def k_dpi(self,k):
+        self._k_dpi=k;
+        self._updateMechanisms();
+    
+    @property
+    def k_gi(self):
+        return self._k_gi;
+    
+    @k_gi.setter
+    def k_gi(self,k):
+        self._k_gi=k;
+        self._updateMechanisms();
+    
+    def setMechanisms(self,mechanisms=None):
+        """
+        Select the injury mechanisms to compute. A mechanism that is not 
+        computed costs nothing during stepping and holds its current state.
+
+        Parameters
+        ----------
+        mechanisms : Arraylike<string>, optional
+            Any of 'iri', 'dpi' and 'gi'. The default is None, i.e. the 
+            mechanisms with a non-zero damage contribution k and those with 
+            a zero k that are not at rest (@see self._atRest()), so that the 
+            result is that of computing all mechanisms. This is worked out 
+            again whenever a k or the state changes.
+
+        Returns
+        -------
+        None.
+
+        """
+        if(mechanisms is not None):
+            for m in mechanisms:
+                if(m not in self.MECHANISMS):
+                    raise Exception('Unknown injury mechanism: '+str(m));
+        
+        self._selected_mechanisms=mechanisms;
+        self._updateMechanisms();
+    
+    def _updateMechanisms(self):
+        """
+        Work out the mechanisms to compute @see self.setMechanisms().
+
+        Returns
+        -------
+        None.
+
+        """
+        selected=self._selected_mechanisms;
+        
+        # Mechanisms with a zero k that are still relieved, and are to be 
+        # checked again after each step, and those at rest whose relief 
+        # counter is still to be kept @see self._stepResting().
+        self._settling=();
+        self._resting=();
+        if(selected is None):
+            selected=[m for m in self.MECHANISMS if getattr(self,'_k_'+m,0)!=0 or not self._atRest(m)];
+            self._settling=tuple(m for m in selected if getattr(self,'_k_'+m,0)==0);
+            self._resting=tuple(m for m in self.MECHANISMS if m not in selected and 'reliefCounter'+m.capitalize() in self.STATE);
+        
+        self.mechanisms=tuple(m for m in self.MECHANISMS if m in selected);
+    
+    def _atRest(self,m):
+        """
+        Check if stepping a mechanism with a zero k leaves it as it is, i.e. 
+        its state, including the effect before relief, is all zero. A relief 
+        counter of its own, e.g. reliefCounterGi, follows the pressure 
+        whatever the state, and is kept by self._stepResting().
+
+        Parameters
+        ----------
+        m : string
+            The mechanism.
+
+        Returns
+        -------
+        boolean
+
+        """
+        return bool(np.all(np.asarray(getattr(self,m,0))==0) and getattr(self,m+'_before_relief',0)==0);
+    
     def reset(self):
         """
         Reset the Tissue to its initial state
@@ -153,10 +279,175 @@ class Tissue:
         self.gi=0; 
 
         self.P=0;
-        self.Ps=[0]*len(self.Ps);
+        self.Ps.clear();
+        
+        self.G=None;
+        self.G_avg=None;
+        self.context=None;
+        self.Pn_history=None;
         
         
         self.n=-1;
+        
+        self._updateMechanisms();
+    
+    def getState(self):
+        """
+        Copy of the state of the tissue, i.e. the attributes in self.STATE, 
+        for checkpoints @see self.setState(). The parameters of the tissue 
+        are not part of its state.
+
+        Returns
+        -------
+        dict
+            Attribute name to array. The content of a buffer is held under 
+            the name of the buffer followed by '.' and the key of 
+            RingBuffer.getState().
+
+        """
+        state={};
+        for name in self.STATE:
+            value=getattr(self,name);
+            if isinstance(value,RingBuffer):
+                for key,v in value.getState().items():
+                    state[name+'.'+key]=v;
+            else:
+                state[name]=np.array(value);
+        return state;
+    
+    @staticmethod
+    def getStates(tissues):
+        """
+        self.getState() of many tissues of the same class and state shapes 
+        at once, stacked with a row per tissue. Much quicker than stacking 
+        their states one by one.
+
+        Parameters
+        ----------
+        tissues : list<Tissue>
+            The tissues.
+
+        Returns
+        -------
+        dict
+            Attribute name to array @see self.getState().
+
+        """
+        state={};
+        for name in tissues[0].STATE:
+            values=[getattr(t,name) for t in tissues];
+            if isinstance(values[0],RingBuffer):
+                for key,v in RingBuffer.getStates(values).items():
+                    state[name+'.'+key]=v;
+            else:
+                state[name]=np.array(values);
+        return state;
+    
+    def setState(self,state):
+        """
+        Restore the state of the tissue from self.getState() of a tissue of 
+        the same class and parameters.
+
+        Parameters
+        ----------
+        state : dict|numpy.lib.npyio.NpzFile
+            The state. Scalars may also be given as Python numbers.
+
+        Returns
+        -------
+        None.
+
+        """
+        for name in self.STATE:
+            value=getattr(self,name);
+            if isinstance(value,RingBuffer):
+                value.setState({key:state[name+'.'+key] for key in ('data','head','sum','nonzero')});
+            elif isinstance(value,np.ndarray):
+                # In place, which keeps views such as the rows of bins.
+                value[...]=state[name];
+            else:
+                v=state[name];
+                setattr(self,name,v.item() if isinstance(v,np.ndarray) else v);
+        
+        self.G=None;
+        self.G_avg=None;
+        self.context=None;
+        
+        self._updateMechanisms();
+    
+    @staticmethod
+    def setStates(tissues,state):
+        """
+        self.setState() of many tissues of the same class and state shapes 
+        at once from self.getStates(), i.e. with a row per tissue. Much 
+        quicker than restoring them one by one.
+
+        Parameters
+        ----------
+        tissues : list<Tissue>
+            The tissues.
+        state : dict
+            Attribute name to stacked array.
+
+        Returns
+        -------
+        None.
+
+        """
+        for name in tissues[0].STATE:
+            values=[getattr(t,name) for t in tissues];
+            if isinstance(values[0],RingBuffer):
+                RingBuffer.setStates(values,{key:state[name+'.'+key] for key in ('data','head','sum','nonzero')});
+            elif isinstance(values[0],np.ndarray):
+                # In place, which keeps views such as the rows of bins.
+                rows=np.asarray(state[name]);
+                for value,row in zip(values,rows):
+                    value[...]=row;
+            else:
+                for t,v in zip(tissues,np.asarray(state[name]).tolist()):
+                    setattr(t,name,v);
+        
+        for t in tissues:
+            t.G=None;
+            t.G_avg=None;
+            t.context=None;
+            
+            # The mechanisms only depend on the state when a k is zero.
+            if(t._selected_mechanisms is None and 0 in (t._k_iri,t._k_dpi,t._k_gi)):
+                t._updateMechanisms();
+    
+    def saveState(self,file):
+        """
+        Save the state of the tissue to a .npz file @see self.getState().
+
+        Parameters
+        ----------
+        file : string|file
+            The file.
+
+        Returns
+        -------
+        None.
+
+        """
+        np.savez(file,**self.getState());
+    
+    def loadState(self,file):
+        """
+        Restore the state of the tissue from a file of self.saveState().
+
+        Parameters
+        ----------
+        file : string|file
+            The file.
+
+        Returns
+        -------
+        None.
+
+        """
+        with np.load(file) as state:
+            self.setState(state);
     
     def impulseResponse(self,dt=1,typ='dpi'):
         """
@@ -195,9 +486,7 @@ class Tissue:
         """
 
         # First in first out
-        L=len(self.Ps);
-        self.Ps[1:L-1]=self.Ps[0:L-2];
-        self.Ps[0]=self.P;
+        self.Ps.push(self.P);
     
     def setP(self,P):
         """
@@ -216,6 +505,78 @@ class Tissue:
         self.P=P;
         self.addToHistory();
         
+    def setGradient(self,G,G_avg=None):
+        """
+        Set the pressure gradient of the tissue for the next step, e.g. as 
+        computed for all tissues at once by ..inc.Neighbourhood. The list of 
+        neighbouring tissues given to the next step is then not used for 
+        the gradient.
+        
+        Parameters
+        ----------
+        G : float
+            Pressure gradient with respect to the neighbours.
+        G_avg : float, optional
+            Gradient of the mean pressure history with respect to the 
+            neighbours. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.G=G;
+        self.G_avg=G_avg;
+    
+    def pressureGradient(self,Tissues=[]):
+        """
+        Pressure gradient with respect to neighbouring tissues.
+
+        Parameters
+        ----------
+        Tissues : Arraylike, optional
+            Neighbouring tissues. The default is [].
+
+        Returns
+        -------
+        float
+            G=sum(|P-P_neighbour|)/2, or the gradient given to self.setGradient().
+
+        """
+        if(self.G is not None):
+            return self.G;
+        
+        G=0;
+        for T in Tissues:
+            G=G+abs(self.P - T.P);
+        return G/2.0;
+    
+    def meanPressureGradient(self,Tissues=[]):
+        """
+        Gradient of the mean pressure history with respect to neighbouring 
+        tissues.
+
+        Parameters
+        ----------
+        Tissues : Arraylike, optional
+            Neighbouring tissues. The default is [].
+
+        Returns
+        -------
+        float
+            sum(|mean(Ps)-mean(Ps_neighbour)|)/2, or the value given to 
+            self.setGradient().
+
+        """
+        if(self.G_avg is not None):
+            return self.G_avg;
+        
+        P_avg=self.Ps.mean();
+        G_avg=0;
+        for T in Tissues:
+            G_avg=G_avg+abs(P_avg - T.Ps.mean());
+        return G_avg/2.0;
+        
     def hasDamagingPressure(self,P=None):
         """
         Determines if the given or current pressure in the tissue is considered 
@@ -237,14 +598,8 @@ class Tissue:
         if (P is not None):
             pass;
         elif use_smoothed_P_copy:
-            L=round(10*5*10);
-            if hasattr(self, 'Ps'):                  
-                self.Ps[1:L-1]=self.Ps[0:L-2];
-                self.Ps[0]=self.P;
-            else:
-                self.Ps=[self.P]*L;
-            
-            P=np.mean(self.Ps);
+            self.Ps.push(self.P);
+            P=self.Ps.mean();
         else:
             P=self.P;
         
@@ -298,6 +653,9 @@ class Tissue:
         Boolean.
 
         """
+        # The current pressure was already checked for this step.
+        if(P is None and self.context is not None):
+            return not self.context['damaging'];
         
         if(self.hasDamagingPressure(P)):
             return False;
@@ -370,20 +728,646 @@ class Tissue:
         if(self.n>=0 or self.P>0):
             self.n+=1;
         
+        # Shared quantities of this sample
+        self.context=self._stepContext(dt);
+        
         # Update the relief counter
         self.countRelief();
         
         
         
         # step individual components
-        self._stepIri(dt);
-        self._stepDpi(dt);
-        self._stepGi(dt,Tissues);
+        self._stepMechanisms(dt,Tissues);
+        if(self._resting):
+            self._stepResting(dt,Tissues);
+        
+        # Gradients handed over by setGradient() and the context are valid 
+        # for one step.
+        self.G=None;
+        self.G_avg=None;
+        self.context=None;
+        
+        # Stop computing the mechanisms with a zero k once they are at rest.
+        if(self._settling):
+            self._updateMechanisms();
+        
+        
+        
+        
+        
+    
+    def stepConstant(self,P,k,dt,Tissues=[]):
+        """
+        Apply a constant pressure for k samples. Same as calling setP(P) and 
+        step(dt,Tissues) k times, with the neighbouring tissues held as they 
+        are, but where the filters have a closed form for a constant input 
+        the state is moved forward in one go, e.g. to skip flat stretches of 
+        a recording. Otherwise the k steps are taken one by one.
+
+        Parameters
+        ----------
+        P : float
+            Interface pressure (i.e.pressure on skin)
+        k : integer
+            Number of samples.
+        dt : float
+            Sampling time step in seconds.
+        Tissues : Arraylike, optional
+            Neighbouring tissues. The default is [].
+
+        Returns
+        -------
+        None.
+
+        """
+        # Gradients given to setGradient() hold for all the k samples.
+        G=self.G;
+        G_avg=self.G_avg;
+        
+        # Take individual steps while the history still affects the filters.
+        warmup=self._advanceWarmup(P,k);
+        for i in range(warmup):
+            self.setGradient(G,G_avg);
+            self.setP(P);
+            self.step(dt,Tissues);
+        
+        k=k-warmup;
+        if k<=0:
+            return;
+        
+        # Closed form for the remaining samples.
+        self.setGradient(G,G_avg);
+        self.P=P;
+        self.Ps.extend(np.full(min(k,self.Ps.live),P));
         
+        if(self.n>=0 or self.P>0):
+            self.n+=k;
         
+        if(self.isRelief()):
+            self.reliefCounter=self.reliefCounter+k;
+        else:
+            self.reliefCounter=0;
+            
+        self._advanceFilters(k,dt,Tissues);
         
+        self.G=None;
+        self.G_avg=None;
         
+        if(self._settling):
+            self._updateMechanisms();
+    
+    def advance(self,k,dt,Tissues=[]):
+        """
+        Move the tissue forward by k samples with its current pressure held 
+        @see self.stepConstant().
+
+        Parameters
+        ----------
+        k : integer
+            Number of samples.
+        dt : float
+            Sampling time step in seconds.
+        Tissues : Arraylike, optional
+            Neighbouring tissues. The default is [].
+
+        Returns
+        -------
+        None.
+
+        """
+        self.stepConstant(self.P,k,dt,Tissues);
+    
+    def _advanceWarmup(self,P,k):
+        """
+        Number of the k samples of constant pressure P that must be stepped 
+        individually before self._advanceFilters() applies.
+
+        Parameters
+        ----------
+        P : float
+            Interface pressure.
+        k : integer
+            Number of samples.
+
+        Returns
+        -------
+        integer
+            Number of samples.
+
+        """
+        # The load ratio depends on the mean pressure history, which is 
+        # constant only once the history is full of P.
+        if(self.LOAD_RATIO):
+            return self._advanceHistoryWarmup(P,k);
+        
+        # The closed form is that of the filters of this class.
+        if(not self._hasTissueFilters()):
+            return k;
         
+        return 0;
+    
+    def _advanceHistoryWarmup(self,P,k):
+        """
+        Number of the k samples of constant pressure P after which the mean 
+        pressure history stops changing.
+
+        Parameters
+        ----------
+        P : float
+            Interface pressure.
+        k : integer
+            Number of samples.
+
+        Returns
+        -------
+        integer
+            Number of samples.
+
+        """
+        v=self.Ps.view()[:self.Ps.live];
+        differs=np.flatnonzero(v!=P);
+        if(len(differs)==0):
+            return 0;
+        
+        # The oldest sample that differs from P leaves the history last.
+        return min(k,self.Ps.live-differs[0]);
+    
+    def _advanceFilter(self,a,b,y0,k):
+        """
+        k steps of y=max(a*y+b,0) with constant a and b.
+
+        Parameters
+        ----------
+        a : float
+            Coefficient.
+        b : float
+            Input.
+        y0 : float
+            Initial value.
+        k : integer
+            Number of steps.
+
+        Returns
+        -------
+        float
+            The value after k steps.
+
+        """
+        if(a>=0):
+            # The sequence is monotonic, so once the ReLU fires it holds y 
+            # at zero.
+            return max(Helpers.recurrencePower(a,b,y0,k),0);
+        
+        for i in range(k):
+            y0=max(a*y0+b,0);
+        return y0;
+    
+    def _advanceFilters(self,k,dt,Tissues=[]):
+        """
+        Closed form of k steps of the filters with the current pressure.
+
+        Parameters
+        ----------
+        k : integer
+            Number of samples.
+        dt : float
+            Sampling time step in seconds.
+        Tissues : Arraylike, optional
+            Neighbouring tissues. The default is [].
+
+        Returns
+        -------
+        None.
+
+        """
+        q=self.q(P=self.P,dt=dt);
+        
+        if('iri' in self.mechanisms):
+            self.iri=self._advanceFilter(1-self.beta_iri,self.k_iri*q*(1+self.beta_iri),self.iri,k);
+        if('dpi' in self.mechanisms):
+            self.dpi=self._advanceFilter(1-self.beta_dpi,self.k_dpi*q*(1+self.beta_dpi),self.dpi,k);
+        if('gi' in self.mechanisms):
+            qg=self.q(P=self.pressureGradient(Tissues),dt=dt);
+            self.gi=self._advanceFilter(1-self.beta_gi,self.k_gi*qg*(1+self.beta_gi),self.gi,k);
+    
+    def _stepResting(self,dt,Tissues=[]):
+        """
+        Keep the relief counter of a mechanism that is not computed because 
+        it is at rest, i.e. reliefCounterGi, which only needs the pressure 
+        gradient @see self._updateMechanisms().
+
+        Parameters
+        ----------
+        dt : float
+            Sampling time step in seconds.
+        Tissues : Arraylike, optional
+            Neighbouring tissues. The default is [].
+
+        Returns
+        -------
+        None.
+
+        """
+        if('gi' in self._resting):
+            self.reliefCounterGi=self.countRelief(self.pressureGradient(Tissues),self.reliefCounterGi);
+    
+    def _stepMechanisms(self,dt,Tissues=[]):
+        """
+        Step the individual injury mechanisms.
+
+        Parameters
+        ----------
+        dt : float
+            Sampling time step in seconds.
+        Tissues : Arraylike, optional
+            Neighbouring tissues. The default is [].
+
+        Returns
+        -------
+        None.
+
+        """
+        # Only the selected mechanisms @see self.setMechanisms()
+        if('iri' in self.mechanisms):
+            self._stepIri(dt);
+        if('dpi' in self.mechanisms):
+            self._stepDpi(dt);
+        if('gi' in self.mechanisms):
+            self._stepGi(dt,Tissues);
+    
+    def _stepContext(self,dt):
+        """
+        Compute the quantities of the current sample that are shared by the 
+        mechanisms, so that each is computed once per step.
+
+        Parameters
+        ----------
+        dt : float
+            Sampling time step in seconds.
+
+        Returns
+        -------
+        dict
+            'dt', 'q' (the effect of the current pressure) and 'damaging' 
+            (@see self.hasDamagingPressure()). With self.LOAD_RATIO also 
+            'qmin' (the minimum damaging q, i.e. Pmin applied for dt), 
+            'P_avg' (the mean pressure history) and 'u' (the load ratio).
+
+        """
+        ctx={'dt':dt,
+             'q':self.q(P=self.P,dt=dt),
+             'damaging':self.hasDamagingPressure()};
+        
+        if(self.LOAD_RATIO):
+            ctx['qmin']=self.q(self.Pmin,dt);
+            ctx['P_avg']=self.Ps.mean();
+            
+            # The load ratio is only used by iri and dpi.
+            if('iri' in self.mechanisms or 'dpi' in self.mechanisms):
+                ctx['u']=min(self.q(P=ctx['P_avg'],dt=dt),ctx['qmin'])/ctx['qmin'];
+        
+        return ctx;
+    
+    def _getContext(self,dt):
+        """
+        The context of the current step @see self._stepContext(). A fresh 
+        one is computed when a mechanism is stepped on its own.
+
+        Parameters
+        ----------
+        dt : float
+            Sampling time step in seconds.
+
+        Returns
+        -------
+        dict
+            The context.
+
+        """
+        if(self.context is None or self.context['dt']!=dt):
+            return self._stepContext(dt);
+        return self.context;
+    
+    def simulate(self,Ps,dt,Pn=None):
+        """
+        Run the tissue over a whole pressure trace at once. The result is the 
+        same as calling setP(), step() and health() for every sample but the 
+        filter recursion is evaluated with vectorised array operations. The 
+        tissue is left in the state it would have after the last sample. 
+        Classes without a vectorised engine are stepped sample by sample.
+
+        Parameters
+        ----------
+        Ps : Arraylike<float>
+            Interface pressure trace in kPa.
+        dt : float
+            Sampling time step in seconds.
+        Pn : Arraylike<float>, optional
+            Pressure traces of the neighbouring tissues, one row per 
+            neighbour. The default is None, i.e. no neighbours.
+
+        Returns
+        -------
+        dict
+            Time series of 'iri', 'dpi', 'gi' and 'health' (as in 
+            self.health(dt)) for every sample.
+
+        """
+        Ps=np.asarray(Ps,dtype=np.float64);
+        
+        if(not self._hasTissueFilters()):
+            return self._simulateSteps(Ps,dt,Pn);
+        
+        self._simulateCounters(Ps);
+        
+        # Effect
+        q=self.qArray(Ps,dt);
+        qg=self.qArray(self._simulateGradient(Ps,Pn),dt,Ps);
+        
+        # Filter
+        iri=self._simulateFilter(1-self.beta_iri,self.k_iri*q*(1+self.beta_iri),self.iri) if 'iri' in self.mechanisms else self._simulateFrozen(self.iri,len(Ps));
+        dpi=self._simulateFilter(1-self.beta_dpi,self.k_dpi*q*(1+self.beta_dpi),self.dpi) if 'dpi' in self.mechanisms else self._simulateFrozen(self.dpi,len(Ps));
+        gi=self._simulateFilter(1-self.beta_gi,self.k_gi*qg*(1+self.beta_gi),self.gi) if 'gi' in self.mechanisms else self._simulateFrozen(self.gi,len(Ps));
+        
+        if len(Ps):
+            self.iri=float(iri[-1]);
+            self.dpi=float(dpi[-1]);
+            self.gi=float(gi[-1]);
+        self._simulateHistory(Ps);
+        
+        return {'iri':iri,'dpi':dpi,'gi':gi,'health':dt*(iri+dpi+gi)};
+    
+    def qArray(self,Ps,dt=1,P=None):
+        """
+        Array version of self.q().
+
+        Parameters
+        ----------
+        Ps : Arraylike<float>
+            Pressures in kPa.
+        dt : float, optional
+            Sampling time in seconds. The default is 1.
+        P : Arraylike<float>, optional
+            The current pressure at each sample. Like self.q() uses self.P 
+            when the given pressure is zero, these values are used where Ps 
+            is zero. The default is None.
+
+        Returns
+        -------
+        numpy.ndarray
+            Estimated damage magnitudes.
+
+        """
+        Ps=np.asarray(Ps,dtype=np.float64);
+        if P is not None:
+            Ps=np.where(Ps==0,P,Ps);
+            
+        t=dt/60; # We turn to minutes because model is in minutes
+        
+        return self.effectEstimator.q(Ps,t);
+    
+    def _simulateCounters(self,Ps):
+        """
+        Compute the sample counter and relief counter for every sample of a 
+        pressure trace, and leave both counters at their final values.
+
+        Parameters
+        ----------
+        Ps : numpy.ndarray
+            Interface pressure trace.
+
+        Returns
+        -------
+        list
+            [n,reliefCounter] sequences.
+
+        """
+        # Counting starts from the first non-zero pressure.
+        started=np.logical_or.accumulate(Ps>0) | (self.n>=0);
+        n=self.n+np.cumsum(started);
+        
+        is_relief=np.logical_not(self.pressureTimeThreshold.isDamagingPressure(Ps));
+        reliefCounter=Helpers.runLength(is_relief,self.reliefCounter);
+        
+        if len(Ps):
+            self.n=int(n[-1]);
+            self.reliefCounter=int(reliefCounter[-1]);
+            
+        return [n,reliefCounter];
+    
+    def _simulateGradient(self,Ps,Pn=None):
+        """
+        Pressure gradient with respect to neighbours for every sample.
+
+        Parameters
+        ----------
+        Ps : numpy.ndarray
+            Interface pressure trace.
+        Pn : Arraylike<float>, optional
+            Neighbour pressure traces, one row per neighbour. The default is None.
+
+        Returns
+        -------
+        numpy.ndarray
+            The gradient G.
+
+        """
+        if Pn is None:
+            return np.zeros(len(Ps));
+        
+        Pn=np.asarray(Pn,dtype=np.float64).reshape(-1,len(Ps));
+        return np.sum(np.abs(Ps-Pn),axis=0)/2.0;
+    
+    def _simulateMeanGradient(self,Ps,Pn=None):
+        """
+        Gradient of the mean pressure history with respect to neighbours for 
+        every sample. The histories of the neighbours continue from those of 
+        the last call, so that a trace can be simulated in chunks, and start 
+        empty on the first call or when the number of neighbours changes 
+        @see self.Pn_history.
+
+        Parameters
+        ----------
+        Ps : numpy.ndarray
+            Interface pressure trace.
+        Pn : Arraylike<float>, optional
+            Neighbour pressure traces, one row per neighbour. The default is None.
+
+        Returns
+        -------
+        numpy.ndarray
+            The gradient G_avg.
+
+        """
+        if Pn is None:
+            self.Pn_history=None;
+            return np.zeros(len(Ps));
+        
+        L=self.Ps.length;
+        live=self.Ps.live;
+        
+        Pn=np.asarray(Pn,dtype=np.float64).reshape(-1,len(Ps));
+        history=self.Pn_history;
+        if(history is None or len(history)!=len(Pn)):
+            history=np.zeros((len(Pn),live));
+        
+        P_avg=self._simulateMeans(Ps);
+        G_avg=np.zeros(len(Ps));
+        for P,initial in zip(Pn,history):
+            G_avg=G_avg+np.abs(P_avg-Helpers.rollingMean(P,L,live,initial));
+        
+        # The newest live samples of each neighbour, for the next call.
+        self.Pn_history=np.concatenate((history[:,::-1],Pn),axis=1)[:,::-1][:,:live].copy();
+        
+        return G_avg/2.0;
+    
+    def _simulateMeans(self,Ps):
+        """
+        Mean pressure history after each sample of the trace, continuing 
+        from the current history.
+
+        Parameters
+        ----------
+        Ps : numpy.ndarray
+            Interface pressure trace.
+
+        Returns
+        -------
+        numpy.ndarray
+            The means.
+
+        """
+        return Helpers.rollingMean(Ps,self.Ps.length,self.Ps.live,self.Ps.view());
+    
+    def _simulateSteps(self,Ps,dt,Pn=None):
+        """
+        self.simulate() by stepping sample by sample. Neighbour gradients are 
+        computed from the neighbour traces and handed to the steps 
+        @see self.setGradient().
+        """
+        G=G_avg=None;
+        if Pn is not None:
+            G=self._simulateGradient(Ps,Pn);
+            G_avg=self._simulateMeanGradient(Ps,Pn);
+        
+        out=np.zeros((4,len(Ps)));
+        for n in range(len(Ps)):
+            self.setP(Ps[n]);
+            if G is not None:
+                self.setGradient(G[n],G_avg[n]);
+            self.step(dt);
+            out[:,n]=[self.healthIri(),self.healthDpi(),self.healthGi(),self.health(dt)];
+        
+        return {'iri':out[0],'dpi':out[1],'gi':out[2],'health':out[3]};
+    
+    def _hasTissueFilters(self):
+        """
+        Check if the tissue steps with the filters of this class, i.e. they 
+        are not replaced by a child class.
+
+        Returns
+        -------
+        boolean
+
+        """
+        for name in ('_stepIri','_stepDpi','_stepGi'):
+            if(getattr(type(self),name) is not getattr(Tissue,name)):
+                return False;
+        return True;
+    
+    def _simulateLoadRatio(self,P_avg,Ps,dt):
+        """
+        Load ratio u for every sample @see self.LOAD_RATIO.
+
+        Parameters
+        ----------
+        P_avg : numpy.ndarray
+            Mean pressure (or mean pressure gradient) that determines the 
+            relief.
+        Ps : numpy.ndarray
+            Interface pressure trace, used where P_avg is zero as in self.q().
+        dt : float
+            Sampling time step in seconds.
+
+        Returns
+        -------
+        numpy.ndarray
+            u.
+
+        """
+        qmin=self.q(self.Pmin,dt);
+        q_relief=self.qArray(P_avg,dt,Ps);
+        return np.minimum(q_relief,qmin)/qmin;
+    
+    def _simulateFrozen(self,y0,N):
+        """
+        Output of a mechanism that is not computed @see self.setMechanisms(), 
+        which holds its state.
+
+        Parameters
+        ----------
+        y0 : float
+            The state.
+        N : integer
+            Number of samples.
+
+        Returns
+        -------
+        numpy.ndarray
+            The output.
+
+        """
+        return np.full(N,float(y0));
+    
+    def _simulateFilter(self,a,b,y0):
+        """
+        Evaluate y[n]=max(a*y[n-1]+b[n],0) over a whole sequence.
+
+        Parameters
+        ----------
+        a : float|numpy.ndarray
+            Coefficient(s).
+        b : numpy.ndarray
+            Input.
+        y0 : float
+            Initial value.
+
+        Returns
+        -------
+        numpy.ndarray
+            The output.
+
+        """
+        # The ReLU cannot fire when nothing is negative, so the plain linear 
+        # recursion applies.
+        if np.all(np.asarray(a)>=0) and np.all(b>=0) and y0>=0:
+            return Helpers.recurrence(a,b,y0);
+        
+        a=np.broadcast_to(a,b.shape);
+        y=np.empty(len(b));
+        for n in range(len(b)):
+            y0=max(a[n]*y0+b[n],0);
+            y[n]=y0;
+        return y;
+    
+    def _simulateHistory(self,Ps):
+        """
+        Leave the current pressure and history as they would be after 
+        setting every pressure of the trace.
+
+        Parameters
+        ----------
+        Ps : numpy.ndarray
+            Interface pressure trace.
+
+        Returns
+        -------
+        None.
+
+        """
+        if len(Ps):
+            self.P=Ps[-1];
+            self.Ps.extend(Ps);
     
     # 
     def _stepIri(self,dt): 
@@ -404,7 +1388,7 @@ class Tissue:
         
         
         # Filter
-        q=self.q(P=self.P,dt=dt);
+        q=self._getContext(dt)['q'];
         self.iri=self.iri*(1-self.beta_iri)+self.k_iri*q*(1+self.beta_iri);
         
         
@@ -430,7 +1414,7 @@ class Tissue:
         """
         
         # Filter
-        q=self.q(P=self.P,dt=dt);
+        q=self._getContext(dt)['q'];
         self.dpi=self.dpi*(1-self.beta_dpi)+self.k_dpi*q*(1+self.beta_dpi);
         
         
@@ -457,10 +1441,7 @@ class Tissue:
         """
         
         # Pressure gradient
-        G=0;
-        for T in Tissues:
-            G=G+abs(self.P - T.P);
-        G=G/2.0;
+        G=self.pressureGradient(Tissues);
         
         
         
@@ -0,0 +1,458 @@
+# -*- coding: utf-8 -*-
+import numpy as np;
+from ..inc.PressureTimeThreshold import PressureTimeThreshold;
+from ..inc.EffectEstimator import EffectEstimator;
+from ..inc.RingBuffer import RingBuffer;
+from ..inc.Neighbourhood import Neighbourhood;
+from .TissueBinned import TissueBinned;
+
+class TissueArray:
+
+    # Supported methods and the Tissue classes whose stepping they reproduce.
+    METHODS={
+        'exponential':'Tissue',
+        'special':'TissueSpecial',
+        'continuous':'TissueContinuous',
+        'linear':'TissueLinear',
+        'fixed':'TissueFixed',
+        'inverse':'TissueInverse',
+        'binned':'TissueBinned',
+        'averaging':'TissueAveraging',
+        };
+
+    # Attributes that make up the state of the tissues @see self.getState()
+    STATE=('iri','dpi','gi','iri_before_relief','dpi_before_relief','gi_before_relief',
+           'P','n','reliefCounter','reliefCounterGi','Ps');
+
+    def __init__(self,code,shape,pressureTimeThreshold,effectEstimator,method='exponential',beta_dpi=1,beta_iri=1,beta_gi=1,k_dpi=1,k_iri=0,k_gi=0,history_len=50,reliefTimeThreshold=5,neighbourhood=None,len_dpi=1,len_iri=1,len_gi=1):
+        """
+        TissueArray monitors a whole grid of tissues, e.g. the cells of a
+        pressure mat, at once. Instead of one Tissue object per cell, the
+        state of all cells is held in contiguous numpy arrays and every step
+        is a handful of vectorised operations over the grid. Each cell
+        behaves exactly as the Tissue class selected by the method, which
+        covers every class of ..bank. The 'averaging' method matches to
+        rounding only, as the running sums of its buffers are recomputed
+        per cell rather than over a whole buffer.
+
+        With the 'binned' method self.iri, self.dpi and self.gi hold the
+        bins of every cell in shape shape+(3,), and with the 'averaging'
+        method they are buffers of the damage of every cell @see
+        ..inc.RingBuffer.
+
+        Parameters
+        ----------
+        code : string
+            Arbitrary idetifier.
+        shape : tuple|integer
+            Shape of the grid of tissues, e.g. (64,64).
+        pressureTimeThreshold : PressureTimeThreshold
+            An instance of PressureTimeThreshold
+        effectEstimator : EffectEstimator
+            The effect estimator
+        method : string, optional
+            The accumulation and relief method of the cells @see self.METHODS.
+            The default is 'exponential', i.e. as ..bank.Tissue.
+        beta_dpi, beta_iri, beta_gi : float, optional
+            Effect relieve rates @see ..bank.Tissue. They are not used by the
+            'fixed', 'inverse' and 'averaging' methods. The default is 1.
+        k_dpi, k_iri, k_gi : float, optional
+            Damage contribution ratios @see ..bank.Tissue. The defaults are
+            1, 0 and 0 respectively.
+        history_len : integer, optional
+            The length(in samples) of the pressure history kept per cell
+            @see ..bank.Tissue. The default is 50.
+        reliefTimeThreshold : float, optional
+            Relief time threshold in seconds for the 'fixed' method
+            @see ..bank.TissueFixed. The default is 5.
+        neighbourhood : Neighbourhood|integer, optional
+            Neighbourhood of the tissues used to compute pressure gradients.
+            4 or 8 selects the 4 or 8 connected neighbourhood of a 2-D grid.
+            The default is None, i.e. gradients are zero unless given to
+            self.step().
+        len_dpi, len_iri, len_gi : integer, optional
+            Averaging filter lengths for the 'averaging' method
+            @see ..bank.TissueAveraging. The default is 1.
+
+        Returns
+        -------
+        None.
+
+        """
+        if(method not in self.METHODS):
+            raise Exception('Unknown method: '+str(method));
+
+        # Pressure-time cell death threshold
+        if(isinstance(pressureTimeThreshold, PressureTimeThreshold)):
+            self.pressureTimeThreshold=pressureTimeThreshold;
+        else:
+            raise Exception('Parameter 3 must be an instance of PressureTimeThreshold');
+
+        # Estimator
+        if(isinstance(effectEstimator, EffectEstimator)):
+            self.effectEstimator=effectEstimator;
+        else:
+            raise Exception('Parameter 4 must be an instance of EffectEstimator');
+
+        self.code=code;
+        self.shape=tuple(np.atleast_1d(shape));
+        self.method=method;
+
+        self.beta_iri=beta_iri;
+        self.beta_dpi=beta_dpi;
+        self.beta_gi=beta_gi;
+
+        self.k_iri=k_iri;
+        self.k_dpi=k_dpi;
+        self.k_gi=k_gi;
+
+        self.reliefTimeThreshold=reliefTimeThreshold;
+
+        self.len_iri=len_iri;
+        self.len_dpi=len_dpi;
+        self.len_gi=len_gi;
+
+        # Continously relief or relief only when there is none damaging
+        # pressure, for the 'binned' method @see ..bank.TissueBinned. A
+        # boolean for all cells or an array of the shape for each.
+        self.continouse_relief=True;
+
+        if(isinstance(neighbourhood,int)):
+            neighbourhood=Neighbourhood.grid(self.shape,neighbourhood);
+        self.neighbourhood=neighbourhood;
+
+        # Set the minimum damaging pressure value
+        self.Pmin=self.pressureTimeThreshold.getLongTermThreshold();
+
+        # Pressure history of every cell @see ..bank.Tissue.Ps
+        self.Ps=RingBuffer(history_len,max(history_len-1,1),shape=self.shape);
+
+        self.reset();
+
+    def reset(self):
+        """
+        Reset all tissues to their initial state
+
+        Returns
+        -------
+        None.
+
+        """
+        shape=self.shape;
+
+        self.iri=np.zeros(shape); #ischeamiaReperfutionInjury
+        self.dpi=np.zeros(shape); # deepPressureInjury
+        self.gi=np.zeros(shape); # gradientInjury
+
+        if(self.method=='binned'):
+            self.iri=np.zeros(shape+(3,));
+            self.dpi=np.zeros(shape+(3,));
+            self.gi=np.zeros(shape+(3,));
+        elif(self.method=='averaging'):
+            self.iri=RingBuffer(self.len_iri,max(self.len_iri-1,1),shape=shape);
+            self.dpi=RingBuffer(self.len_dpi,max(self.len_dpi-1,1),shape=shape);
+            self.gi=RingBuffer(self.len_gi,max(self.len_gi-1,1),shape=shape);
+
+        # Used by the 'inverse' method to capture the accumulated effect
+        # before the start of a load relief.
+        self.iri_before_relief=np.zeros(shape);
+        self.dpi_before_relief=np.zeros(shape);
+        self.gi_before_relief=np.zeros(shape);
+
+        # Current interface pressures
+        self.P=np.zeros(shape);
+        self.Ps.clear();
+
+        # Sample counters
+        self.n=np.full(shape,-1,dtype=np.int64);
+
+        # Relief counters(in samples), the second one is for GI.
+        self.reliefCounter=np.zeros(shape,dtype=np.int64);
+        self.reliefCounterGi=np.zeros(shape,dtype=np.int64);
+
+    def getState(self):
+        """
+        Copy of the state of all tissues @see ..bank.Tissue.getState().
+
+        Returns
+        -------
+        dict
+            Attribute name to array.
+
+        """
+        state={};
+        for name in self.STATE:
+            value=getattr(self,name);
+            if isinstance(value,RingBuffer):
+                for key,v in value.getState().items():
+                    state[name+'.'+key]=v;
+            else:
+                state[name]=np.array(value);
+        return state;
+
+    def setState(self,state):
+        """
+        Restore the state of all tissues from self.getState() of an array of
+        the same shape, method and parameters.
+
+        Parameters
+        ----------
+        state : dict|numpy.lib.npyio.NpzFile
+            The state.
+
+        Returns
+        -------
+        None.
+
+        """
+        for name in self.STATE:
+            value=getattr(self,name);
+            if isinstance(value,RingBuffer):
+                value.setState({key:state[name+'.'+key] for key in ('data','head','sum','nonzero')});
+            else:
+                v=np.asarray(state[name]);
+                if(v.shape!=value.shape):
+                    raise Exception('State of shape '+str(v.shape)+' does not fit tissues of shape '+str(value.shape));
+                setattr(self,name,v.astype(value.dtype,copy=True));
+
+    def saveState(self,file):
+        """
+        Save the state of all tissues to a .npz file @see self.getState().
+        """
+        np.savez(file,**self.getState());
+
+    def loadState(self,file):
+        """
+        Restore the state of all tissues from a file of self.saveState().
+        """
+        with np.load(file) as state:
+            self.setState(state);
+
+    def setP(self,P):
+        """
+        Set the current interface pressure of all tissues.
+
+        Parameters
+        ----------
+        P : Arraylike<float>
+            Interface pressures, a frame of the shape of the grid.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.P=np.array(P,dtype=np.float64).reshape(self.shape);
+        self.Ps.push(self.P);
+
+    def q(self,P,dt=1):
+        """
+        Determine pressure-time total damage of every tissue. As with
+        ..bank.Tissue.q() a zero pressure is replaced by the current
+        pressure of the tissue.
+
+        Parameters
+        ----------
+        P : numpy.ndarray
+            Pressures in kPa.
+        dt : float, optional
+            Sampling time in seconds. The default is 1.
+
+        Returns
+        -------
+        numpy.ndarray
+            Estimated damage magnitudes.
+
+        """
+        P=np.where(P==0,self.P,P);
+        t=dt/60; # We turn to minutes because model is in minutes
+
+        return self.effectEstimator.q(P,t);
+
+    def step(self,dt,G=None,G_avg=None):
+        '''
+        Compute the effect of the current applied pressures on all tissues
+        for one time step.
+
+        Parameters
+        ----------
+        dt : float
+            Sampling time step in seconds.
+        G : Arraylike<float>, optional
+            Pressure gradient of every tissue with respect to its
+            neighbours. The default is None, i.e. computed from
+            self.neighbourhood if any, zero otherwise.
+        G_avg : Arraylike<float>, optional
+            Gradient of the mean pressure history of every tissue with
+            respect to its neighbours, used by 'continuous' and 'linear'
+            methods. The default is None, i.e. computed from the mean
+            pressure histories with self.neighbourhood if any and the
+            method uses it, zero otherwise.
+
+        Returns
+        -------
+        None.
+
+        '''
+        P=self.P;
+        zeros=np.zeros(self.shape);
+        nbh=self.neighbourhood;
+        uses_avg=self.method=='continuous' or self.method=='linear';
+        if(G is None):
+            G=zeros if nbh is None else nbh.gradient(P);
+        if(G_avg is None):
+            G_avg=zeros if (nbh is None or not uses_avg) else nbh.gradient(self.Ps.mean());
+        G=np.asarray(G,dtype=np.float64).reshape(self.shape);
+        G_avg=np.asarray(G_avg,dtype=np.float64).reshape(self.shape);
+
+        # Start counting from the first non-zero input pressure
+        self.n+=(self.n>=0)|(P>0);
+
+        # Update the relief counters
+        damaging=self.pressureTimeThreshold.isDamagingPressure(P);
+        self.reliefCounter=np.where(damaging,0,self.reliefCounter+1);
+        if(self.method=='fixed' or self.method=='inverse'):
+            damaging=self.pressureTimeThreshold.isDamagingPressure(G);
+            self.reliefCounterGi=np.where(damaging,0,self.reliefCounterGi+1);
+
+        # Effect
+        q=self.q(P,dt);
+        qg=self.q(G,dt);
+
+        # Binned and averaging methods take the damage of damaging samples only.
+        if(self.method=='binned' or self.method=='averaging'):
+            d=np.where(damaging,q,0.0);
+            dg=np.where(damaging,qg,0.0);
+            for x,k,beta,dm in ((self.iri,self.k_iri,self.beta_iri,d),(self.dpi,self.k_dpi,self.beta_dpi,d),(self.gi,self.k_gi,self.beta_gi,dg)):
+                if(self.method=='binned'):
+                    TissueBinned.binKernel(x,k*dm,beta,self.continouse_relief);
+                else:
+                    x.push(k*dm);
+            return;
+
+        # Load ratio for relief
+        u=u_gi=None;
+        if(uses_avg):
+            qmin=self.effectEstimator.q(self.Pmin,dt/60);
+            u=np.minimum(self.q(self.Ps.mean(),dt),qmin)/qmin;
+            u_gi=np.minimum(self.q(G_avg,dt),qmin)/qmin;
+
+        self.iri=self._filter(self.iri,'iri',self.k_iri,self.beta_iri,q,u,self.reliefCounter,dt);
+        self.dpi=self._filter(self.dpi,'dpi',self.k_dpi,self.beta_dpi,q,u,self.reliefCounter,dt);
+        self.gi=self._filter(self.gi,'gi',self.k_gi,self.beta_gi,qg,u_gi,self.reliefCounterGi,dt);
+
+    def _filter(self,x,name,k,beta,q,u,reliefCounter,dt):
+        """
+        Advance the accumulated effect of one injury mechanism by one step.
+
+        Parameters
+        ----------
+        x : numpy.ndarray
+            The current accumulated effect.
+        name : string
+            The mechanism, i.e. 'iri', 'dpi' or 'gi'.
+        k : float
+            Damage contribution ratio.
+        beta : float
+            Effect relieve rate.
+        q : numpy.ndarray
+            Effect of the current sample.
+        u : numpy.ndarray
+            Load ratio for 'continuous' and 'linear' methods.
+        reliefCounter : numpy.ndarray
+            Relief counter of the mechanism.
+        dt : float
+            Sampling time step in seconds.
+
+        Returns
+        -------
+        numpy.ndarray
+            The updated accumulated effect.
+
+        """
+        method=self.method;
+
+        if(method=='exponential'):
+            x=x*(1-beta)+k*q*(1+beta);
+        elif(method=='special'):
+            x=x*(1-beta)+k*q*(1+self.n*beta);
+        elif(method=='continuous'):
+            x=k*q+(1-beta*(1-u))*x;
+        elif(method=='linear'):
+            x=k*q + x - (beta*(1-u));
+        elif(method=='fixed'):
+            x=np.where((reliefCounter*dt)>=self.reliefTimeThreshold,0,x+k*q);
+        elif(method=='inverse'):
+            before=getattr(self,name+'_before_relief');
+            relief_secs=np.maximum(reliefCounter*dt,1);
+            x=np.where(reliefCounter>0,before*1/relief_secs,x+k*q);
+            setattr(self,name+'_before_relief',np.where(reliefCounter>0,before,x));
+
+        # Introduce non-linearity to remove negative values
+        return np.maximum(x,0); # ReLU
+
+    def healthIri(self):
+        """
+        Tissue Health for Ischaemia and reperfusion of every tissue
+
+        Returns
+        -------
+        numpy.ndarray
+            Tissue health numbers for IRI.
+
+        """
+        return self._health(self.iri);
+
+    def healthDpi(self):
+        """
+        Tissue Health for Deep Tissue Injury of every tissue
+
+        Returns
+        -------
+        numpy.ndarray
+            Tissue health numbers for DPI.
+
+        """
+        return self._health(self.dpi);
+
+    def healthGi(self):
+        """
+        Tissue Health for Gradient injury/damage of every tissue
+
+        Returns
+        -------
+        numpy.ndarray
+            Tissue health numbers for GI.
+
+        """
+        return self._health(self.gi);
+
+    def _health(self,x):
+        """
+        Tissue health numbers of the state of a mechanism.
+        """
+        if(self.method=='binned'):
+            return np.sum(x,axis=-1);
+        if(self.method=='averaging'):
+            return x.mean();
+        return x;
+
+    def health(self,dt=1):
+        """
+        Overall Tissue Health of every tissue @see ..bank.Tissue.health()
+
+        Parameters
+        ----------
+        dt : float
+            Sampling time step in seconds.
+
+        Returns
+        -------
+        numpy.ndarray
+            Tissue health numbers.
+
+        """
+        return dt*(self.healthIri() + self.healthDpi() + self.healthGi());
+
+    def __len__(self):
+        return int(np.prod(self.shape));
@@ -1,5 +1,6 @@
 import numpy as np;
 from .Tissue import Tissue;
+from ..inc.RingBuffer import RingBuffer;
 
 
 class TissueAveraging(Tissue):
@@ -34,10 +35,11 @@ class TissueAveraging(Tissue):
         self._relief_method='averaging';
         
        
-        # Buffers
-        self.iri=np.array([0 for i in range(len_iri)],dtype=np.float_); #ischeamiaReperfutionInjury
-        self.dpi=np.array([0]*len_dpi,dtype=np.float_); # deepTissueInjury
-        self.gi=np.array([0]*len_gi,dtype=np.float_); # gradientInjury
+        # Buffers. As with Tissue.Ps, only the newest len-1 samples of a 
+        # buffer are live while the mean is taken over len samples.
+        self.iri=RingBuffer(len_iri,max(len_iri-1,1)); #ischeamiaReperfutionInjury
+        self.dpi=RingBuffer(len_dpi,max(len_dpi-1,1)); # deepTissueInjury
+        self.gi=RingBuffer(len_gi,max(len_gi-1,1)); # gradientInjury
    
        
         
@@ -46,15 +48,14 @@ class TissueAveraging(Tissue):
         #
         
         # Damage
-        if(self.hasDamagingPressure()):
-            d=self.k_iri*self.q(P=self.P,dt=dt);
+        ctx=self._getContext(dt);
+        if(ctx['damaging']):
+            d=self.k_iri*ctx['q'];
         else:
             d=0;
             
         # First in first out. 
-        L=len(self.iri);      
-        self.iri[1:L-1]=self.iri[0:L-2];
-        self.iri[0]=d;
+        self.iri.push(d);
 
         
 
@@ -62,38 +63,28 @@ class TissueAveraging(Tissue):
     def  _stepDpi(self,dt):
         
         # Damage
-        if(self.hasDamagingPressure()):
-            d=self.k_dpi*self.q(P=self.P,dt=dt);
+        ctx=self._getContext(dt);
+        if(ctx['damaging']):
+            d=self.k_dpi*ctx['q'];
         else:
             d=0;
             
             
         # First in first out. 
-        L=len(self.dpi);      
-        self.dpi[1:L-1]=self.dpi[0:L-2];
-        self.dpi[0]=d;
-        # SAME AS:
-        #self.dpi=np.concatenate(([d],self.dpi));
-        #self.dpi=np.delete(self.dpi,L-1);
+        self.dpi.push(d);
     
     def _stepGi(self,dt,Tissues=[]):
         
         # Damage
-        G=0;#Pressure gradient
-        for T in Tissues:
-            G=G+abs(self.P - T.P);
+        G=self.pressureGradient(Tissues);#Pressure gradient
             
-        G=G/2.0;
-            
-        if(self.hasDamagingPressure()):
+        if(self._getContext(dt)['damaging']):
             d=self.k_gi*self.q(P=G,dt=dt);
         else:
             d=0;
         
        # First in first out. 
-        L=len(self.gi);      
-        self.gi[1:L-1]=self.gi[0:L-2];
-        self.gi[0]=d;
+        self.gi.push(d);
         
     
     def healthIri(self):
@@ -106,7 +97,7 @@ class TissueAveraging(Tissue):
             Tissue health number for IRI.
 
         """
-        return np.mean(self.iri);
+        return self.iri.mean();
     
     def healthDpi(self):
         """
@@ -119,7 +110,7 @@ class TissueAveraging(Tissue):
 
         """
             
-        return np.mean(self.dpi);
+        return self.dpi.mean();
     
     def healthGi(self):
         """
@@ -131,4 +122,4 @@ class TissueAveraging(Tissue):
             Tissue health number for GI.
 
         """
-        return np.mean(self.gi);
+        return self.gi.mean();
@@ -3,6 +3,12 @@ from .Tissue import Tissue;
 
 
 class TissueBinned(Tissue):
+
+    # Lower damage bounds of the bins
+    BIN_EDGES=np.array([Tissue.DAMAGE_LOW,Tissue.DAMAGE_MID,Tissue.DAMAGE_HIGH]);
+
+    # The bins in place of their row views iri, dpi and gi @see Tissue.getState()
+    STATE=('bins',)+Tissue.STATE[3:];
  
     def __init__(self,code,pressureTimeThreshold,effectEstimator,beta_dpi=1,beta_iri=1,beta_gi=1,k_dpi=1,k_iri=0,k_gi=0):
         """
@@ -20,140 +26,258 @@ class TissueBinned(Tissue):
         self._damage_method='binned';
         
        
-        # Bins
-        self.iri=np.array([0,0,0],dtype=np.float_); #ischeamiaReperfutionInjury
-        self.dpi=np.array([0,0,0],dtype=np.float_); #deepTissueInjury
-        self.gi=np.array([0,0,0],dtype=np.float_); # gradientInjury
+        # Bins, one row per mechanism. self.iri, self.dpi and self.gi are
+        # views of the rows.
+        self.bins=np.zeros((3,3));
+        self.iri=self.bins[0]; #ischeamiaReperfutionInjury
+        self.dpi=self.bins[1]; #deepTissueInjury
+        self.gi=self.bins[2]; # gradientInjury
    
         # Continously relief or relief only when there is none damaging pressure.
         self.continouse_relief=True;
         
-    def _stepIri(self,dt):      
+    def reset(self):
+        Tissue.reset(self);
         
-        #
+        # Tissue.reset() replaces the bins with scalars.
+        if hasattr(self,'bins'):
+            self.bins[:]=0;
+            self.iri=self.bins[0];
+            self.dpi=self.bins[1];
+            self.gi=self.bins[2];
         
-        # Damage
-        if(self.hasDamagingPressure()):
-            d=self.k_iri*self.q(P=self.P,dt=dt);
-        else:
-            d=0;
-        
-        bin_idx=None;# Bin index
-        if d < Tissue.DAMAGE_LOW:
-            bin_idx=None;
-        elif d < Tissue.DAMAGE_MID:
-            bin_idx=0;
-        elif d < Tissue.DAMAGE_HIGH:
-            bin_idx=1;
-        else:
-            bin_idx=2; 
+    @classmethod
+    def binIndex(cls,d,continouse_relief=True):
+        """
+        The bin that takes a given damage.
+        
+        Parameters
+        ----------
+        d : float|numpy.ndarray
+            Damage.
+        continouse_relief : boolean|numpy.ndarray, optional
+            @see self.continouse_relief. When true damage always goes to the
+            first bin. The default is True.
+
+        Returns
+        -------
+        integer|numpy.ndarray
+            Bin index, -1 when the damage is too small for any bin.
+
+        """
+        idx=np.searchsorted(cls.BIN_EDGES,d,side='right')-1;
         
         # Overide the computed bin above and use a fixed bin if we 
         # are only performing pressure relieve when their is none 
         # damaging input pressure.
-        if self.continouse_relief and (bin_idx is not None):
-            bin_idx=0;
+        return np.where(np.logical_and(continouse_relief,idx>=0),0,idx);
         
+    @classmethod
+    def binKernel(cls,bins,d,beta,continouse_relief=True):
+        """
+        Update bins with one sample of damage. The damage is added to its
+        bin while the other bins are relieved. Works on any number of
+        mechanisms and tissues at once.
         
-        if bin_idx is not None:
-            self.iri[bin_idx]=self.iri[bin_idx] + d;
+        Parameters
+        ----------
+        bins : numpy.ndarray
+            Bins of shape (...,3), e.g. (3,3) for the three mechanisms of a
+            tissue or (tissues,3,3) for many tissues. Updated in place.
+        d : numpy.ndarray
+            Damage of shape bins.shape[:-1].
+        beta : float|numpy.ndarray
+            Effect relieve rate(s), broadcastable to the shape of d.
+        continouse_relief : boolean|numpy.ndarray, optional
+            @see self.binIndex(). The default is True.
         
-         # Relieve
-        for bn in range(0,3):
-            if(bin_idx is None or (bn != bin_idx)): # Ensures that we relieve only relieved effect
-                r=self.beta_iri * self.iri[bn];
-                self.iri[bn]=self.iri[bn] - r;
+        Returns
+        -------
+        numpy.ndarray
+            The updated bins.
                
+        """
+        d=np.asarray(d,dtype=np.float64);
+        idx=cls.binIndex(d,continouse_relief);
+
+        # Ensures that we relieve only relieved effect
+        loaded=idx[...,None]==np.arange(bins.shape[-1]);
+        relieved=bins*(1-np.asarray(beta)[...,None]);
+        np.copyto(bins,np.where(loaded,bins+d[...,None],relieved));
         
         # Introduce non-linearity to remove negative values
-        self.iri[self.iri<0]=0; # ReLU 
+        np.maximum(bins,0,out=bins); # ReLU
 
+        return bins;
 
-    def  _stepDpi(self,dt):
-        
-        # Damage
-        if(self.hasDamagingPressure()):
-            d=self.k_dpi*self.q(P=self.P,dt=dt);
-        else:
-            d=0;
-       
-        
-        bin_idx=None;# Bin index
-        if d < Tissue.DAMAGE_LOW:
-            bin_idx=None;
-        elif d < Tissue.DAMAGE_MID:
-            bin_idx=0;
-        elif d < Tissue.DAMAGE_HIGH:
-            bin_idx=1;
+    def _damage(self,dt,Tissues=[]):
+        """
+        Damage of the current sample for each mechanism.
+
+        Parameters
+        ----------
+        dt : float
+            Sampling time step in seconds.
+        Tissues : Arraylike, optional
+            Neighbouring tissues. The default is [].
+
+        Returns
+        -------
+        numpy.ndarray
+            [iri,dpi,gi] damage.
+
+        """
+        ctx=self._getContext(dt);
+        if(not ctx['damaging']):
+            return np.zeros(3);
+
+        q=ctx['q'];
+
+        # The gradient is only needed for gi.
+        qg=0;
+        if('gi' in self.mechanisms):
+            G=self.pressureGradient(Tissues);#Pressure gradient
+            qg=self.q(P=G,dt=dt);
+
+        return np.array([self.k_iri*q,self.k_dpi*q,self.k_gi*qg]);
+
+    def _stepMechanisms(self,dt,Tissues=[]):
+
+        beta=np.array([self.beta_iri,self.beta_dpi,self.beta_gi]);
+        d=self._damage(dt,Tissues);
+
+        # All mechanisms in one go, or only the selected ones @see self.setMechanisms()
+        if(len(self.mechanisms)==3):
+            self.binKernel(self.bins,d,beta,self.continouse_relief);
         else:
-            bin_idx=2; 
-        
-        # Overide the computed bin above and use a fixed bin if we 
-        # are only performing pressure relieve when their is none 
-        # damaging input pressure.
-        if self.continouse_relief and (bin_idx is not None):
-            bin_idx=0;
-        
-        
-       
-        if bin_idx is not None:
-            self.dpi[bin_idx]=self.dpi[bin_idx] + d;
-        
-        # Relieve
-        for bn in range(0,3):
-            if((bin_idx is None) or (bn != bin_idx)): # Ensures that we relieve only relieved effect
-                r=self.beta_dpi * self.dpi[bn];#
-                self.dpi[bn]=self.dpi[bn] - r;
-        
+            for m in self.mechanisms:
+                i=self.MECHANISMS.index(m);
+                self.binKernel(self.bins[i],d[i],beta[i],self.continouse_relief);
+
+    def simulate(self,Ps,dt,Pn=None):
+        """
+        Run the tissue over a whole pressure trace at once @see
+        Tissue.simulate(). The damage and bin of every sample are computed
+        with array operations, after which each bin is evaluated one run of
+        loaded or relieved samples at a time. The result is identical to
+        stepping.
+
+        Parameters
+        ----------
+        Ps : Arraylike<float>
+            Interface pressure trace in kPa.
+        dt : float
+            Sampling time step in seconds.
+        Pn : Arraylike<float>, optional
+            Pressure traces of the neighbouring tissues, one row per
+            neighbour. The default is None, i.e. no neighbours.
+
+        Returns
+        -------
+        dict
+            Time series of 'iri', 'dpi', 'gi' and 'health' (as in
+            self.health(dt)) for every sample, and 'bins' with the bins of
+            every sample in shape (samples,3,3).
+
+        """
+        Ps=np.asarray(Ps,dtype=np.float64);
+
+        self._simulateCounters(Ps);
+
+        # Damage
+        damaging=self.pressureTimeThreshold.isDamagingPressure(Ps);
+        q=self.qArray(Ps,dt);
+        qg=self.qArray(self._simulateGradient(Ps,Pn),dt,Ps);
+        d=np.where(damaging,[self.k_iri*q,self.k_dpi*q,self.k_gi*qg],0.0);
+        idx=self.binIndex(d,self.continouse_relief);
+
+        # Bins
+        c=1-np.array([self.beta_iri,self.beta_dpi,self.beta_gi]);
+        bins=np.empty((len(Ps),3,3));
+        for m in range(3):
+            if(self.MECHANISMS[m] not in self.mechanisms):
+                bins[:,m]=self.bins[m];
+                continue;
+            for bn in range(3):
+                bins[:,m,bn]=self._simulateBin(idx[m]==bn,d[m],c[m],self.bins[m,bn]);
+
+        if len(Ps):
+            self.bins[:]=bins[-1];
+        self._simulateHistory(Ps);
+
+        iri=np.sum(bins[:,0],axis=-1);
+        dpi=np.sum(bins[:,1],axis=-1);
+        gi=np.sum(bins[:,2],axis=-1);
+
+        return {'iri':iri,'dpi':dpi,'gi':gi,'health':dt*(iri+dpi+gi),'bins':bins};
+
+    def _simulateBin(self,loaded,d,c,x0):
+        """
+        Evaluate one bin over a whole sequence, i.e.
+        x[n]=max(x[n-1]+d[n],0) where loaded and max(c*x[n-1],0) elsewhere.
+
+        Runs of loaded samples are cumulative sums and runs of relieved
+        samples cumulative products. Both accumulate in sample order, so the
+        result matches stepping to the last bit.
+
+        Parameters
+        ----------
+        loaded : numpy.ndarray<boolean>
+            Whether the bin takes the damage of a sample.
+        d : numpy.ndarray
+            Damage.
+        c : float
+            Relief factor, i.e. 1-beta.
+        x0 : float
+            Initial value.
+
+        Returns
+        -------
+        numpy.ndarray
+            The bin.
+
+        """
+        N=len(d);
+        x=np.empty(N);
+
+        # Run boundaries
+        starts=np.flatnonzero(np.diff(loaded))+1;
+        starts=np.r_[0,starts] if N else starts;
+        ends=np.r_[starts[1:],N];
+
+        # The ReLU can only fire on negative values. With many short runs a
+        # plain loop is quicker than a numpy call per run.
+        if(c<0 or x0<0 or np.any(d<0) or len(starts)*16>N):
+            for n,(l,dn) in enumerate(zip(loaded.tolist(),d.tolist())):
+                x0=max(x0+dn if l else x0*c,0.0);
+                x[n]=x0;
+            return x;
+
+        for s,e in zip(starts.tolist(),ends.tolist()):
+            if loaded[s]:
+                x[s:e]=np.cumsum(np.r_[x0,d[s:e]])[1:];
+            else:
+                x[s:e]=np.multiply.accumulate(np.r_[x0,np.full(e-s,c)])[1:];
+            x0=x[e-1];
+
+        return x;
+
+    def _stepIri(self,dt):
+
+        d=self._damage(dt)[0];
+        self.binKernel(self.bins[0],d,self.beta_iri,self.continouse_relief);
+
+
+    def  _stepDpi(self,dt):
         
-        # Introduce non-linearity to remove negative values
-        self.dpi[self.dpi<0]=0; # ReLU 
+        d=self._damage(dt)[1];
+        self.binKernel(self.bins[1],d,self.beta_dpi,self.continouse_relief);
         
     
     def _stepGi(self,dt,Tissues=[]):
         
-        # Damage
-        G=0;#Pressure gradient
-        for T in Tissues:
-            G=G+abs(self.P - T.P);
-            
-        G=G/2.0;
-            
-        if(self.hasDamagingPressure()):
-            d=self.k_gi*self.q(P=G,dt=dt);
-        else:
-            d=0;
-        
-        bin_idx=None;# Bin index
-        if d < Tissue.DAMAGE_LOW:
-            bin_idx=None;
-        elif d < Tissue.DAMAGE_MID:
-            bin_idx=0;
-        elif d < Tissue.DAMAGE_HIGH:
-            bin_idx=1;
-        else:
-            bin_idx=2; 
-        
-        # Overide the computed bin above and use a fixed bin if we 
-        # are only performing pressure relieve when their is none 
-        # damaging input pressure.
-        if self.continouse_relief and (bin_idx is not None):
-            bin_idx=0;
-        
-        
-        if bin_idx is not None:
-            self.gi[bin_idx]=self.gi[bin_idx] + d;
-        
-        # Relieve
-        for bn in range(0,3):
-            if(bin_idx is None or (bn != bin_idx)): # Ensures that we relieve only relieved effect
-                r=self.beta_gi * self.gi[bn];#
-                self.gi[bn]=self.gi[bn] - r;
-           
-        
-        
-        # Introduce non-linearity to remove negative values
-        self.gi[self.gi<0]=0; # ReLU 
+        d=self._damage(dt,Tissues)[2];
+        self.binKernel(self.bins[2],d,self.beta_gi,self.continouse_relief);
         
     
     def healthIri(self):
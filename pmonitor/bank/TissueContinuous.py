@@ -4,17 +4,22 @@ from .Tissue import Tissue;
 
 class TissueContinuous(Tissue):
   
-   
+    # The relief depends on the load ratio @see Tissue.LOAD_RATIO
+    LOAD_RATIO=True;
     
-    def __init__(self,code,pressureTimeThreshold,effectEstimator,beta_dpi=1,beta_iri=1,beta_gi=1,k_dpi=1,k_iri=0,k_gi=0):
+    def __init__(self,code,pressureTimeThreshold,effectEstimator,beta_dpi=1,beta_iri=1,beta_gi=1,k_dpi=1,k_iri=0,k_gi=0,history_len=50):
         """
         TissueContinuous implements comtiuous relief of accumulated effect 
         based on the ratio of the current applied load to the max applicable 
         load.
+        
+        history_len : integer, optional
+            Length(in samples) of the pressure history whose mean determines 
+            the load ratio. The default is 50.
 
         """
         
-        Tissue.__init__(self,code,pressureTimeThreshold,effectEstimator,beta_dpi,beta_iri,beta_gi,k_dpi,k_iri,k_gi);
+        Tissue.__init__(self,code,pressureTimeThreshold,effectEstimator,beta_dpi,beta_iri,beta_gi,k_dpi,k_iri,k_gi,history_len);
         
         
         self._damage_method='continouse-load-ratio';
@@ -26,18 +31,10 @@ class TissueContinuous(Tissue):
     def _stepIri(self,dt):
         
         
-        # Compute the qmin(minumum damaging q) as the Pmin applied for dt duration.
-        qmin=self.q(self.Pmin,dt);
-        
-        # Compute q for determining relief
-        P_avg=np.mean(self.Ps);
-        q_relief=self.q(P=P_avg,dt=dt);
-        
-         # Compute u
-        u=min(q_relief,qmin)/qmin;
-        
-        # Compute the current effect
-        q=self.q(P=self.P,dt=dt);
+        # Load ratio u and current effect, shared with the other mechanisms
+        ctx=self._getContext(dt);
+        u=ctx['u'];
+        q=ctx['q'];
         
         
        
@@ -53,18 +50,10 @@ class TissueContinuous(Tissue):
 
     def _stepDpi(self,dt):
         
-        # Compute the qmin(minumum damaging q) as the Pmin applied for dt duration.
-        qmin=self.q(self.Pmin,dt);
-        
-        # Compute q for determining relief
-        P_avg=np.mean(self.Ps);
-        q_relief=self.q(P=P_avg,dt=dt);
-        
-        # Compute u
-        u=min(q_relief,qmin)/qmin;
-        
-        # Compute the current effect
-        q=self.q(P=self.P,dt=dt);
+        # Load ratio u and current effect, shared with the other mechanisms
+        ctx=self._getContext(dt);
+        u=ctx['u'];
+        q=ctx['q'];
         
         
         
@@ -80,17 +69,12 @@ class TissueContinuous(Tissue):
     def _stepGi(self,dt,Tissues=[]):
         
         # Pressure gradient
-        G=0;
-        G_avg=0;
-        for T in Tissues:
-            G=G+abs(self.P - T.P);
-            G_avg=G_avg+abs(np.mean(self.Ps) - np.mean(T.Ps));
-        G=G/2.0;
-        G_avg=G_avg/2.0;
+        G=self.pressureGradient(Tissues);
+        G_avg=self.meanPressureGradient(Tissues);
         
         
         # Compute the qmin(minumum damaging q) as the Pmin applied for dt duration.
-        qmin=self.q(self.Pmin,dt);
+        qmin=self._getContext(dt)['qmin'];
         
         # Compute q for determining relief
         q_relief=self.q(P=G_avg,dt=dt);
@@ -108,6 +92,73 @@ class TissueContinuous(Tissue):
         self.gi=self.k_gi*q+(1-self.beta_gi*(1-u))*self.gi;
         
         # Introduce non-linearity to remove negative values
-        self.gi=max(self.gi,0); # ReLU 
+        self.gi=max(self.gi,0); # ReLU
+    
+    def _advanceFilters(self,k,dt,Tissues=[]):
+        
+        # Relief is constant from here on.
+        qmin=self.q(self.Pmin,dt);
+        u=min(self.q(P=self.Ps.mean(),dt=dt),qmin)/qmin;
+        u_gi=min(self.q(P=self.meanPressureGradient(Tissues),dt=dt),qmin)/qmin;
+        
+        # Compute the current effect
+        q=self.q(P=self.P,dt=dt);
+        qg=self.q(P=self.pressureGradient(Tissues),dt=dt);
+        
+        if('iri' in self.mechanisms):
+            self.iri=self._advanceFilter(1-self.beta_iri*(1-u),self.k_iri*q,self.iri,k);
+        if('dpi' in self.mechanisms):
+            self.dpi=self._advanceFilter(1-self.beta_dpi*(1-u),self.k_dpi*q,self.dpi,k);
+        if('gi' in self.mechanisms):
+            self.gi=self._advanceFilter(1-self.beta_gi*(1-u_gi),self.k_gi*qg,self.gi,k);
+    
+    def simulate(self,Ps,dt,Pn=None):
+        """
+        Run the tissue over a whole pressure trace at once @see 
+        Tissue.simulate(). The load ratio u of every sample is computed from 
+        the rolling mean of the pressure history, after which each effect is 
+        a first order linear recursion with the time-varying coefficient 
+        1-beta*(1-u), solved with a prefix scan. Neighbour histories 
+        continue from the last call @see Tissue._simulateMeanGradient().
+
+        Parameters
+        ----------
+        Ps : Arraylike<float>
+            Interface pressure trace in kPa.
+        dt : float
+            Sampling time step in seconds.
+        Pn : Arraylike<float>, optional
+            Pressure traces of the neighbouring tissues, one row per 
+            neighbour. The default is None, i.e. no neighbours.
+
+        Returns
+        -------
+        dict
+            Time series of 'iri', 'dpi', 'gi' and 'health' (as in 
+            self.health(dt)) for every sample.
+
+        """
+        Ps=np.asarray(Ps,dtype=np.float64);
+        
+        self._simulateCounters(Ps);
+        
+        # Load ratios
+        u=self._simulateLoadRatio(self._simulateMeans(Ps),Ps,dt);
+        u_gi=self._simulateLoadRatio(self._simulateMeanGradient(Ps,Pn),Ps,dt);
+        
+        # Effect
+        q=self.qArray(Ps,dt);
+        qg=self.qArray(self._simulateGradient(Ps,Pn),dt,Ps);
+        
+        # Filter
+        iri=self._simulateFilter(1-self.beta_iri*(1-u),self.k_iri*q,self.iri) if 'iri' in self.mechanisms else self._simulateFrozen(self.iri,len(Ps));
+        dpi=self._simulateFilter(1-self.beta_dpi*(1-u),self.k_dpi*q,self.dpi) if 'dpi' in self.mechanisms else self._simulateFrozen(self.dpi,len(Ps));
+        gi=self._simulateFilter(1-self.beta_gi*(1-u_gi),self.k_gi*qg,self.gi) if 'gi' in self.mechanisms else self._simulateFrozen(self.gi,len(Ps));
+        
+        if len(Ps):
+            self.iri=float(iri[-1]);
+            self.dpi=float(dpi[-1]);
+            self.gi=float(gi[-1]);
+        self._simulateHistory(Ps);
         
-    
\ No newline at end of file
+        return {'iri':iri,'dpi':dpi,'gi':gi,'health':dt*(iri+dpi+gi)};
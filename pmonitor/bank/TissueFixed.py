@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
+import numpy as np;
 from .Tissue import Tissue;
+from ..inc.Helpers import Helpers;
 
 class TissueFixed(Tissue):
   
-   
+    # @see Tissue.getState()
+    STATE=Tissue.STATE+('iri_before_relief','dpi_before_relief','gi_before_relief','reliefCounterGi');
     
     def __init__(self,code,pressureTimeThreshold,effectEstimator,k_dpi=1,k_iri=0,k_gi=0,reliefTimeThreshold=5):
         """
@@ -51,7 +54,7 @@ class TissueFixed(Tissue):
         
         
         # Compute the current effect
-        q=self.q(P=self.P,dt=dt);
+        q=self._getContext(dt)['q'];
         
             
         #
@@ -69,7 +72,7 @@ class TissueFixed(Tissue):
     def _stepDpi(self,dt):
         
          # Compute the current effect
-        q=self.q(P=self.P,dt=dt);
+        q=self._getContext(dt)['q'];
         
         #
         if((self.reliefCounter*dt)>=self.reliefTimeThreshold): # Relief the effect
@@ -85,10 +88,7 @@ class TissueFixed(Tissue):
     def _stepGi(self,dt,Tissues=[]):
         
         # Pressure gradient
-        G=0;
-        for T in Tissues:
-            G=G+abs(self.P - T.P);
-        G=G/2.0;
+        G=self.pressureGradient(Tissues);
         
         
         # Compute the current effect
@@ -106,6 +106,89 @@ class TissueFixed(Tissue):
         
         
         # Introduce non-linearity to remove negative values
-        self.gi=max(self.gi,0); # ReLU 
-        
-    
\ No newline at end of file
+        self.gi=max(self.gi,0); # ReLU
+    
+    def simulate(self,Ps,dt,Pn=None):
+        """
+        Run the tissue over a whole pressure trace at once @see 
+        Tissue.simulate(). The relief periods long enough to reset the effect 
+        are found from the run lengths of the relief counters, and the effect 
+        between resets is a cumulative sum. The result is identical to 
+        stepping.
+
+        Parameters
+        ----------
+        Ps : Arraylike<float>
+            Interface pressure trace in kPa.
+        dt : float
+            Sampling time step in seconds.
+        Pn : Arraylike<float>, optional
+            Pressure traces of the neighbouring tissues, one row per 
+            neighbour. The default is None, i.e. no neighbours.
+
+        Returns
+        -------
+        dict
+            Time series of 'iri', 'dpi', 'gi' and 'health' (as in 
+            self.health(dt)) for every sample.
+
+        """
+        Ps=np.asarray(Ps,dtype=np.float64);
+        
+        reliefCounter=self._simulateCounters(Ps)[1];
+        
+        # Gradient and its own relief counter
+        G=self._simulateGradient(Ps,Pn);
+        is_relief_gi=np.logical_not(self.pressureTimeThreshold.isDamagingPressure(G));
+        reliefCounterGi=Helpers.runLength(is_relief_gi,self.reliefCounterGi);
+        
+        # Effect
+        q=self.qArray(Ps,dt);
+        qg=self.qArray(G,dt,Ps);
+        
+        # Integrate between resets
+        reset=(reliefCounter*dt)>=self.reliefTimeThreshold;
+        reset_gi=(reliefCounterGi*dt)>=self.reliefTimeThreshold;
+        iri=self._simulateIntegrator(self.k_iri*q,reset,self.iri) if 'iri' in self.mechanisms else self._simulateFrozen(self.iri,len(Ps));
+        dpi=self._simulateIntegrator(self.k_dpi*q,reset,self.dpi) if 'dpi' in self.mechanisms else self._simulateFrozen(self.dpi,len(Ps));
+        gi=self._simulateIntegrator(self.k_gi*qg,reset_gi,self.gi) if 'gi' in self.mechanisms else self._simulateFrozen(self.gi,len(Ps));
+        
+        if len(Ps) and ('gi' in self.mechanisms or 'gi' in self._resting):
+            self.reliefCounterGi=int(reliefCounterGi[-1]);
+        if len(Ps):
+            self.iri=float(iri[-1]);
+            self.dpi=float(dpi[-1]);
+            self.gi=float(gi[-1]);
+        self._simulateHistory(Ps);
+        
+        return {'iri':iri,'dpi':dpi,'gi':gi,'health':dt*(iri+dpi+gi)};
+    
+    def _simulateIntegrator(self,b,reset,y0):
+        """
+        Evaluate y[n]=0 where reset and max(y[n-1]+b[n],0) elsewhere over a 
+        whole sequence.
+
+        Parameters
+        ----------
+        b : numpy.ndarray
+            Input.
+        reset : numpy.ndarray<boolean>
+            Samples at which the effect is relieved.
+        y0 : float
+            Initial value.
+
+        Returns
+        -------
+        numpy.ndarray
+            The output.
+
+        """
+        # The ReLU cannot fire when nothing is negative.
+        if np.all(b>=0) and y0>=0:
+            return Helpers.resetCumsum(b,reset,y0);
+        
+        y=np.empty(len(b));
+        for n in range(len(b)):
+            y0=0 if reset[n] else max(y0+b[n],0);
+            y[n]=y0;
+        return y;
@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
+import numpy as np;
 from .Tissue import Tissue;
+from ..inc.Helpers import Helpers;
 
 class TissueInverse(Tissue):
   
-   
+    # @see Tissue.getState()
+    STATE=Tissue.STATE+('iri_before_relief','dpi_before_relief','gi_before_relief','reliefCounterGi');
     
     def __init__(self,code,pressureTimeThreshold,effectEstimator,k_dpi=1,k_iri=0,k_gi=0):
         """
@@ -42,7 +45,7 @@ class TissueInverse(Tissue):
         
         
         # Compute the current effect
-        q=self.q(P=self.P,dt=dt);
+        q=self._getContext(dt)['q'];
         
             
         #
@@ -65,7 +68,7 @@ class TissueInverse(Tissue):
     def _stepDpi(self,dt):
         
          # Compute the current effect
-        q=self.q(P=self.P,dt=dt);
+        q=self._getContext(dt)['q'];
         
 
         #
@@ -88,10 +91,7 @@ class TissueInverse(Tissue):
     def _stepGi(self,dt,Tissues=[]):
         
         # Pressure gradient
-        G=0;
-        for T in Tissues:
-            G=G+abs(self.P - T.P);
-        G=G/2.0;
+        G=self.pressureGradient(Tissues);
         
         
         # Compute the current effect
@@ -114,6 +114,119 @@ class TissueInverse(Tissue):
         
         
         # Introduce non-linearity to remove negative values
-        self.gi=max(self.gi,0); # ReLU 
+        self.gi=max(self.gi,0); # ReLU
+    
+    def simulate(self,Ps,dt,Pn=None):
+        """
+        Run the tissue over a whole pressure trace at once @see 
+        Tissue.simulate(). The relief periods are found from the run lengths 
+        of the relief counters. Each run of load samples is a cumulative sum 
+        and each run of relief samples the effect before relief times the 
+        reciprocal relief time ramp. The result is identical to stepping.
+
+        Parameters
+        ----------
+        Ps : Arraylike<float>
+            Interface pressure trace in kPa.
+        dt : float
+            Sampling time step in seconds.
+        Pn : Arraylike<float>, optional
+            Pressure traces of the neighbouring tissues, one row per 
+            neighbour. The default is None, i.e. no neighbours.
+
+        Returns
+        -------
+        dict
+            Time series of 'iri', 'dpi', 'gi' and 'health' (as in 
+            self.health(dt)) for every sample.
+
+        """
+        Ps=np.asarray(Ps,dtype=np.float64);
+        
+        reliefCounter=self._simulateCounters(Ps)[1];
+        
+        # Gradient and its own relief counter
+        G=self._simulateGradient(Ps,Pn);
+        is_relief_gi=np.logical_not(self.pressureTimeThreshold.isDamagingPressure(G));
+        reliefCounterGi=Helpers.runLength(is_relief_gi,self.reliefCounterGi);
+        
+        # Effect
+        q=self.qArray(Ps,dt);
+        qg=self.qArray(G,dt,Ps);
+        
+        iri,iri_before_relief=self._simulateInverse(self.k_iri*q,reliefCounter,dt,self.iri,self.iri_before_relief) if 'iri' in self.mechanisms else [self._simulateFrozen(self.iri,len(Ps)),self.iri_before_relief];
+        dpi,dpi_before_relief=self._simulateInverse(self.k_dpi*q,reliefCounter,dt,self.dpi,self.dpi_before_relief) if 'dpi' in self.mechanisms else [self._simulateFrozen(self.dpi,len(Ps)),self.dpi_before_relief];
+        gi,gi_before_relief=self._simulateInverse(self.k_gi*qg,reliefCounterGi,dt,self.gi,self.gi_before_relief) if 'gi' in self.mechanisms else [self._simulateFrozen(self.gi,len(Ps)),self.gi_before_relief];
+        
+        if len(Ps) and ('gi' in self.mechanisms or 'gi' in self._resting):
+            self.reliefCounterGi=int(reliefCounterGi[-1]);
+        if len(Ps):
+            self.iri=float(iri[-1]);
+            self.dpi=float(dpi[-1]);
+            self.gi=float(gi[-1]);
+            self.iri_before_relief=iri_before_relief;
+            self.dpi_before_relief=dpi_before_relief;
+            self.gi_before_relief=gi_before_relief;
+        self._simulateHistory(Ps);
+        
+        return {'iri':iri,'dpi':dpi,'gi':gi,'health':dt*(iri+dpi+gi)};
+    
+    def _simulateInverse(self,b,reliefCounter,dt,y0,before):
+        """
+        Evaluate one effect over a whole sequence. Where the relief counter 
+        is zero y[n]=max(y[n-1]+b[n],0), and the effect before relief is 
+        updated. Elsewhere y[n]=max(before/relief_secs,0).
         
-    
\ No newline at end of file
+        The runs are evaluated in order, each with array operations, and 
+        the running sums accumulate in sample order so that the result 
+        matches stepping to the last bit.
+
+        Parameters
+        ----------
+        b : numpy.ndarray
+            Input.
+        reliefCounter : numpy.ndarray<integer>
+            Relief counter of every sample.
+        dt : float
+            Sampling time step in seconds.
+        y0 : float
+            Initial value.
+        before : float
+            Initial effect before relief.
+
+        Returns
+        -------
+        list
+            [y,before], the output and the final effect before relief.
+
+        """
+        N=len(b);
+        y=np.empty(N);
+        relief=reliefCounter>0;
+        
+        # Run boundaries
+        starts=np.flatnonzero(np.diff(relief))+1;
+        starts=np.r_[0,starts] if N else starts;
+        ends=np.r_[starts[1:],N];
+        
+        # The ReLU can only fire on negative values. With many short runs a 
+        # plain loop is quicker than a numpy call per run.
+        if(y0<0 or before<0 or np.any(b<0) or len(starts)*16>N):
+            for n,(c,bn) in enumerate(zip(reliefCounter.tolist(),b.tolist())):
+                if(c>0):
+                    y0=max(before/max(c*dt,1),0);
+                else:
+                    before=y0+bn;
+                    y0=max(before,0);
+                y[n]=y0;
+            return [y,before];
+        
+        for s,e in zip(starts.tolist(),ends.tolist()):
+            if relief[s]:
+                y[s:e]=before/np.maximum(reliefCounter[s:e]*dt,1);
+            else:
+                y[s:e]=np.cumsum(np.r_[y0,b[s:e]])[1:];
+                before=float(y[e-1]);
+            y0=y[e-1];
+        
+        return [y,before];
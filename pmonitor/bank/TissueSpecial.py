@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import numpy as np;
 from .Tissue import Tissue;
 
 class TissueSpecial(Tissue):
@@ -23,7 +24,7 @@ class TissueSpecial(Tissue):
     def _stepIri(self,dt):
         
         # Filter
-        q=self.q(P=self.P,dt=dt);
+        q=self._getContext(dt)['q'];
         self.iri=self.iri*(1-self.beta_iri)+self.k_iri*q*(1+(self.n)*self.beta_iri);
         
         
@@ -35,7 +36,7 @@ class TissueSpecial(Tissue):
     def _stepDpi(self,dt):
         
         # Filter
-        q=self.q(P=self.P,dt=dt);
+        q=self._getContext(dt)['q'];
         self.dpi=self.dpi*(1-self.beta_dpi)+self.k_dpi*q*(1+self.n*self.beta_dpi);
         
        
@@ -47,10 +48,7 @@ class TissueSpecial(Tissue):
     def _stepGi(self,dt,Tissues=[]):
         
         # Pressure gradient
-        G=0;
-        for T in Tissues:
-            G=G+abs(self.P - T.P);
-        G=G/2.0;
+        G=self.pressureGradient(Tissues);
         
         
         
@@ -61,6 +59,50 @@ class TissueSpecial(Tissue):
         
         
         # Introduce non-linearity to remove negative values
-        self.gi=max(self.gi,0); # ReLU 
+        self.gi=max(self.gi,0); # ReLU
+    
+    def simulate(self,Ps,dt,Pn=None):
+        """
+        Run the tissue over a whole pressure trace at once @see 
+        Tissue.simulate(). The sample counter n of every sample is derived 
+        from the trace, i.e. it starts at the first non-zero pressure, so 
+        that the growing gain (1+n*beta) is known in advance and each filter 
+        is solved with one prefix scan.
+
+        Parameters
+        ----------
+        Ps : Arraylike<float>
+            Interface pressure trace in kPa.
+        dt : float
+            Sampling time step in seconds.
+        Pn : Arraylike<float>, optional
+            Pressure traces of the neighbouring tissues, one row per 
+            neighbour. The default is None, i.e. no neighbours.
+
+        Returns
+        -------
+        dict
+            Time series of 'iri', 'dpi', 'gi' and 'health' (as in 
+            self.health(dt)) for every sample.
+
+        """
+        Ps=np.asarray(Ps,dtype=np.float64);
+        
+        n=self._simulateCounters(Ps)[0];
+        
+        # Effect
+        q=self.qArray(Ps,dt);
+        qg=self.qArray(self._simulateGradient(Ps,Pn),dt,Ps);
+        
+        # Filter
+        iri=self._simulateFilter(1-self.beta_iri,self.k_iri*q*(1+n*self.beta_iri),self.iri) if 'iri' in self.mechanisms else self._simulateFrozen(self.iri,len(Ps));
+        dpi=self._simulateFilter(1-self.beta_dpi,self.k_dpi*q*(1+n*self.beta_dpi),self.dpi) if 'dpi' in self.mechanisms else self._simulateFrozen(self.dpi,len(Ps));
+        gi=self._simulateFilter(1-self.beta_gi,self.k_gi*qg*(1+n*self.beta_gi),self.gi) if 'gi' in self.mechanisms else self._simulateFrozen(self.gi,len(Ps));
+        
+        if len(Ps):
+            self.iri=float(iri[-1]);
+            self.dpi=float(dpi[-1]);
+            self.gi=float(gi[-1]);
+        self._simulateHistory(Ps);
         
-    
\ No newline at end of file
+        return {'iri':iri,'dpi':dpi,'gi':gi,'health':dt*(iri+dpi+gi)};
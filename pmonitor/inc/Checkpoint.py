@@ -0,0 +1,471 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Bethel Osuagwu
+"""
+import os;
+import time;
+import queue;
+import threading;
+import numpy as np;
+from .RingBuffer import RingBuffer;
+
+class Checkpoint:
+
+    def __init__(self,tissues,directory,interval=60,full_every=10,keep=2,compressed=False):
+        """
+        Periodic checkpoints of a collection of tissues, so that a monitor
+        restarts with the damage its tissues had accumulated.
+
+        A checkpoint is taken by self.tick() in the stepping loop, between
+        steps, which only copies the state of the tissues with one stacked
+        copy per group of tissues @see self.capture(). That copy is the
+        pause of the loop, a few microseconds per tissue, e.g. about 15 ms
+        for 5000 tissues. Comparing with the previous checkpoint and
+        writing to disk happen on a background thread. Every full_every-th
+        checkpoint is a full snapshot and the others are incremental,
+        holding only the tissues whose state changed.
+        If the thread falls behind, checkpoints are skipped rather than
+        holding up the loop @see self.skipped.
+
+        Restore with self.loadLatest().
+
+        Parameters
+        ----------
+        tissues : Iterable|dict
+            The tissues, i.e. ..bank.Tissue and ..bank.TissueArray objects,
+            or a dict of them. They are grouped once, so the collection
+            must not change.
+        directory : string
+            Directory of the checkpoint files. Created if missing.
+        interval : float, optional
+            Seconds between checkpoints of self.tick(). The default is 60.
+            None only checkpoints on self.checkpoint().
+        full_every : integer, optional
+            A full snapshot every full_every checkpoints. The default is 10.
+        keep : integer, optional
+            Number of full snapshots kept with their increments. The default
+            is 2.
+        compressed : boolean, optional
+            Compress the files. The default is False.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.tissues=self._list(tissues);
+        self._groups=self.groups(self.tissues);
+        self.directory=directory;
+        self.interval=interval;
+        self.full_every=full_every;
+        self.keep=keep;
+        self.compressed=compressed;
+
+        os.makedirs(directory,exist_ok=True);
+
+        # Sequence number of the next checkpoint, following those on disk.
+        files=self.files(directory);
+        self.seq=files[-1][0]+1 if files else 0;
+
+        # Checkpoints not taken because the writer was busy
+        self.skipped=0;
+
+        # Last checkpoint written and the number of increments since the
+        # last full snapshot
+        self._last=None;
+        self._increments=0;
+
+        self._due=time.monotonic()+(interval or 0);
+        self._error=None;
+        self._queue=queue.Queue(1);
+        self._thread=threading.Thread(target=self._write,daemon=True);
+        self._thread.start();
+
+    def tick(self):
+        """
+        Take a checkpoint if one is due. Call between steps.
+
+        Returns
+        -------
+        boolean
+            Whether a checkpoint was taken.
+
+        """
+        if(self.interval is None or time.monotonic()<self._due):
+            return False;
+
+        self._due=time.monotonic()+self.interval;
+        return self.checkpoint();
+
+    def checkpoint(self):
+        """
+        Take a checkpoint now, unless the writer is still busy with the
+        previous one.
+
+        Returns
+        -------
+        boolean
+            Whether a checkpoint was taken.
+
+        """
+        self._raise();
+        if(self._queue.full()):
+            self.skipped+=1;
+            return False;
+
+        self._queue.put_nowait((self.seq,self.capture(self.tissues,self._groups)));
+        self.seq+=1;
+        return True;
+
+    def flush(self):
+        """
+        Wait until all checkpoints taken are written.
+        """
+        self._queue.join();
+        self._raise();
+
+    def close(self,final=True):
+        """
+        Stop checkpointing.
+
+        Parameters
+        ----------
+        final : boolean, optional
+            Take a last checkpoint first. The default is True.
+
+        Returns
+        -------
+        None.
+
+        """
+        if(final):
+            self.flush();
+            self.checkpoint();
+        self._queue.put(None);
+        self._thread.join();
+        self._raise();
+
+    def __enter__(self):
+        return self;
+
+    def __exit__(self,*args):
+        self.close();
+
+    @staticmethod
+    def _list(tissues):
+        return list(tissues.values()) if isinstance(tissues,dict) else list(tissues);
+
+    @classmethod
+    def capture(cls,tissues,groups=None):
+        """
+        Snapshot of the state of a collection of tissues @see
+        ..bank.Tissue.getState(). Tissues of the same class and state shapes
+        are grouped and their states stacked, one array per attribute, so
+        that thousands of tissues take a handful of arrays. Tissues are
+        stacked a group at a time @see ..bank.Tissue.getStates().
+
+        Parameters
+        ----------
+        tissues : Iterable|dict
+            The tissues.
+        groups : list, optional
+            The groups of the tissues, from self.groups(), which stay the
+            same as long as the tissues do. The default is None, i.e. they
+            are worked out.
+
+        Returns
+        -------
+        dict
+            Array name to array. 'codes' holds the codes of the tissues and
+            for group g, 'g.class' the class name, 'g.index' the positions of
+            its tissues and 'g.<attribute>' the stacked states.
+
+        """
+        tissues=cls._list(tissues);
+        if(groups is None):
+            groups=cls.groups(tissues);
+
+        snapshot={'codes':np.array([str(t.code) for t in tissues])};
+        for g,index in enumerate(groups):
+            members=[tissues[i] for i in index];
+            snapshot[str(g)+'.class']=np.array(type(members[0]).__name__);
+            snapshot[str(g)+'.index']=np.array(index,dtype=np.int64);
+            if(hasattr(members[0],'getStates')):
+                stacked=members[0].getStates(members);
+            else:
+                states=[t.getState() for t in members];
+                stacked={name:np.array([state[name] for state in states]) for name in states[0]};
+            for name,value in stacked.items():
+                snapshot[str(g)+'.'+name]=value;
+
+        return snapshot;
+
+    @classmethod
+    def groups(cls,tissues):
+        """
+        Group a collection of tissues by class and state shapes for
+        self.capture().
+
+        Parameters
+        ----------
+        tissues : Iterable|dict
+            The tissues.
+
+        Returns
+        -------
+        list
+            The positions of the tissues of each group.
+
+        """
+        groups={};
+        for i,tissue in enumerate(cls._list(tissues)):
+            if(hasattr(tissue,'getStates')):
+                shapes=[];
+                for name in tissue.STATE:
+                    value=getattr(tissue,name);
+                    shapes.append((value.live,)+value.shape if isinstance(value,RingBuffer) else np.shape(value));
+            else:
+                shapes=[v.shape for v in tissue.getState().values()];
+            groups.setdefault((type(tissue),)+tuple(shapes),[]).append(i);
+        return list(groups.values());
+
+    @classmethod
+    def restore(cls,snapshot,tissues):
+        """
+        Restore the state of a collection of tissues from self.capture(). The
+        tissues must be those captured, in the same order, with the same
+        classes and parameters. Tissues are restored a group at a time @see
+        ..bank.Tissue.setStates().
+
+        Parameters
+        ----------
+        snapshot : dict
+            The snapshot.
+        tissues : Iterable|dict
+            The tissues.
+
+        Returns
+        -------
+        None.
+
+        """
+        tissues=cls._list(tissues);
+
+        codes=snapshot['codes'].tolist();
+        if(codes!=[str(t.code) for t in tissues]):
+            raise Exception('The checkpoint is of other tissues');
+
+        g=0;
+        while(str(g)+'.class' in snapshot):
+            prefix=str(g)+'.';
+            name=str(snapshot[prefix+'class']);
+            members=[tissues[i] for i in snapshot[prefix+'index'].tolist()];
+            for tissue in members:
+                if(type(tissue).__name__!=name):
+                    raise Exception('Tissue '+str(tissue.code)+' is not a '+name);
+
+            columns={};
+            for key in snapshot:
+                if(key.startswith(prefix) and key not in (prefix+'class',prefix+'index')):
+                    columns[key[len(prefix):]]=snapshot[key];
+
+            if(hasattr(members[0],'setStates')):
+                members[0].setStates(members,columns);
+            else:
+                for j,tissue in enumerate(members):
+                    tissue.setState({k:v[j] for k,v in columns.items()});
+            g+=1;
+
+    @classmethod
+    def save(cls,file,tissues,compressed=False):
+        """
+        Save a snapshot of a collection of tissues to a .npz file @see
+        self.capture().
+
+        Parameters
+        ----------
+        file : string|file
+            The file.
+        tissues : Iterable|dict
+            The tissues.
+        compressed : boolean, optional
+            Compress the file. The default is False.
+
+        Returns
+        -------
+        None.
+
+        """
+        snapshot=cls.capture(tissues);
+        if(compressed):
+            np.savez_compressed(file,**snapshot);
+        else:
+            np.savez(file,**snapshot);
+
+    @classmethod
+    def load(cls,file,tissues):
+        """
+        Restore a collection of tissues from a file of self.save().
+        """
+        with np.load(file) as f:
+            cls.restore(dict(f),tissues);
+
+    @staticmethod
+    def files(directory):
+        """
+        Checkpoint files of a directory.
+
+        Returns
+        -------
+        list
+            [sequence number,full,path] of each file, oldest first.
+
+        """
+        files=[];
+        for name in os.listdir(directory):
+            parts=name.split('.');
+            if(len(parts)==3 and parts[0].isdigit() and parts[1] in ('full','inc') and parts[2]=='npz'):
+                files.append([int(parts[0]),parts[1]=='full',os.path.join(directory,name)]);
+        return sorted(files);
+
+    @classmethod
+    def loadLatest(cls,directory,tissues):
+        """
+        Restore a collection of tissues from the latest checkpoint of a
+        directory, i.e. the last full snapshot and the increments after it.
+
+        Parameters
+        ----------
+        directory : string
+            Directory of the checkpoint files.
+        tissues : Iterable|dict
+            The tissues.
+
+        Returns
+        -------
+        integer|None
+            Sequence number of the checkpoint restored, None if there is
+            none.
+
+        """
+        files=cls.files(directory);
+        fulls=[i for i,f in enumerate(files) if f[1]];
+        if(not fulls):
+            return None;
+
+        with np.load(files[fulls[-1]][2]) as f:
+            snapshot=dict(f);
+
+        seq=files[fulls[-1]][0];
+        for seq,full,path in files[fulls[-1]+1:]:
+            with np.load(path) as f:
+                cls._apply(snapshot,dict(f));
+
+        cls.restore(snapshot,tissues);
+        return seq;
+
+    @staticmethod
+    def _changes(snapshot,last):
+        """
+        The rows of each group that changed since the last snapshot, None if
+        the groups differ.
+        """
+        if(last is None or snapshot.keys()!=last.keys()):
+            return None;
+
+        inc={};
+        for key in snapshot:
+            if(key=='codes' or key.endswith('.class') or key.endswith('.index')):
+                if(not np.array_equal(snapshot[key],last[key])):
+                    return None;
+        for key in snapshot:
+            if(key=='codes' or key.endswith('.class') or key.endswith('.index')):
+                continue;
+            if(snapshot[key].shape!=last[key].shape):
+                return None;
+            g=key.split('.',1)[0];
+            changed=np.any((snapshot[key]!=last[key]).reshape(len(snapshot[key]),-1),axis=1);
+            inc[g]=changed if g not in inc else inc[g]|changed;
+
+        changes={};
+        for g,changed in inc.items():
+            rows=np.flatnonzero(changed);
+            changes[g+'.rows']=rows;
+            for key in snapshot:
+                if(key.startswith(g+'.') and not key.endswith('.class') and not key.endswith('.index')):
+                    changes[key]=snapshot[key][rows];
+        return changes;
+
+    @staticmethod
+    def _apply(snapshot,changes):
+        """
+        Apply an increment to a snapshot.
+        """
+        for key in changes:
+            if(key.endswith('.rows')):
+                continue;
+            rows=changes[key.split('.',1)[0]+'.rows'];
+            snapshot[key][rows]=changes[key];
+
+    def _write(self):
+        """
+        Write the checkpoints, on the background thread.
+        """
+        while True:
+            item=self._queue.get();
+            try:
+                if(item is None):
+                    return;
+
+                seq,snapshot=item;
+                changes=None;
+                if(self._increments+1<self.full_every):
+                    changes=self._changes(snapshot,self._last);
+
+                if(changes is None):
+                    self._save(seq,'full',snapshot);
+                    self._increments=0;
+                    self._prune();
+                else:
+                    self._save(seq,'inc',changes);
+                    self._increments+=1;
+                self._last=snapshot;
+            except Exception as e:
+                self._error=e;
+            finally:
+                self._queue.task_done();
+
+    def _save(self,seq,kind,arrays):
+        """
+        Write a file atomically, so that a crash never leaves a partial
+        checkpoint.
+        """
+        path=os.path.join(self.directory,'%08d.%s.npz'%(seq,kind));
+        tmp=path+'.tmp';
+        with open(tmp,'wb') as f:
+            if(self.compressed):
+                np.savez_compressed(f,**arrays);
+            else:
+                np.savez(f,**arrays);
+        os.replace(tmp,path);
+
+    def _prune(self):
+        """
+        Remove the files older than the last self.keep full snapshots.
+        """
+        files=self.files(self.directory);
+        fulls=[f[0] for f in files if f[1]];
+        if(len(fulls)>self.keep):
+            oldest=fulls[-self.keep];
+            for seq,full,path in files:
+                if(seq<oldest):
+                    os.remove(path);
+
+    def _raise(self):
+        """
+        Raise the error of the background thread, if any.
+        """
+        if(self._error is not None):
+            e=self._error;
+            self._error=None;
+            raise e;
@@ -4,6 +4,8 @@ Created on Fri Aug  6 21:28:38 2021
 
 @author: Bethel Osuagwu
 """
+import numpy as np;
+
 class EffectEstimator:
     # Linear model parameters. Parameters derived with Daniel et al. 1985 pigs data in 
     # MATLAB (/data/daniel1985pressure/regression_test.m)
@@ -14,7 +16,7 @@ class EffectEstimator:
     # Estimator type
     ESTIMATOR='linear';
     
-    def __init__(self,estimator=None,t_term=None,P_term=None,constant_term=None):
+    def __init__(self,estimator=None,t_term=None,P_term=None,constant_term=None,vectorized=None):
         """
         The effect estimator class.
 
@@ -34,6 +36,11 @@ class EffectEstimator:
             The default is None.
         constant_term : float, optional
             The constant term in the default linear model for effect estimator. The default is None.
+        vectorized : boolean, optional
+            Declares that a callable estimator accepts and returns numpy 
+            arrays. Otherwise it is called once per element when q() is 
+            given arrays. The default is the 'vectorized' attribute of the 
+            callable if any, or False.
 
         Returns
         -------
@@ -45,6 +52,10 @@ class EffectEstimator:
         self.k_constant = constant_term or self.CONSTANT_TERM;
         self.estimator=estimator or self.ESTIMATOR;
         
+        if vectorized is None:
+            vectorized=getattr(estimator,'vectorized',False);
+        self.vectorized=vectorized;
+        
         
     def q(self,P,t,samplingInterval=None):
         
@@ -54,11 +65,11 @@ class EffectEstimator:
 
         Parameters
         ----------
-        P : float
+        P : float|Arraylike<float>
             Pressure in kPa.
-        t : float
+        t : float|Arraylike<float>
             The time of application of pressure in minutes.
-        samplingInterval : float
+        samplingInterval : float|Arraylike<float>
             The time step in minutes for summing the value of the effect i.e 
             which makes the returned value independent of sampling interval. 
             Note that this means that we are summing/integrating the effect 
@@ -68,13 +79,17 @@ class EffectEstimator:
 
         Returns
         -------
-        float
+        float|numpy.ndarray
             Estimated damage magnitude. The unit of the value depends on the 
-            estimator. For estimator='pti' the unit is kPa.minutes.   
+            estimator. For estimator='pti' the unit is kPa.minutes. An array 
+            is returned if any of the inputs is an array.
 
         """
         estimator=self.estimator;
         
+        if(np.ndim(P) or np.ndim(t) or np.ndim(samplingInterval)):
+            return self._qArray(P,t,samplingInterval);
+        
         # Set the default for t.
         samplingInterval=samplingInterval or t;
         
@@ -102,4 +117,56 @@ class EffectEstimator:
             q_e=t*P;
             
         return q_e*samplingInterval;
-    
\ No newline at end of file
+    
+    def _qArray(self,P,t,samplingInterval=None):
+        """
+        Array version of self.q() with identical semantics.
+
+        Parameters
+        ----------
+        P : Arraylike<float>
+            Pressure in kPa.
+        t : Arraylike<float>
+            The time of application of pressure in minutes.
+        samplingInterval : Arraylike<float>, optional
+            @see self.q(). The default is None.
+
+        Returns
+        -------
+        numpy.ndarray
+            Estimated damage magnitudes.
+
+        """
+        estimator=self.estimator;
+        
+        P=np.asarray(P,dtype=np.float64);
+        t=np.asarray(t,dtype=np.float64);
+        
+        # Set the default for t.
+        if samplingInterval is None:
+            samplingInterval=t;
+        else:
+            samplingInterval=np.asarray(samplingInterval,dtype=np.float64);
+            samplingInterval=np.where(samplingInterval==0,t,samplingInterval);
+        
+        if(callable(estimator)):
+            if self.vectorized:
+                q_e=np.asarray(estimator(P,t),dtype=np.float64);
+            else:
+                q_e=np.vectorize(estimator,otypes=[np.float64])(P,t);
+        elif(estimator=='linear'):
+            k_c=self.k_constant
+            k_t=self.k_t;
+            k_P=self.k_P;
+            
+            q_e= k_c + k_t*t + k_P*P;
+        elif(estimator=='pti'):
+            q_e=t*P;
+        else:
+            raise Exception('Unknown estimator: '+str(estimator));
+        
+        if(not callable(estimator)):
+            # We manually force the output to be zero where P=0 @see self.q().
+            q_e=np.where(P==0,0.0,q_e);
+            
+        return q_e*samplingInterval;
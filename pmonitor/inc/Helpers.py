@@ -5,6 +5,7 @@ Created on Fri Aug 13 19:02:55 2021
 @author: Bethel Osuagwu
 """
 import math;
+import numpy as np;
 class Helpers:
     
     @staticmethod
@@ -75,6 +76,231 @@ class Helpers:
         
         return -dt/(math.log(1-beta));        
         
+    @staticmethod
+    def recurrence(a,b,y0=0):
+        """
+        Evaluate the first order linear recursion y[n]=a[n]*y[n-1]+b[n] for 
+        all samples at once. The recursion is solved with a parallel prefix 
+        scan over affine maps, i.e. log2(N) vectorised passes, which needs no 
+        division and so stays exact when a[n] is zero.
+
+        Parameters
+        ----------
+        a : float|Arraylike<float>
+            The recursion coefficient(s). A scalar applies to all samples.
+        b : Arraylike<float>
+            The input sequence.
+        y0 : float, optional
+            The value of y before the first sample. The default is 0.
+
+        Returns
+        -------
+        numpy.ndarray
+            The output sequence y.
+
+        """
+        B=np.array(b,dtype=np.float64);
+        A=np.array(np.broadcast_to(a,B.shape),dtype=np.float64);
+        
+        N=len(B);
+        if N==0:
+            return B;
+        
+        # Fold the initial state into the first sample.
+        B[0]=A[0]*y0+B[0];
+        A[0]=0;
+        
+        shift=1;
+        while shift<N:
+            B[shift:]=A[shift:]*B[:-shift]+B[shift:];
+            A[shift:]=A[shift:]*A[:-shift];
+            shift=shift*2;
+            
+        return B;
+    
+    @staticmethod
+    def recurrencePower(a,b,y0,k):
+        """
+        Closed form of k steps of the recursion y[n]=a*y[n-1]+b with 
+        constant a and b.
+
+        Parameters
+        ----------
+        a : float
+            The recursion coefficient.
+        b : float
+            The constant input.
+        y0 : float
+            The value of y before the first step.
+        k : integer
+            Number of steps.
+
+        Returns
+        -------
+        float
+            The value of y after k steps.
+
+        """
+        if(a==1):
+            return y0+k*b;
+        
+        ak=a**k;
+        return ak*y0+b*(1-ak)/(1-a);
+    
+    @staticmethod
+    def lindley(x,y0=0):
+        """
+        Evaluate the clamped accumulation y[n]=max(y[n-1]+x[n],0), i.e. the 
+        Lindley recursion, for all samples at once. With S the cumulative 
+        sum of x started at y0, y[n]=S[n]-min(0,min(S[0..n])).
+
+        Parameters
+        ----------
+        x : Arraylike<float>
+            The increments.
+        y0 : float, optional
+            The value of y before the first sample, which must not be 
+            negative. The default is 0.
+
+        Returns
+        -------
+        numpy.ndarray
+            The output sequence y.
+
+        """
+        x=np.asarray(x,dtype=np.float64);
+        S=np.cumsum(np.concatenate(([y0],x)));
+        
+        m=np.minimum.accumulate(S);
+        np.minimum(m,0,out=m);
+        
+        # Exactly zero where the sum is at its running minimum.
+        return np.maximum(S-m,0)[1:];
+    
+    @staticmethod
+    def rollingMean(x,length,live=None,initial=None):
+        """
+        Mean of a history buffer (@see ..inc.RingBuffer) after each sample of 
+        a sequence is pushed into it, for all samples at once.
+        
+        The window sums are differences of running sums. These are taken per 
+        block of samples rather than over the whole sequence, so that the 
+        rounding error is that of a block however long the sequence is.
+
+        Parameters
+        ----------
+        x : Arraylike<float>
+            The sequence.
+        length : integer
+            The length of the buffer, which divides the sum.
+        live : integer, optional
+            The number of most recent samples kept. The default is length.
+        initial : Arraylike<float>, optional
+            Newest-first content of the buffer before the first sample. The 
+            default is None, i.e. zeros.
+
+        Returns
+        -------
+        numpy.ndarray
+            The mean after each sample.
+
+        """
+        live=length if live is None else live;
+        x=np.asarray(x,dtype=np.float64);
+        
+        if initial is None:
+            initial=np.zeros(live);
+        initial=np.asarray(initial,dtype=np.float64)[:live][::-1];
+        
+        full=np.concatenate((initial,x));
+        nz=np.concatenate(([0],np.cumsum(full!=0)));
+        
+        # The sum after sample m is that of full[m+1:m+1+live]. Each block of 
+        # samples has running sums of its own.
+        s=np.empty(len(x));
+        block=max(live,4096);
+        for m0 in range(0,len(x),block):
+            m1=min(m0+block,len(x));
+            cs=np.concatenate(([0.0],np.cumsum(full[m0+1:m1+live])));
+            s[m0:m1]=cs[live:]-cs[:m1-m0];
+        
+        end=np.arange(live+1,len(full)+1);
+        
+        # An all-zero window has an exactly zero mean.
+        s[(nz[end]-nz[end-live])==0]=0;
+        
+        return s/length;
+    
+    @staticmethod
+    def resetCumsum(x,reset,initial=0):
+        """
+        Cumulative sum of a sequence that is set to zero at every reset
+        sample and restarts from zero after it. The sum of each segment
+        between resets is taken with np.cumsum, which adds in sample order,
+        so the result matches a sample by sample integrator exactly.
+
+        Parameters
+        ----------
+        x : Arraylike<float>
+            The sequence.
+        reset : Arraylike<boolean>
+            Samples at which the sum is zero.
+        initial : float, optional
+            The sum before the first sample. The default is 0.
+
+        Returns
+        -------
+        numpy.ndarray
+            The cumulative sum.
+
+        """
+        x=np.asarray(x,dtype=np.float64);
+        reset=np.asarray(reset,dtype=bool);
+        y=np.zeros(len(x));
+
+        # Segments of samples between resets
+        accumulate=np.logical_not(reset).astype(np.int8);
+        edges=np.diff(np.concatenate(([0],accumulate,[0])));
+        starts=np.flatnonzero(edges==1);
+        ends=np.flatnonzero(edges==-1);
+
+        for s,e in zip(starts.tolist(),ends.tolist()):
+            y0=initial if s==0 else 0.0;
+            y[s:e]=np.cumsum(np.concatenate(([y0],x[s:e])))[1:];
+
+        return y;
+
+    @staticmethod
+    def runLength(mask,initial=0):
+        """
+        Count, for every sample, the length of the run of consecutive True 
+        values that ends at the sample. The count is zero for a False sample.
+
+        Parameters
+        ----------
+        mask : Arraylike<boolean>
+            The sequence.
+        initial : integer, optional
+            The length of the run before the first sample, which a leading 
+            run of True values continues. The default is 0.
+
+        Returns
+        -------
+        numpy.ndarray
+            Integer run lengths.
+
+        """
+        mask=np.asarray(mask,dtype=bool);
+        idx=np.arange(len(mask));
+        
+        # Index of the last False sample so far, -1 if none.
+        last=np.maximum.accumulate(np.where(mask,-1,idx)) if len(mask) else idx;
+        
+        count=idx-last;
+        count[last<0]=count[last<0]+initial;
+        
+        return count;
+    
     @classmethod
     def impulseResponse(cls,beta,dt=1,show=True):
         """
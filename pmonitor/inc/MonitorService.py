@@ -0,0 +1,532 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Bethel Osuagwu
+"""
+import time;
+import struct;
+import asyncio;
+import numpy as np;
+
+class MonitorService:
+
+    # Wire format of a frame: patient id length, timestamp, rows and cols,
+    # followed by the utf-8 patient id and rows*cols float32 pressures.
+    FRAME_HEADER=struct.Struct('<HdII');
+
+    def __init__(self,queue_size=64,max_batch=16,health_every=1):
+        """
+        Asyncio service that monitors the tissues of many patients at once.
+        Timestamped pressure frames from any number of producers are queued
+        per patient, each patient's tissues are stepped with a whole frame
+        at a time, and health and relief alerts are published to
+        subscribers.
+
+        Queues are bounded. A producer that awaits self.submit() is held
+        back while the queue of the patient is full, which over a socket
+        @see self.serve() becomes TCP flow control, and self.submitNowait()
+        drops the frame instead. The stepping of a patient is never held
+        back by a slow subscriber, whose oldest events are dropped instead.
+
+        Frames of the wrong size for the tissues of a patient are rejected
+        when submitted. A frame whose step fails nonetheless is dropped and
+        an error event published, and the patient carries on with the next
+        frame @see self.stats().
+
+        Parameters
+        ----------
+        queue_size : integer, optional
+            Largest number of queued frames per patient. The default is 64.
+        max_batch : integer, optional
+            Largest number of queued frames stepped before the patient
+            yields to the event loop, which bounds the time any patient
+            holds the loop. The default is 16.
+        health_every : integer, optional
+            Publish a health event for every health_every-th frame of a
+            patient. Alerts are always published. The default is 1.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.queue_size=queue_size;
+        self.max_batch=max_batch;
+        self.health_every=health_every;
+
+        # Patients by id @see self.addPatient()
+        self.patients={};
+
+        # Event queues of the subscribers, with the number of events dropped
+        # from each @see self.subscribe()
+        self.subscribers={};
+
+        # Frames for patients that are not monitored
+        self.unknown=0;
+
+        self._running=False;
+        self._server=None;
+
+    def addPatient(self,patient_id,tissues,dt,threshold=None):
+        """
+        Add a patient to monitor.
+
+        Parameters
+        ----------
+        patient_id : string
+            Identifier of the patient.
+        tissues : ..bank.TissueArray|..bank.Tissue
+            The tissues of the patient, e.g. a TissueArray with the shape of
+            the pressure mat. Anything with setP(), step() and health().
+        dt : float
+            Sampling time of the frames in seconds.
+        threshold : float, optional
+            Health above which a relief alert is published. The default is
+            None, i.e. no alerts.
+
+        Returns
+        -------
+        None.
+
+        """
+        if(patient_id in self.patients):
+            raise Exception('Patient already monitored: '+str(patient_id));
+
+        # Number of pressures in a frame, None when the tissues do not tell.
+        size=np.size(tissues.P) if hasattr(tissues,'P') else None;
+
+        patient={'id':patient_id,'tissues':tissues,'dt':dt,'threshold':threshold,'size':size,
+                 'queue':asyncio.Queue(self.queue_size),'task':None,'alert':False,'removed':False,
+                 'frames':0,'dropped':0,'rejected':0,'errors':0,'latency_max':0.0,'latency_sum':0.0};
+        self.patients[patient_id]=patient;
+
+        if(self._running):
+            patient['task']=asyncio.ensure_future(self._monitor(patient));
+
+    async def removePatient(self,patient_id):
+        """
+        Stop monitoring a patient. Queued frames are discarded and pending
+        self.submit() calls for the patient return False.
+
+        Parameters
+        ----------
+        patient_id : string
+            Identifier of the patient.
+
+        Returns
+        -------
+        None.
+
+        """
+        patient=self.patients.pop(patient_id);
+        patient['removed']=True;
+        await self._cancel(patient);
+        await self._drain(patient);
+
+    def subscribe(self,maxsize=1024):
+        """
+        Subscribe to the events of all patients. An event is a dict with
+        'type' ('health', 'relief', 'relieved' or 'error'), 'patient',
+        'timestamp' and 'health', which for a health event is the health of
+        the tissues and for an alert the highest health. An error event is
+        of a frame that failed to step, with 'error' the exception and
+        'health' None.
+
+        Parameters
+        ----------
+        maxsize : integer, optional
+            Largest number of events held for the subscriber. When full the
+            oldest health event is dropped, so that alerts and errors are
+            kept, and only a queue of nothing but those drops its oldest
+            event @see self.dropped(). The default is 1024.
+
+        Returns
+        -------
+        asyncio.Queue
+            The events.
+
+        """
+        queue=asyncio.Queue(maxsize);
+        self.subscribers[queue]=0;
+        return queue;
+
+    def unsubscribe(self,queue):
+        """
+        End a subscription @see self.subscribe().
+        """
+        del self.subscribers[queue];
+
+    def dropped(self,queue):
+        """
+        Number of events dropped from a subscription because it was full
+        @see self.subscribe().
+        """
+        return self.subscribers[queue];
+
+    async def start(self):
+        """
+        Start monitoring the patients.
+        """
+        self._running=True;
+        for patient in self.patients.values():
+            if(patient['task'] is None):
+                patient['task']=asyncio.ensure_future(self._monitor(patient));
+
+    async def stop(self):
+        """
+        Stop monitoring and serving. Queued frames are discarded and pending
+        self.submit() calls return False.
+        """
+        self._running=False;
+        if(self._server is not None):
+            self._server.close();
+            await self._server.wait_closed();
+            self._server=None;
+
+        for patient in list(self.patients.values()):
+            await self._cancel(patient);
+            await self._drain(patient);
+
+    async def join(self):
+        """
+        Wait until all queued frames are stepped.
+        """
+        for patient in list(self.patients.values()):
+            await patient['queue'].join();
+
+    async def __aenter__(self):
+        await self.start();
+        return self;
+
+    async def __aexit__(self,*args):
+        await self.stop();
+
+    async def submit(self,patient_id,timestamp,frame):
+        """
+        Queue a pressure frame, waiting while the queue of the patient is
+        full.
+
+        Parameters
+        ----------
+        patient_id : string
+            Identifier of the patient.
+        timestamp : float
+            Time of the frame in seconds.
+        frame : Arraylike<float>
+            Interface pressures in kPa, as taken by the setP() of the tissues.
+
+        Returns
+        -------
+        boolean
+            False if the service is not running, the patient is not
+            monitored, the service is stopped or the patient removed while
+            waiting, or the frame is of the wrong size.
+
+        """
+        if(not self._running):
+            return False;
+        patient=self.patients.get(patient_id);
+        if(patient is None):
+            self.unknown+=1;
+            return False;
+        if(not self._valid(patient,frame)):
+            return False;
+
+        await patient['queue'].put((timestamp,frame,time.perf_counter()));
+
+        # Stopped or removed while waiting, the frame is discarded @see
+        # self._drain()
+        return self._running and not patient['removed'];
+
+    def submitNowait(self,patient_id,timestamp,frame):
+        """
+        Queue a pressure frame, or drop it if the queue of the patient is
+        full @see self.submit().
+
+        Returns
+        -------
+        boolean
+            False if the frame is dropped or rejected, or the service is not
+            running or the patient not monitored.
+
+        """
+        if(not self._running):
+            return False;
+        patient=self.patients.get(patient_id);
+        if(patient is None):
+            self.unknown+=1;
+            return False;
+        if(not self._valid(patient,frame)):
+            return False;
+
+        try:
+            patient['queue'].put_nowait((timestamp,frame,time.perf_counter()));
+        except asyncio.QueueFull:
+            patient['dropped']+=1;
+            return False;
+        return True;
+
+    async def replay(self,patient_id,frames,timestamps=None,realtime=False):
+        """
+        In-process sensor source: submit a sequence of frames, e.g. a
+        recording or a synthetic input from ..inc.Signals.
+
+        Parameters
+        ----------
+        patient_id : string
+            Identifier of the patient.
+        frames : Iterable<Arraylike<float>>
+            The frames.
+        timestamps : Iterable<float>, optional
+            Time of each frame in seconds. The default is None, i.e. frames
+            are dt of the patient apart starting at 0.
+        realtime : boolean, optional
+            Pace the frames by their timestamps. The default is False, i.e.
+            as fast as the service takes them.
+
+        Returns
+        -------
+        integer
+            Number of frames submitted.
+
+        """
+        dt=self.patients[patient_id]['dt'];
+        start=time.perf_counter();
+        count=0;
+        for n,frame in enumerate(frames):
+            timestamp=n*dt if timestamps is None else timestamps[n];
+            if(realtime):
+                await asyncio.sleep(max(0,start+timestamp-time.perf_counter()));
+            if(not await self.submit(patient_id,timestamp,frame)):
+                break;
+            count+=1;
+        return count;
+
+    async def serve(self,host='127.0.0.1',port=0):
+        """
+        Socket sensor source: accept frames from producers over TCP
+        @see self.encodeFrame().
+
+        Parameters
+        ----------
+        host : string, optional
+            The default is '127.0.0.1'.
+        port : integer, optional
+            The default is 0, i.e. any free port.
+
+        Returns
+        -------
+        integer
+            The port.
+
+        """
+        self._server=await asyncio.start_server(self._handle,host,port);
+        return self._server.sockets[0].getsockname()[1];
+
+    @classmethod
+    def encodeFrame(cls,patient_id,timestamp,frame):
+        """
+        Encode a frame for self.serve().
+
+        Parameters
+        ----------
+        patient_id : string
+            Identifier of the patient.
+        timestamp : float
+            Time of the frame in seconds.
+        frame : Arraylike<float>
+            Interface pressures in kPa, 1-D or 2-D.
+
+        Returns
+        -------
+        bytes
+            The encoded frame.
+
+        """
+        frame=np.asarray(frame,dtype='<f4');
+        rows,cols=frame.shape if frame.ndim==2 else (1,frame.size);
+        pid=str(patient_id).encode('utf-8');
+
+        return cls.FRAME_HEADER.pack(len(pid),timestamp,rows,cols)+pid+frame.tobytes();
+
+    @classmethod
+    async def readFrame(cls,reader):
+        """
+        Read a frame encoded with self.encodeFrame().
+
+        Parameters
+        ----------
+        reader : asyncio.StreamReader
+            The stream.
+
+        Returns
+        -------
+        list|None
+            [patient_id,timestamp,frame], None at the end of the stream.
+
+        """
+        try:
+            header=await reader.readexactly(cls.FRAME_HEADER.size);
+            n,timestamp,rows,cols=cls.FRAME_HEADER.unpack(header);
+            pid=(await reader.readexactly(n)).decode('utf-8');
+            data=await reader.readexactly(4*rows*cols);
+        except asyncio.IncompleteReadError:
+            return None;
+
+        frame=np.frombuffer(data,dtype='<f4').reshape(rows,cols);
+        if(rows==1):
+            frame=frame[0];
+        return [pid,timestamp,frame];
+
+    def stats(self,patient_id):
+        """
+        Frame counts and latencies of a patient. The latency of a frame is
+        the time from its submission to the publication of its events.
+
+        Returns
+        -------
+        dict
+            'frames', 'dropped', 'rejected' (of the wrong size), 'errors'
+            (failed to step), 'queued', 'latency_max' and 'latency_mean' in
+            seconds.
+
+        """
+        patient=self.patients[patient_id];
+        frames=patient['frames'];
+        return {'frames':frames,'dropped':patient['dropped'],'rejected':patient['rejected'],
+                'errors':patient['errors'],'queued':patient['queue'].qsize(),
+                'latency_max':patient['latency_max'],
+                'latency_mean':patient['latency_sum']/frames if frames else 0.0};
+
+    async def _handle(self,reader,writer):
+        """
+        Serve one socket producer.
+        """
+        try:
+            while True:
+                frame=await self.readFrame(reader);
+                if(frame is None):
+                    break;
+                # Not reading while the queue is full holds the producer back.
+                await self.submit(*frame);
+        finally:
+            writer.close();
+
+    async def _monitor(self,patient):
+        """
+        Step the tissues of a patient with its queued frames.
+        """
+        queue=patient['queue'];
+        while True:
+            batch=[await queue.get()];
+            while(len(batch)<self.max_batch and not queue.empty()):
+                batch.append(queue.get_nowait());
+
+            try:
+                for timestamp,frame,received in batch:
+                    # A bad frame must not stop the patient, whose queue
+                    # would then fill and hold its producers back for good.
+                    try:
+                        self._step(patient,timestamp,frame);
+                    except Exception as e:
+                        patient['errors']+=1;
+                        self._publish({'type':'error','patient':patient['id'],'timestamp':timestamp,
+                                       'health':None,'error':e});
+                        continue;
+                    latency=time.perf_counter()-received;
+                    patient['latency_sum']+=latency;
+                    patient['latency_max']=max(patient['latency_max'],latency);
+            finally:
+                for i in range(len(batch)):
+                    queue.task_done();
+
+            # Let the other patients and the producers run.
+            await asyncio.sleep(0);
+
+    def _step(self,patient,timestamp,frame):
+        """
+        Step the tissues of a patient with one frame and publish its events.
+        """
+        tissues=patient['tissues'];
+        dt=patient['dt'];
+
+        tissues.setP(frame);
+        tissues.step(dt);
+        health=tissues.health(dt);
+        patient['frames']+=1;
+
+        if(patient['frames']%self.health_every==0):
+            self._publish({'type':'health','patient':patient['id'],'timestamp':timestamp,
+                           'health':np.copy(health)});
+
+        # Alerts on crossing the threshold
+        threshold=patient['threshold'];
+        if(threshold is not None):
+            peak=float(np.max(health));
+            alert=peak>threshold;
+            if(alert!=patient['alert']):
+                patient['alert']=alert;
+                self._publish({'type':'relief' if alert else 'relieved','patient':patient['id'],
+                               'timestamp':timestamp,'health':peak});
+
+    def _valid(self,patient,frame):
+        """
+        Check if a frame is of the size of the tissues of a patient, counting
+        it as rejected if not.
+        """
+        if(patient['size'] is None or np.size(frame)==patient['size']):
+            return True;
+
+        patient['rejected']+=1;
+        return False;
+
+    def _publish(self,event):
+        """
+        Hand an event to every subscriber, dropping the oldest health event
+        of a subscriber that is full @see self.subscribe().
+        """
+        for queue in self.subscribers:
+            if(queue.full()):
+                self._evict(queue);
+                self.subscribers[queue]+=1;
+            queue.put_nowait(event);
+
+    @staticmethod
+    def _evict(queue):
+        """
+        Drop the oldest health event of a subscriber, or its oldest event if
+        it holds no health event.
+        """
+        # asyncio.Queue holds its items oldest first in the deque _queue, on
+        # which its own subclasses build.
+        items=queue._queue;
+        for i,event in enumerate(items):
+            if(event['type']=='health'):
+                del items[i];
+                return;
+        items.popleft();
+
+    async def _cancel(self,patient):
+        """
+        Cancel the monitoring task of a patient.
+        """
+        task=patient['task'];
+        patient['task']=None;
+        if(task is not None):
+            task.cancel();
+            try:
+                await task;
+            except asyncio.CancelledError:
+                pass;
+
+    async def _drain(self,patient):
+        """
+        Discard the queued frames of a patient. Each frame taken lets a
+        waiting self.submit() queue its frame, so this goes on until no
+        submit is left waiting, and also releases self.join().
+        """
+        queue=patient['queue'];
+        while(not queue.empty()):
+            while(not queue.empty()):
+                queue.get_nowait();
+                queue.task_done();
+            await asyncio.sleep(0);
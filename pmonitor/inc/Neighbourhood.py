@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+import numpy as np;
+
+class Neighbourhood:
+
+    def __init__(self,size,i,j):
+        """
+        Describes which tissues neighbour each other so that the pressure
+        gradients of all tissues, G=sum(|P-P_neighbour|)/2, can be computed
+        in one pass over a pressure frame. The cost is linear in the number
+        of neighbour pairs. Use the class methods to build one from a grid,
+        a sensor layout or an adjacency matrix.
+
+        Parameters
+        ----------
+        size : integer
+            Number of tissues.
+        i : Arraylike<integer>
+            Tissue indexes of each directed neighbour pair.
+        j : Arraylike<integer>
+            The corresponding neighbour indexes, i.e. j[m] is a neighbour
+            of i[m].
+
+        Returns
+        -------
+        None.
+
+        """
+        self.size=size;
+        self.i=np.asarray(i,dtype=np.intp);
+        self.j=np.asarray(j,dtype=np.intp);
+
+        # Set for grids, see self.grid()
+        self.shape=None;
+        self._offsets=None;
+
+    @classmethod
+    def grid(cls,shape,connectivity=8):
+        """
+        Neighbourhood of the cells of a 2-D grid, e.g. a pressure mat.
+
+        Parameters
+        ----------
+        shape : tuple
+            (rows,cols) of the grid.
+        connectivity : integer, optional
+            4 for edge neighbours only or 8 to include the diagonal
+            neighbours. The default is 8.
+
+        Returns
+        -------
+        Neighbourhood
+
+        """
+        if(connectivity==4):
+            offsets=[(0,1),(1,0)];
+        elif(connectivity==8):
+            offsets=[(0,1),(1,0),(1,1),(1,-1)];
+        else:
+            raise Exception('Connectivity must be 4 or 8');
+
+        rows,cols=shape;
+        idx=np.arange(rows*cols).reshape(rows,cols);
+        i=[];
+        j=[];
+        for dr,dc in offsets:
+            a,b=cls._shifted(idx,dr,dc);
+            i+=[a.ravel(),b.ravel()];
+            j+=[b.ravel(),a.ravel()];
+
+        nbh=cls(rows*cols,np.concatenate(i),np.concatenate(j));
+        nbh.shape=(rows,cols);
+        nbh._offsets=offsets;
+        return nbh;
+
+    @classmethod
+    def layout(cls,positions,radius):
+        """
+        Neighbourhood of sensors at arbitrary positions. Sensors closer than
+        the given radius are neighbours.
+
+        The positions are binned into a grid of cells the size of the radius
+        so that only sensors of adjacent cells are compared. The cost is
+        linear in the number of sensors and of candidate pairs, rather than
+        quadratic in the number of sensors.
+
+        Parameters
+        ----------
+        positions : Arraylike<float>
+            Sensor coordinates, one row per sensor.
+        radius : float
+            Neighbourhood radius in the unit of the coordinates.
+
+        Returns
+        -------
+        Neighbourhood
+
+        """
+        positions=np.asarray(positions,dtype=np.float64);
+        if(positions.ndim==1):
+            positions=positions[:,None];
+
+        n,dims=positions.shape;
+        if(n==0 or radius<0):
+            return cls(n,[],[]);
+
+        # Integer cell of each sensor, numbered in a grid padded by one cell
+        # on every side so that the adjacent cells of any sensor exist.
+        size=radius if radius>0 else 1.0;
+        cells=np.floor((positions-positions.min(axis=0))/size).astype(np.int64)+1;
+        extent=cells.max(axis=0)+2;
+        strides=np.concatenate((np.cumprod(extent[::-1])[::-1][1:],[1]));
+        key=cells@strides;
+
+        # Sensors sorted by cell, with the range of each cell in that order
+        order=np.argsort(key,kind='stable');
+        sorted_key=key[order];
+
+        i=[];
+        j=[];
+        offsets=np.stack(np.meshgrid(*[[-1,0,1]]*dims,indexing='ij'),axis=-1).reshape(-1,dims);
+        for offset in offsets@strides:
+            start=np.searchsorted(sorted_key,key+offset,side='left');
+            count=np.searchsorted(sorted_key,key+offset,side='right')-start;
+
+            # Pair each sensor with every sensor of the adjacent cell
+            total=int(np.sum(count));
+            if(total==0):
+                continue;
+            a=np.repeat(np.arange(n),count);
+            first=np.repeat(start-(np.cumsum(count)-count),count);
+            b=order[first+np.arange(total)];
+
+            near=np.sum((positions[a]-positions[b])**2,axis=1)<=radius*radius;
+            near&=(a!=b);
+            i.append(a[near]);
+            j.append(b[near]);
+
+        if(not i):
+            return cls(n,[],[]);
+        i=np.concatenate(i);
+        j=np.concatenate(j);
+        idx=np.lexsort((j,i));
+        return cls(n,i[idx],j[idx]);
+
+    @classmethod
+    def adjacency(cls,matrix):
+        """
+        Neighbourhood from an adjacency matrix where a non-zero entry (i,j)
+        means that j is a neighbour of i.
+
+        Parameters
+        ----------
+        matrix : Arraylike
+            Square matrix. Anything with a nonzero() method, e.g. a scipy
+            sparse matrix, is accepted.
+
+        Returns
+        -------
+        Neighbourhood
+
+        """
+        if(not hasattr(matrix,'nonzero')):
+            matrix=np.asarray(matrix);
+        i,j=matrix.nonzero();
+        return cls(matrix.shape[0],i,j);
+
+    @classmethod
+    def lists(cls,neighbours):
+        """
+        Neighbourhood from lists of neighbour indexes.
+
+        Parameters
+        ----------
+        neighbours : list
+            neighbours[i] lists the indexes of the neighbours of tissue i.
+
+        Returns
+        -------
+        Neighbourhood
+
+        """
+        i=[n for n,nb in enumerate(neighbours) for _ in nb];
+        j=[m for nb in neighbours for m in nb];
+        return cls(len(neighbours),i,j);
+
+    @staticmethod
+    def _shifted(X,dr,dc):
+        """
+        The two overlapping views of X that pair every cell with the cell
+        (dr,dc) away from it.
+        """
+        rows,cols=X.shape[-2:];
+        r0=slice(0,rows-dr);
+        r1=slice(dr,rows);
+        if(dc>=0):
+            c0=slice(0,cols-dc);
+            c1=slice(dc,cols);
+        else:
+            c0=slice(-dc,cols);
+            c1=slice(0,cols+dc);
+        return X[...,r0,c0],X[...,r1,c1];
+
+    def gradient(self,P):
+        """
+        Pressure gradient, G=sum(|P-P_neighbour|)/2, of every tissue.
+
+        Parameters
+        ----------
+        P : Arraylike<float>
+            Pressures of all tissues, flat or in the shape of the grid.
+
+        Returns
+        -------
+        numpy.ndarray
+            The gradients in the shape of P.
+
+        """
+        P=np.asarray(P,dtype=np.float64);
+
+        if(self._offsets is not None):
+            # Grid: one pass of array shifts per direction
+            F=P.reshape(self.shape);
+            G=np.zeros(self.shape);
+            for dr,dc in self._offsets:
+                a,b=self._shifted(F,dr,dc);
+                D=np.abs(a-b);
+                Ga,Gb=self._shifted(G,dr,dc);
+                Ga+=D;
+                Gb+=D;
+        else:
+            F=P.ravel();
+            G=np.bincount(self.i,weights=np.abs(F[self.i]-F[self.j]),minlength=self.size);
+
+        return (G/2.0).reshape(P.shape);
+
+    def apply(self,tissues):
+        """
+        Compute the gradients of a list of Tissue objects in one pass and
+        hand them to the tissues for their next step @see ..bank.Tissue.setGradient().
+        The tissues can then be stepped without a list of neighbours.
+
+        Parameters
+        ----------
+        tissues : list<Tissue>
+            The tissues in the order of the neighbourhood indexes.
+
+        Returns
+        -------
+        None.
+
+        """
+        G=self.gradient([T.P for T in tissues]);
+        G_avg=self.gradient([T.Ps.mean() for T in tissues]);
+        for T,g,g_avg in zip(tissues,G,G_avg):
+            T.setGradient(g,g_avg);
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Bethel Osuagwu
+"""
+import os;
+import itertools;
+import numpy as np;
+from concurrent.futures import ProcessPoolExecutor;
+from multiprocessing import shared_memory;
+from .Helpers import Helpers;
+from .PressureTimeThreshold import PressureTimeThreshold;
+from .EffectEstimator import EffectEstimator;
+
+class ParameterSweep:
+
+    # Summary columns of the results table
+    METRICS=('health_final','health_max','health_mean','time_above');
+
+    # Shared arrays attached in a worker process @see self._attach()
+    _shared=None;
+
+    def __init__(self,tissueClass,grid,dt,workers=None,pressureTimeThreshold=None,effectEstimator=None,threshold=None,keep_series=False,**fixed):
+        """
+        Run a tissue class over pressure traces for every combination of a
+        grid of parameters, spread over a pool of processes. The traces are
+        placed once in shared memory, so tasks only carry parameters.
+
+        Parameters
+        ----------
+        tissueClass : class
+            A tissue class of ..bank, e.g. TissueLinear.
+        grid : dict
+            Parameter name to the list of values to sweep. Names are
+            constructor arguments of the class, e.g. 'k_dpi',
+            'reliefTimeThreshold' or 'history_len', or one of:
+            'relief_time' the relief time in seconds, from which all betas
+            are set with Helpers.beta(); 'linear_relief_time' the same with
+            Helpers.linearBeta(); 'flen' the averaging length in samples of
+            all mechanisms of TissueAveraging.
+        dt : float
+            Sampling time step in seconds.
+        workers : integer, optional
+            Number of processes. 0 runs in this process. The default is
+            None, i.e. the number of CPUs.
+        pressureTimeThreshold : PressureTimeThreshold, optional
+            The default is a new PressureTimeThreshold().
+        effectEstimator : EffectEstimator, optional
+            Must be picklable, i.e. without a lambda as estimator. The
+            default is a new EffectEstimator().
+        threshold : float, optional
+            Health above which time is counted in 'time_above'. The default
+            is None, i.e. 'time_above' is 0.
+        keep_series : boolean, optional
+            Also keep the health of every sample of every run @see
+            self.series. The default is False.
+        **fixed :
+            Constructor arguments shared by all runs.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.tissueClass=tissueClass;
+        self.grid=dict(grid);
+        self.dt=dt;
+        self.workers=workers;
+        self.pressureTimeThreshold=pressureTimeThreshold or PressureTimeThreshold();
+        self.effectEstimator=effectEstimator or EffectEstimator();
+        self.threshold=threshold;
+        self.keep_series=keep_series;
+        self.fixed=fixed;
+
+        # Health of every sample of every run, when kept.
+        self.series=None;
+
+    def combinations(self):
+        """
+        All combinations of the grid.
+
+        Returns
+        -------
+        list<dict>
+            The parameters of every combination.
+
+        """
+        names=list(self.grid);
+        return [dict(zip(names,values)) for values in itertools.product(*[self.grid[n] for n in names])];
+
+    @staticmethod
+    def constructorArgs(params,dt):
+        """
+        Translate sweep parameters to constructor arguments @see
+        self.__init__().
+
+        Parameters
+        ----------
+        params : dict
+            Sweep parameters.
+        dt : float
+            Sampling time step in seconds.
+
+        Returns
+        -------
+        dict
+            Constructor arguments.
+
+        """
+        kwargs=dict(params);
+        if('relief_time' in kwargs):
+            beta=Helpers.beta(kwargs.pop('relief_time'),dt);
+            kwargs.update({'beta_iri':beta,'beta_dpi':beta,'beta_gi':beta});
+        if('linear_relief_time' in kwargs):
+            beta=Helpers.linearBeta(kwargs.pop('linear_relief_time'),dt);
+            kwargs.update({'beta_iri':beta,'beta_dpi':beta,'beta_gi':beta});
+        if('flen' in kwargs):
+            flen=int(kwargs.pop('flen'));
+            kwargs.update({'len_iri':flen,'len_dpi':flen,'len_gi':flen});
+        return kwargs;
+
+    def run(self,Ps):
+        """
+        Run every combination of the grid on every trace.
+
+        Parameters
+        ----------
+        Ps : Arraylike<float>
+            Interface pressure trace, or traces with one row per trace.
+
+        Returns
+        -------
+        numpy.ndarray
+            Structured array with one row per run: the swept parameters,
+            'trace' (the row of Ps) and self.METRICS. With keep_series the
+            health of run i is self.series[i].
+
+        """
+        Ps=np.atleast_2d(np.asarray(Ps,dtype=np.float64));
+        combos=self.combinations();
+        tasks=[(i,c,t) for i,(c,t) in enumerate(itertools.product(range(len(combos)),range(len(Ps))))];
+
+        # Shared input and output
+        shm_in=shared_memory.SharedMemory(create=True,size=max(Ps.nbytes,1));
+        out_shape=(len(tasks),Ps.shape[1]) if self.keep_series else (0,);
+        shm_out=shared_memory.SharedMemory(create=True,size=max(8*int(np.prod(out_shape)),1));
+        try:
+            np.ndarray(Ps.shape,np.float64,shm_in.buf)[:]=Ps;
+            shared=(shm_in.name,Ps.shape,shm_out.name,out_shape);
+            config=(self.tissueClass,self.dt,self.pressureTimeThreshold,self.effectEstimator,self.threshold,self.fixed);
+            jobs=[(i,self.constructorArgs(combos[c],self.dt),t) for i,c,t in tasks];
+
+            if(self.workers==0):
+                self._attach(*shared);
+                metrics=[self._run(config,job) for job in jobs];
+                self._detach();
+            else:
+                # A few chunks per worker to balance the load
+                chunksize=max(1,len(jobs)//(4*(self.workers or os.cpu_count() or 1)));
+                with ProcessPoolExecutor(self.workers,initializer=self._attach,initargs=shared) as pool:
+                    metrics=list(pool.map(self._run,itertools.repeat(config),jobs,chunksize=chunksize));
+
+            if(self.keep_series):
+                self.series=np.array(np.ndarray(out_shape,np.float64,shm_out.buf));
+        finally:
+            shm_in.close();
+            shm_in.unlink();
+            shm_out.close();
+            shm_out.unlink();
+
+        return self._table(combos,tasks,metrics);
+
+    def _table(self,combos,tasks,metrics):
+        """
+        Collect the runs in a structured array.
+        """
+        names=list(self.grid);
+        dtype=[(n,np.asarray(self.grid[n]).dtype) for n in names];
+        dtype+=[('trace',np.int64)]+[(m,np.float64) for m in self.METRICS];
+
+        table=np.zeros(len(tasks),dtype=dtype);
+        for (i,c,t),m in zip(tasks,metrics):
+            for n in names:
+                table[i][n]=combos[c][n];
+            table[i]['trace']=t;
+            for k,v in zip(self.METRICS,m):
+                table[i][k]=v;
+        return table;
+
+    @classmethod
+    def _attach(cls,in_name,in_shape,out_name,out_shape):
+        """
+        Attach to the shared arrays, once per worker process.
+        """
+        shm_in=shared_memory.SharedMemory(name=in_name);
+        shm_out=shared_memory.SharedMemory(name=out_name);
+        cls._shared=(shm_in,shm_out,
+                     np.ndarray(in_shape,np.float64,shm_in.buf),
+                     np.ndarray(out_shape,np.float64,shm_out.buf));
+
+    @classmethod
+    def _detach(cls):
+        shm_in,shm_out=cls._shared[:2];
+        cls._shared=None;
+        shm_in.close();
+        shm_out.close();
+
+    @classmethod
+    def _run(cls,config,job):
+        """
+        One run of the sweep, in a worker process.
+        """
+        tissueClass,dt,ptt,ee,threshold,fixed=config;
+        i,kwargs,t=job;
+        Ps,out=cls._shared[2:];
+
+        kwargs=dict(fixed,**kwargs);
+        tissue=tissueClass('sweep',ptt,ee,**kwargs);
+        health=tissue.simulate(Ps[t],dt)['health'];
+
+        if(out.size):
+            out[i]=health;
+
+        time_above=0.0 if threshold is None else float(np.count_nonzero(health>threshold)*dt);
+        if(len(health)==0):
+            return (0.0,0.0,0.0,time_above);
+        return (float(health[-1]),float(np.max(health)),float(np.mean(health)),time_above);
@@ -6,6 +6,7 @@ Created on Tue Jul 13 20:54:03 2021
 @author: Bethel Osuagwu
 """
 import math;
+import numpy as np;
 
 class PressureTimeThreshold:
     
@@ -59,14 +60,14 @@ class PressureTimeThreshold:
 
         Parameters
         ----------
-        t : float
+        t : float|Arraylike<float>
             Time, in minutes, whose related pressure will be computed.
         Params : self.pressureToTime
            
 
         Returns
         -------
-        float.
+        float|numpy.ndarray.
         pressure in kPa
 
         """
@@ -75,6 +76,10 @@ class PressureTimeThreshold:
         t0=self.t0;
         alpha=self.alpha;
         
+        if(np.ndim(t)):
+            t=np.asarray(t,dtype=np.float64);
+            return K/(1+np.power(math.e,alpha*(t-t0))) + C
+        
         return K/(1+math.e**(alpha*(t-t0))) + C
     
     def pressureToTime(self,P):
@@ -85,7 +90,7 @@ class PressureTimeThreshold:
     
         Parameters
         ----------
-        P : float
+        P : float|Arraylike<float>
             Pressure in KPa. self.C < P < self.C+self.K. A value of P outside 
             of this range will be compressed to fit.
 
@@ -93,7 +98,7 @@ class PressureTimeThreshold:
         Returns
         -------
         [time,P_adjusted]. A 2-element list where the first is the time and the second is the adjusted pressure with respect to the limiting pressure value.
-        Time in Minutes
+        Time in Minutes. Both are arrays if P is an array.
     
         '''
         K=self.K;
@@ -101,6 +106,9 @@ class PressureTimeThreshold:
         t0=self.t0;
         alpha=self.alpha;
         
+        if(np.ndim(P)):
+            return self._pressureToTimeArray(P);
+        
         # Is P too small
         if(P==0):
             P=0.00001; # Because will get a maths error when P ==0.
@@ -118,20 +126,60 @@ class PressureTimeThreshold:
         
         return [t,P];
     
+    def _pressureToTimeArray(self,P):
+        '''
+        Array version of self.pressureToTime(). The same adjustments of P 
+        are applied, in the same order, to the elements they concern.
+
+        Parameters
+        ----------
+        P : Arraylike<float>
+            Pressure in KPa.
+
+        Returns
+        -------
+        [time,P_adjusted]. Arrays of time in minutes and adjusted pressure.
+
+        '''
+        K=self.K;
+        C=self.C;
+        t0=self.t0;
+        alpha=self.alpha;
+        
+        P=np.array(P,dtype=np.float64);
+        
+        # Is P too small
+        P[P==0]=0.00001;
+        
+        m=P<=C;
+        P[m]=C+P[m]/C;
+        
+        # Is P too large
+        m=P>=K+C;
+        P[m]=K+C-(K+C)/P[m];
+        
+        #
+        t=( (np.log( (K/(P-C))-1) )/alpha )+t0;
+        
+        return [t,P];
+    
     def isDamagingPressure(self,P):
         """
         Checks if the given pressure is damaging
 
         Parameters
         ----------
-        P : float
+        P : float|Arraylike<float>
             Pressure in kPa.
 
         Returns
         -------
-        boolaan
+        boolean|numpy.ndarray<boolean>
+            A boolean mask if P is an array.
 
         """
+        if(np.ndim(P)):
+            P=np.asarray(P);
         
         return P>=self.C;
     
@@ -141,14 +189,18 @@ class PressureTimeThreshold:
 
         Parameters
         ----------
-        P : float
+        P : float|Arraylike<float>
             Pressure in kpa.
 
         Returns
         -------
-        boolean.
+        boolean|numpy.ndarray<boolean>.
+            A boolean mask if P is an array.
 
         """
+        if(np.ndim(P)):
+            P=np.asarray(P);
+        
         return P>self.C;
 
     def isHighPressure(self,P):
@@ -157,14 +209,18 @@ class PressureTimeThreshold:
 
         Parameters
         ----------
-        P : float
+        P : float|Arraylike<float>
             Pressure in kpa.
 
         Returns
         -------
-        boolean.
+        boolean|numpy.ndarray<boolean>.
+            A boolean mask if P is an array.
 
         """
+        if(np.ndim(P)):
+            P=np.asarray(P);
+        
         return P>=self.K+self.C;
 
     def getShortTermThreshold(self):
@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Bethel Osuagwu
+"""
+import os;
+import json;
+import numpy as np;
+
+class Recorder:
+
+    # Tissue attribute or method of each field
+    FIELDS={'P':'P','iri':'healthIri','dpi':'healthDpi','gi':'healthGi','health':'health','reliefCounter':'reliefCounter'};
+
+    # Bytes of a chunk of a column when the chunk size is not given
+    CHUNK_BYTES=8*2**20;
+
+    def __init__(self,tissues,dt,fields=('health',),decimation=1,chunk_size=None,directory=None,format='npy'):
+        """
+        Record fields of a set of tissues while they are stepped, into
+        preallocated numpy columns instead of lists. Columns are held in
+        chunks of rows; a full chunk is kept in memory, or written to disk
+        when a directory is given so that a run of any length takes the
+        memory of one chunk. Reopen a recording on disk with self.open().
+
+        Every column has a row per recorded sample and a column per tissue,
+        or per cell of a ..bank.TissueArray @see self.cells().
+
+        Parameters
+        ----------
+        tissues : Iterable|dict
+            The tissues, i.e. ..bank.Tissue and ..bank.TissueArray objects,
+            or a dict of them.
+        dt : float
+            Sampling time step in seconds.
+        fields : Iterable<string>, optional
+            Keys of self.FIELDS to record. 'iri', 'dpi' and 'gi' are the
+            health numbers of the mechanisms. The default is ('health',).
+        decimation : integer, optional
+            Record every decimation-th sample. The default is 1.
+        chunk_size : integer, optional
+            Rows of a chunk. The default is None, i.e. self.CHUNK_BYTES per
+            column.
+        directory : string, optional
+            Directory to write the chunks to. Created if missing. The
+            default is None, i.e. chunks stay in memory.
+        format : string, optional
+            'npy' for a .npy file per column of a chunk, which self.open()
+            memory-maps, or 'npz' for a .npz file per chunk. The default is
+            'npy'.
+
+        Returns
+        -------
+        None.
+
+        """
+        tissues=list(tissues.values()) if isinstance(tissues,dict) else list(tissues);
+        for field in fields:
+            if(field not in self.FIELDS):
+                raise Exception('Unknown field: '+str(field));
+        if(format not in ('npy','npz')):
+            raise Exception('Unknown format: '+str(format));
+
+        self.tissues=tissues;
+        self.dt=dt;
+        self.fields=tuple(fields);
+        self.decimation=decimation;
+        self.directory=directory;
+        self.format=format;
+
+        # Cells of each tissue
+        self.codes=[str(t.code) for t in tissues];
+        self.sizes=[int(np.size(t.P)) for t in tissues];
+        self.offsets=np.concatenate(([0],np.cumsum(self.sizes,dtype=np.int64))).tolist();
+        self.width=self.offsets[-1];
+        self._scalar=all(np.ndim(t.P)==0 for t in tissues);
+
+        self.chunk_size=chunk_size or max(1,self.CHUNK_BYTES//(8*max(self.width,1)));
+
+        # Samples seen and rows recorded
+        self.samples=0;
+        self.rows=0;
+
+        # Chunks completed, in memory or the row counts of those on disk
+        self.chunks=[];
+        self._row=0;
+        self._columns=self._allocate();
+
+        if(directory is not None):
+            os.makedirs(directory,exist_ok=True);
+            self._writeMeta();
+
+    def _allocate(self):
+        """
+        Columns of a new chunk.
+        """
+        columns={'sample':np.empty(self.chunk_size,dtype=np.int64)};
+        for field in self.fields:
+            dtype=np.int64 if field=='reliefCounter' else np.float64;
+            columns[field]=np.empty((self.chunk_size,self.width),dtype=dtype);
+        return columns;
+
+    def record(self):
+        """
+        Record the fields of the tissues for the current sample, i.e. after
+        they are stepped. Samples between decimated ones are only counted.
+
+        Returns
+        -------
+        None.
+
+        """
+        if(self.tissues is None):
+            raise Exception('A reopened recording can not record');
+
+        n=self.samples;
+        self.samples=n+1;
+        if(n%self.decimation):
+            return;
+
+        row=self._row;
+        columns=self._columns;
+        columns['sample'][row]=n;
+        for field in self.fields:
+            column=columns[field];
+            if(self._scalar):
+                column[row]=[self._value(t,field) for t in self.tissues];
+            else:
+                for t,s,e in zip(self.tissues,self.offsets[:-1],self.offsets[1:]):
+                    column[row,s:e]=np.ravel(self._value(t,field));
+
+        self._row=row+1;
+        self.rows+=1;
+        if(self._row==self.chunk_size):
+            self.flush();
+
+    def _value(self,tissue,field):
+        """
+        A field of a tissue.
+        """
+        if(field=='health'):
+            return tissue.health(self.dt);
+        value=getattr(tissue,self.FIELDS[field]);
+        return value() if callable(value) else value;
+
+    def flush(self):
+        """
+        Complete the current chunk, which is written to disk with a
+        directory. Recording continues in a new chunk.
+
+        Returns
+        -------
+        None.
+
+        """
+        if(self._row==0):
+            return;
+
+        chunk={k:v[:self._row] for k,v in self._columns.items()};
+        if(self.directory is None):
+            self.chunks.append(chunk);
+            self._columns=self._allocate();
+        else:
+            self._writeChunk(len(self.chunks),chunk);
+            self.chunks.append(self._row);
+            self._writeMeta();
+        self._row=0;
+
+    def close(self):
+        """
+        Flush the recording @see self.flush().
+        """
+        self.flush();
+
+    def __enter__(self):
+        return self;
+
+    def __exit__(self,*args):
+        self.close();
+
+    def __len__(self):
+        return self.rows;
+
+    def cells(self,code):
+        """
+        Columns of a tissue.
+
+        Parameters
+        ----------
+        code : string
+            Code of the tissue.
+
+        Returns
+        -------
+        slice
+            The columns, in the order of the cells of a TissueArray.
+
+        """
+        i=self.codes.index(str(code));
+        return slice(self.offsets[i],self.offsets[i+1]);
+
+    def column(self,field,start=0,stop=None,cells=slice(None)):
+        """
+        Recorded rows of a field. Only the chunks of the rows asked for are
+        read from disk.
+
+        Parameters
+        ----------
+        field : string
+            A recorded field, or 'sample' for the sample number of each row.
+        start : integer, optional
+            First row. The default is 0.
+        stop : integer, optional
+            Row after the last. The default is None, i.e. the end.
+        cells : integer|slice|Arraylike<integer>, optional
+            Columns @see self.cells(). The default is all.
+
+        Returns
+        -------
+        numpy.ndarray
+            The rows.
+
+        """
+        if(field!='sample' and field not in self.fields):
+            raise Exception('Field not recorded: '+str(field));
+
+        stop=self.rows if stop is None else min(stop,self.rows);
+        parts=[];
+        s=0;
+        for k,chunk in enumerate(self.chunks+[self._row]):
+            n=chunk if isinstance(chunk,int) else len(chunk['sample']);
+            a,b=max(start-s,0),min(stop-s,n);
+            if(a<b):
+                data=self._chunkColumn(k,chunk,field);
+                parts.append(data[a:b] if field=='sample' else data[a:b,cells]);
+            s+=n;
+            if(s>=stop):
+                break;
+
+        if(parts):
+            return np.concatenate(parts);
+        shape=(0,) if field=='sample' else np.empty((0,self.width))[:,cells].shape;
+        return np.empty(shape,dtype=np.int64 if field in ('sample','reliefCounter') else np.float64);
+
+    def time(self,start=0,stop=None):
+        """
+        Time of the recorded rows in seconds.
+        """
+        return self.column('sample',start,stop)*self.dt;
+
+    def _chunkColumn(self,k,chunk,field):
+        """
+        A column of a chunk.
+        """
+        if(k==len(self.chunks)):
+            return self._columns[field][:self._row];
+        if(isinstance(chunk,dict)):
+            return chunk[field];
+        if(self.format=='npy'):
+            return np.load(self._path(k,field),mmap_mode='r');
+        with np.load(self._path(k)) as f:
+            return f[field];
+
+    def _path(self,k,field=None):
+        """
+        File of a chunk, or of a column of a chunk.
+        """
+        if(self.format=='npy'):
+            return os.path.join(self.directory,'%s_%06d.npy'%(field,k));
+        return os.path.join(self.directory,'chunk_%06d.npz'%k);
+
+    def _writeChunk(self,k,chunk):
+        if(self.format=='npy'):
+            for field,data in chunk.items():
+                np.save(self._path(k,field),data);
+        else:
+            np.savez(self._path(k),**chunk);
+
+    def _writeMeta(self):
+        """
+        Write the description of the recording, which self.open() reads.
+        """
+        meta={'dt':self.dt,'fields':list(self.fields),'decimation':self.decimation,
+              'format':self.format,'codes':self.codes,'sizes':self.sizes,
+              'samples':self.samples,'chunks':self.chunks};
+        path=os.path.join(self.directory,'recorder.json');
+        with open(path+'.tmp','w') as f:
+            json.dump(meta,f);
+        os.replace(path+'.tmp',path);
+
+    @classmethod
+    def open(cls,directory):
+        """
+        Reopen a recording written to a directory. Nothing is read until
+        asked for @see self.column().
+
+        Parameters
+        ----------
+        directory : string
+            The directory.
+
+        Returns
+        -------
+        Recorder
+            The recording, which can be read but not recorded to.
+
+        """
+        with open(os.path.join(directory,'recorder.json')) as f:
+            meta=json.load(f);
+
+        recorder=cls.__new__(cls);
+        recorder.tissues=None;
+        recorder.dt=meta['dt'];
+        recorder.fields=tuple(meta['fields']);
+        recorder.decimation=meta['decimation'];
+        recorder.directory=directory;
+        recorder.format=meta['format'];
+        recorder.codes=meta['codes'];
+        recorder.sizes=meta['sizes'];
+        recorder.offsets=np.concatenate(([0],np.cumsum(recorder.sizes,dtype=np.int64))).tolist();
+        recorder.width=recorder.offsets[-1];
+        recorder.samples=meta['samples'];
+        recorder.chunks=meta['chunks'];
+        recorder.rows=int(sum(recorder.chunks));
+        recorder.chunk_size=max(recorder.chunks,default=1);
+        recorder._scalar=False;
+        recorder._row=0;
+        recorder._columns={'sample':np.empty(0,dtype=np.int64)};
+        return recorder;
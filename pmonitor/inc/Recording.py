@@ -0,0 +1,351 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Bethel Osuagwu
+"""
+import os;
+import copy;
+import numpy as np;
+
+class Recording:
+
+    # Largest distance, in frames and relative to the number of frames from
+    # t0, at which a time still counts as that of a frame @see self.index().
+    # It covers the rounding of times computed as t0+n*dt.
+    TIME_TOLERANCE=1e-9;
+
+    def __init__(self,file,rows,cols,dt,t0=0,timestamps=None,dtype='<f4',offset=0):
+        """
+        Reader of a recorded pressure session, i.e. a raw file of frames in
+        time x rows x cols order. The file is memory-mapped, so only the
+        frames read are paged in and a recording of any length takes no
+        memory up front. Frames and windows of frames are views of the map,
+        i.e. zero-copy, unless channels are selected with lists @see
+        self.select().
+
+        Parameters
+        ----------
+        file : string
+            The raw file.
+        rows : integer
+            Rows of a frame.
+        cols : integer
+            Columns of a frame.
+        dt : float
+            Sampling time in seconds.
+        t0 : float, optional
+            Time of the first frame in seconds. The default is 0.
+        timestamps : string|Arraylike<float>, optional
+            Increasing time of every frame in seconds, or a raw file of
+            float64 times which is memory-mapped as well. The default is
+            None, i.e. frames are dt apart from t0.
+        dtype : numpy.dtype, optional
+            Data type of the file. The default is '<f4', i.e. little-endian
+            float32.
+        offset : integer, optional
+            Bytes to skip at the start of the file, e.g. a header. The default
+            is 0.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.file=file;
+        self.rows=rows;
+        self.cols=cols;
+        self.dt=dt;
+        self.t0=t0;
+        self.dtype=np.dtype(dtype);
+
+        # Whole frames in the file. A partly written last frame is ignored.
+        frame_bytes=rows*cols*self.dtype.itemsize;
+        n=(os.path.getsize(file)-offset)//frame_bytes;
+        self.data=np.memmap(file,self.dtype,'r',offset,(n,rows,cols)) if n else np.zeros((0,rows,cols),self.dtype);
+
+        if isinstance(timestamps,str):
+            timestamps=np.memmap(timestamps,'<f8','r');
+        if(timestamps is not None and len(timestamps)<n):
+            raise Exception('The recording has '+str(n)+' frames but '+str(len(timestamps))+' timestamps');
+        self.timestamps=timestamps;
+
+        # Selected channels @see self.select()
+        self._channels=(slice(None),slice(None));
+
+        # Position of self.read()
+        self.position=0;
+
+    def __len__(self):
+        return len(self.data);
+
+    @property
+    def shape(self):
+        """
+        Shape of the recording with the selected channels, i.e. (frames,
+        rows, cols).
+        """
+        return (len(self),)+self._select(self.data[:0]).shape[1:];
+
+    @property
+    def duration(self):
+        """
+        Time from the first frame to the end of the last in seconds.
+        """
+        if(len(self)==0):
+            return 0.0;
+        return float(self.time(len(self)-1)-self.time(0)+self.dt);
+
+    def select(self,rows=slice(None),cols=slice(None)):
+        """
+        A reader of a subset of the channels, sharing the memory map.
+
+        Parameters
+        ----------
+        rows : integer|slice|Arraylike<integer>, optional
+            The rows. The default is all rows.
+        cols : integer|slice|Arraylike<integer>, optional
+            The columns. The default is all columns.
+
+        Returns
+        -------
+        Recording
+            The reader. An integer selects one row or column, which is kept
+            as an axis of length 1 so that frames stay (rows, cols). With
+            integers and slices its windows are views of the file. With lists
+            they are copies, as for numpy fancy indexing.
+
+        """
+        recording=copy.copy(self);
+        recording._channels=(self._axis(rows),self._axis(cols));
+        recording.position=0;
+        return recording;
+
+    @staticmethod
+    def _axis(index):
+        """
+        An integer index as a slice of length 1, other indices unchanged.
+        """
+        if(isinstance(index,(int,np.integer))):
+            index=int(index);
+            return slice(index,index+1 if index!=-1 else None);
+        return index;
+
+    def _select(self,frames):
+        """
+        The selected channels of frames.
+        """
+        rows,cols=self._channels;
+        if(np.ndim(rows) and np.ndim(cols)):
+            return frames[:,np.asarray(rows)[:,None],np.asarray(cols)];
+        return frames[:,rows,cols];
+
+    def time(self,index):
+        """
+        Time of frames.
+
+        Parameters
+        ----------
+        index : integer|Arraylike<integer>
+            Frame index(es).
+
+        Returns
+        -------
+        float|numpy.ndarray
+            Time in seconds.
+
+        """
+        if(self.timestamps is None):
+            return self.t0+np.asarray(index)*self.dt;
+        return np.asarray(self.timestamps[index],dtype=np.float64);
+
+    def index(self,t):
+        """
+        The frame at a time, i.e. the last frame at or before it. Without
+        timestamps a time within self.TIME_TOLERANCE of the time of a frame
+        is taken as the time of the frame, so that t0+n*dt gives frame n
+        whatever its rounding and self.window() and self.between() agree.
+        With timestamps times are compared as they are.
+
+        Parameters
+        ----------
+        t : float
+            Time in seconds.
+
+        Returns
+        -------
+        integer
+            Frame index, 0 before the first frame and len(self) after the
+            recording.
+
+        """
+        n=len(self);
+        if(self.timestamps is None):
+            x=(t-self.t0)/self.dt;
+            r=np.round(x);
+            i=int(r) if abs(x-r)<=self.TIME_TOLERANCE*max(1.0,abs(r)) else int(np.floor(x));
+        else:
+            i=int(np.searchsorted(self.timestamps[:n],t,side='right'))-1;
+            if(i==n-1 and t>=self.time(n-1)+self.dt):
+                i=n;
+        return min(max(i,0),n);
+
+    def window(self,start,stop):
+        """
+        Frames from start up to stop.
+
+        Parameters
+        ----------
+        start : integer
+            First frame.
+        stop : integer
+            Frame after the last.
+
+        Returns
+        -------
+        numpy.ndarray
+            The frames, in the dtype of the file.
+
+        """
+        return self._select(self.data[start:stop]);
+
+    def between(self,t_start,t_stop):
+        """
+        Frames from time t_start up to t_stop @see self.index().
+
+        Returns
+        -------
+        list
+            [first frame index,frames].
+
+        """
+        start=self.index(t_start);
+        return [start,self.window(start,max(self.index(t_stop),start))];
+
+    def trace(self,row,col,start=0,stop=None):
+        """
+        Pressure trace of one channel, e.g. for ..bank.Tissue.simulate().
+
+        Parameters
+        ----------
+        row : integer
+            Row of the channel in the selected channels.
+        col : integer
+            Column of the channel in the selected channels.
+        start : integer, optional
+            First frame. The default is 0.
+        stop : integer, optional
+            Frame after the last. The default is None, i.e. the end.
+
+        Returns
+        -------
+        numpy.ndarray
+            Strided view of the file with the selected channels of integers
+            and slices, otherwise a copy.
+
+        """
+        return self.window(start,stop)[:,row,col];
+
+    def seek(self,t):
+        """
+        Move the position of self.read() to the frame at a time.
+
+        Parameters
+        ----------
+        t : float
+            Time in seconds.
+
+        Returns
+        -------
+        integer
+            The new position.
+
+        """
+        self.position=self.index(t);
+        return self.position;
+
+    def read(self,n):
+        """
+        Read the next frames from the position @see self.seek().
+
+        Parameters
+        ----------
+        n : integer
+            Largest number of frames.
+
+        Returns
+        -------
+        numpy.ndarray
+            The frames, fewer than n at the end of the recording.
+
+        """
+        start=self.position;
+        self.position=min(start+n,len(self));
+        return self.window(start,self.position);
+
+    def chunks(self,size,start=0,stop=None):
+        """
+        Iterate over the recording in chunks of frames, e.g. for whole-trace
+        simulation of long recordings in bounded memory.
+
+        Parameters
+        ----------
+        size : integer
+            Frames per chunk, the last may be shorter.
+        start : integer, optional
+            First frame. The default is 0.
+        stop : integer, optional
+            Frame after the last. The default is None, i.e. the end.
+
+        Yields
+        ------
+        list
+            [first frame index,frames] of each chunk.
+
+        """
+        stop=len(self) if stop is None else min(stop,len(self));
+        for s in range(start,stop,size):
+            yield [s,self.window(s,min(s+size,stop))];
+
+    def __iter__(self):
+        """
+        Iterate over the frames from the position, e.g. to step a
+        ..bank.TissueArray or to replay into ..inc.MonitorService.
+        """
+        for s,frames in self.chunks(1024,self.position):
+            yield from frames;
+
+    def close(self):
+        """
+        Release the memory map. Views already taken keep it open.
+        """
+        self.data=np.zeros((0,self.rows,self.cols),self.dtype);
+        self.timestamps=None if self.timestamps is None else np.asarray(self.timestamps[:0]);
+
+    def __enter__(self):
+        return self;
+
+    def __exit__(self,*args):
+        self.close();
+
+    @staticmethod
+    def write(file,frames,append=False,dtype='<f4'):
+        """
+        Write frames to a raw file that Recording reads.
+
+        Parameters
+        ----------
+        file : string
+            The raw file.
+        frames : Arraylike<float>
+            Frames in time x rows x cols order.
+        append : boolean, optional
+            Append to the file. The default is False.
+        dtype : numpy.dtype, optional
+            The default is '<f4'.
+
+        Returns
+        -------
+        None.
+
+        """
+        with open(file,'ab' if append else 'wb') as f:
+            np.ascontiguousarray(frames,dtype=dtype).tofile(f);
@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+import numpy as np;
+
+class RingBuffer:
+
+    def __init__(self,length,live=None,dtype=np.float64,shape=()):
+        """
+        A preallocated first-in-first-out buffer with constant time push. It
+        is read newest-first, i.e. item 0 is the most recently pushed value.
+
+        Parameters
+        ----------
+        length : integer
+            The length of the buffer as seen by readers, i.e. len().
+        live : integer, optional
+            The number of most recent values that are actually kept. Slots of
+            the newest-first view beyond this number always read as zero.
+            The default is length.
+        dtype : numpy.dtype, optional
+            Data type of the values. The default is np.float64.
+        shape : tuple, optional
+            Shape of each value. A non-empty shape makes the buffer hold 
+            whole arrays, e.g. pressure frames, with element-wise sum and 
+            mean. The default is (), i.e. scalar values.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.length=length;
+        self.live=length if live is None else live;
+
+        # Storage. Index self._head holds the newest value.
+        self.shape=tuple(shape);
+        self._data=np.zeros((self.live,)+self.shape,dtype=dtype);
+        self._head=0;
+        
+        # Running sum of the live values and a count of the non-zero ones. 
+        # The count lets the sum be exactly zero for an all-zero buffer.
+        self._sum=0.0;
+        self._nonzero=0;
+        if self.shape:
+            self._sum=np.zeros(self.shape);
+            self._nonzero=np.zeros(self.shape,dtype=np.int64);
+
+    def push(self,x):
+        """
+        Push a value into the buffer, evicting the oldest value.
+
+        Parameters
+        ----------
+        x : float|numpy.ndarray
+            The new value.
+
+        Returns
+        -------
+        float|numpy.ndarray
+            The evicted value.
+
+        """
+        head=self._head-1;
+        if(head<0):
+            head=self.live-1;
+
+        if self.shape:
+            return self._pushArray(head,x);
+
+        old=self._data[head];
+        self._data[head]=x;
+        self._head=head;
+        
+        # Update the running sum. It is recomputed once every full turn of 
+        # the buffer so that rounding errors cannot accumulate. An all-zero 
+        # buffer starts its turn again, so that the points of recomputation 
+        # do not depend on how many zeros were pushed into it.
+        self._nonzero=self._nonzero+(x!=0)-(old!=0);
+        if(self._nonzero==0):
+            self._sum=0.0;
+            self._head=0;
+        elif(head==0):
+            self._sum=float(np.sum(self._data));
+        else:
+            self._sum=self._sum+x-old;
+        
+        return old;
+    
+    def _pushArray(self,head,x):
+        """
+        self.push() for buffers of arrays.
+        """
+        old=self._data[head].copy();
+        self._data[head]=x;
+        self._head=head;
+        
+        x=self._data[head];
+        self._nonzero+=(x!=0);
+        self._nonzero-=(old!=0);
+        if(head==0):
+            self._sum=np.sum(self._data,axis=0);
+        else:
+            self._sum+=x;
+            self._sum-=old;
+        self._sum[self._nonzero==0]=0;
+        
+        return old;
+
+    def extend(self,xs):
+        """
+        Push a sequence of values into the buffer, oldest first. Same as 
+        pushing them one by one.
+
+        Parameters
+        ----------
+        xs : Arraylike<float>
+            The values in the order they occured.
+
+        Returns
+        -------
+        None.
+
+        """
+        xs=np.asarray(xs,dtype=self._data.dtype)[::-1][:self.live];
+        m=len(xs);
+        if m==0:
+            return;
+        
+        head=self._head;
+        old=np.concatenate((self._data[head:],self._data[:head]))[:self.live-m];
+        
+        self._data[:m]=xs;
+        self._data[m:]=old;
+        self._head=0;
+        
+        if self.shape:
+            self._nonzero=np.count_nonzero(self._data,axis=0);
+            self._sum=np.sum(self._data,axis=0);
+            self._sum[self._nonzero==0]=0;
+        else:
+            self._nonzero=int(np.count_nonzero(self._data));
+            self._sum=float(np.sum(self._data)) if self._nonzero else 0.0;
+
+    def newest(self):
+        """
+        The most recently pushed value.
+
+        Returns
+        -------
+        float
+            The newest value.
+
+        """
+        return self._data[self._head];
+
+    def sum(self):
+        """
+        Sum of the buffer content.
+
+        Returns
+        -------
+        float|numpy.ndarray
+            The sum.
+
+        """
+        return self._sum;
+    
+    def mean(self):
+        """
+        Mean of the buffer content over len(self) slots.
+
+        Returns
+        -------
+        float|numpy.ndarray
+            The mean.
+
+        """
+        return self._sum/self.length;
+
+    def view(self):
+        """
+        Newest-first copy of the buffer content.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of len(self) values where the first is the newest.
+
+        """
+        head=self._head;
+        v=np.concatenate((self._data[head:],self._data[:head]));
+
+        if(self.live<self.length):
+            v=np.concatenate((v,np.zeros((self.length-self.live,)+self.shape,dtype=v.dtype)));
+
+        return v;
+
+    def clear(self):
+        """
+        Zero the buffer.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._data[:]=0;
+        self._head=0;
+        self._sum=0.0;
+        self._nonzero=0;
+        if self.shape:
+            self._sum=np.zeros(self.shape);
+            self._nonzero=np.zeros(self.shape,dtype=np.int64);
+
+    def getState(self):
+        """
+        Copy of the content of the buffer, for checkpoints @see
+        self.setState().
+
+        Returns
+        -------
+        dict
+            'data', 'head', 'sum' and 'nonzero' as arrays.
+
+        """
+        return {'data':self._data.copy(),'head':np.array(self._head),
+                'sum':np.array(self._sum),'nonzero':np.array(self._nonzero)};
+
+    @staticmethod
+    def getStates(buffers):
+        """
+        self.getState() of many buffers of the same length and shape at
+        once, stacked with a row per buffer.
+
+        Parameters
+        ----------
+        buffers : list<RingBuffer>
+            The buffers.
+
+        Returns
+        -------
+        dict
+            'data', 'head', 'sum' and 'nonzero' as arrays.
+
+        """
+        return {'data':np.array([b._data for b in buffers]),'head':np.array([b._head for b in buffers]),
+                'sum':np.array([b._sum for b in buffers]),'nonzero':np.array([b._nonzero for b in buffers])};
+
+    def setState(self,state):
+        """
+        Restore the content of the buffer from self.getState(). The running
+        sum is restored as it was, so a restored buffer continues exactly as
+        the original.
+
+        Parameters
+        ----------
+        state : dict
+            The state.
+
+        Returns
+        -------
+        None.
+
+        """
+        data=np.asarray(state['data']);
+        if(data.shape!=self._data.shape):
+            raise Exception('Buffer state of shape '+str(data.shape)+' does not fit a buffer of shape '+str(self._data.shape));
+
+        self._data[...]=data;
+        self._head=int(state['head']);
+        if self.shape:
+            self._sum=np.array(state['sum'],dtype=np.float64);
+            self._nonzero=np.array(state['nonzero'],dtype=np.int64);
+        else:
+            self._sum=float(state['sum']);
+            self._nonzero=int(state['nonzero']);
+
+    @staticmethod
+    def setStates(buffers,state):
+        """
+        self.setState() of many buffers of the same length and shape at once
+        from self.getStates(), i.e. with a row per buffer.
+
+        Parameters
+        ----------
+        buffers : list<RingBuffer>
+            The buffers.
+        state : dict
+            'data', 'head', 'sum' and 'nonzero' as stacked arrays.
+
+        Returns
+        -------
+        None.
+
+        """
+        data=np.asarray(state['data']);
+        shape=buffers[0]._data.shape;
+        if(data.shape!=(len(buffers),)+shape):
+            raise Exception('Buffer states of shape '+str(data.shape)+' do not fit '+str(len(buffers))+' buffers of shape '+str(shape));
+
+        heads=np.asarray(state['head']).tolist();
+        if buffers[0].shape:
+            sums=np.asarray(state['sum'],dtype=np.float64);
+            nonzeros=np.asarray(state['nonzero'],dtype=np.int64);
+        else:
+            sums=np.asarray(state['sum'],dtype=np.float64).tolist();
+            nonzeros=np.asarray(state['nonzero'],dtype=np.int64).tolist();
+
+        for b,d,head,total,nonzero in zip(buffers,data,heads,sums,nonzeros):
+            b._data[...]=d;
+            b._head=head;
+            b._sum=total.copy() if b.shape else total;
+            b._nonzero=nonzero.copy() if b.shape else nonzero;
+
+    def __len__(self):
+        return self.length;
+
+    def __getitem__(self,idx):
+        return self.view()[idx];
+
+    def __iter__(self):
+        return iter(self.view());
+
+    def __repr__(self):
+        return 'RingBuffer('+str(self.view())+')';
+
+    def __array__(self,dtype=None,copy=None):
+        v=self.view();
+        if(dtype is not None):
+            v=v.astype(dtype);
+        return v;
+
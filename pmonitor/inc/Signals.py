@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic interface pressure inputs as used by the script_* experiments.
+
+@author: Bethel Osuagwu
+"""
+import numpy as np;
+
+class Signals:
+
+    @staticmethod
+    def impulse(nsteps,amplitude=10):
+        """
+        Impulse input at a quarter of the trace.
+
+        Parameters
+        ----------
+        nsteps : integer
+            Number of samples.
+        amplitude : float, optional
+            Pressure of the impulse in kPa. The default is 10.
+
+        Returns
+        -------
+        numpy.ndarray
+            Pressure trace.
+
+        """
+        Ps=np.zeros(nsteps);
+        Ps[round(nsteps/4)]=amplitude;
+        return Ps;
+
+    @staticmethod
+    def step(nsteps,amplitude=20):
+        """
+        Finite step input from a tenth to 95% of the trace.
+
+        Parameters
+        ----------
+        nsteps : integer
+            Number of samples.
+        amplitude : float, optional
+            Pressure of the step in kPa. The default is 20.
+
+        Returns
+        -------
+        numpy.ndarray
+            Pressure trace.
+
+        """
+        Ps=np.zeros(nsteps);
+        Ps[round(nsteps/10):round(nsteps/4*3.8)]=amplitude;
+        return Ps;
+
+    @staticmethod
+    def sinusoid(nsteps,dt,ifreq=0.00333,amplitude=20):
+        """
+        Half-wave rectified sinusoidal input.
+
+        Parameters
+        ----------
+        nsteps : integer
+            Number of samples.
+        dt : float
+            Sampling time in seconds.
+        ifreq : float, optional
+            Frequency of the input in Hz. The default is 0.00333.
+        amplitude : float, optional
+            Peak pressure in kPa. The default is 20.
+
+        Returns
+        -------
+        numpy.ndarray
+            Pressure trace.
+
+        """
+        Ps=amplitude*np.sin(2*np.pi*ifreq*np.arange(nsteps)*dt);
+        Ps[Ps<0]=0;
+        return Ps;
+
+    @staticmethod
+    def stationary(nsteps,low=20,spread=100,seed=None):
+        """
+        Stationary random input, uniformly distributed in [low,low+spread).
+
+        Parameters
+        ----------
+        nsteps : integer
+            Number of samples.
+        low : float, optional
+            Lowest pressure in kPa. The default is 20.
+        spread : float, optional
+            Range of the pressure in kPa. The default is 100.
+        seed : integer, optional
+            Seed of the random generator. The default is None.
+
+        Returns
+        -------
+        numpy.ndarray
+            Pressure trace.
+
+        """
+        rng=np.random.default_rng(seed);
+        return low+spread*rng.random(nsteps);
+
+    @staticmethod
+    def prolongedStationary(nsteps,dt,low=20,spread=5,relief_after=2*60*60,seed=None):
+        """
+        Stationary random input followed by a pressure relief.
+
+        Parameters
+        ----------
+        nsteps : integer
+            Number of samples.
+        dt : float
+            Sampling time in seconds.
+        low : float, optional
+            Lowest pressure in kPa. The default is 20.
+        spread : float, optional
+            Range of the pressure in kPa. The default is 5.
+        relief_after : float, optional
+            Time in seconds after which the pressure is zero. The default
+            is 2 hours.
+        seed : integer, optional
+            Seed of the random generator. The default is None.
+
+        Returns
+        -------
+        numpy.ndarray
+            Pressure trace.
+
+        """
+        Ps=Signals.stationary(nsteps,low,spread,seed);
+        Ps[np.arange(nsteps)*dt>=relief_after]=0;
+        return Ps;
+
+    @staticmethod
+    def prolongedRepetitive(nsteps,dt,ifreq=1/(30*60),amplitude=20,relief_after=2*60*60):
+        """
+        Repetitive on/off load, i.e. a rectified square wave, followed by a
+        pressure relief.
+
+        Parameters
+        ----------
+        nsteps : integer
+            Number of samples.
+        dt : float
+            Sampling time in seconds.
+        ifreq : float, optional
+            Frequency of the input in Hz. The default is 1/(30*60).
+        amplitude : float, optional
+            Pressure of the load in kPa. The default is 20.
+        relief_after : float, optional
+            Time in seconds after which the pressure is zero. The default
+            is 2 hours.
+
+        Returns
+        -------
+        numpy.ndarray
+            Pressure trace.
+
+        """
+        dtn=np.arange(nsteps)*dt;
+
+        # Square wave with 50% duty cycle, as scipy.signal.square
+        phase=np.mod(2*np.pi*ifreq*dtn,2*np.pi);
+        Ps=np.where(phase<np.pi,amplitude,0.0);
+
+        Ps[dtn>=relief_after]=0;
+        return Ps;
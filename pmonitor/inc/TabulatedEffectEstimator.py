@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Bethel Osuagwu
+"""
+import warnings;
+import numpy as np;
+from .EffectEstimator import EffectEstimator;
+
+class TabulatedEffectEstimator(EffectEstimator):
+
+    # Largest number of grid points when refining to a tolerance.
+    MAX_POINTS=2**20+1;
+
+    def __init__(self,estimator,t,P_max=100,P_min=0,points=1001,tolerance=None,vectorized=None):
+        """
+        Effect estimator that samples a callable estimator once over a
+        pressure grid and then answers q() by linear interpolation from the
+        table. The time of application t is fixed, i.e. a run with a fixed
+        sampling time. Pressures outside the grid and other times are
+        passed to the callable.
+
+        Parameters
+        ----------
+        estimator : callable
+            A collable(P,t) that accepts the pressure(kPa) and time(minutes)
+            @see EffectEstimator.
+        t : float
+            The time of application of pressure in minutes, i.e. dt/60 for
+            the sampling time dt in seconds @see ..bank.Tissue.q().
+        P_max : float, optional
+            Highest pressure of the grid in kPa. The default is 100.
+        P_min : float, optional
+            Lowest pressure of the grid in kPa. The default is 0.
+        points : integer, optional
+            Number of evenly spaced grid points. The default is 1001.
+        tolerance : float, optional
+            Largest acceptable interpolation error of the table, i.e. of the
+            estimate per minute before it is multiplied by the sampling
+            interval in self.q(). The grid is refined until the error
+            estimate self.error is within the tolerance, or self.MAX_POINTS
+            is reached, in which case a RuntimeWarning is issued. The default
+            is None, i.e. no refinement.
+        vectorized : boolean, optional
+            @see EffectEstimator. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        if(not callable(estimator)):
+            raise Exception('Parameter 1 must be a callable estimator');
+        if(not P_max>P_min or points<2):
+            raise Exception('The grid needs P_max>P_min and at least 2 points');
+
+        EffectEstimator.__init__(self,estimator,vectorized=vectorized);
+
+        self.t=t;
+        self.P_min=P_min;
+        self.P_max=P_max;
+
+        self.tabulate(points);
+        while(tolerance is not None and self.error>tolerance and self.points<self.MAX_POINTS):
+            self.tabulate(min(2*self.points-1,self.MAX_POINTS));
+        if(tolerance is not None and self.error>tolerance):
+            warnings.warn('The tolerance '+str(tolerance)+' was not met with '+str(self.points)+' points, the error is '+str(self.error),RuntimeWarning);
+
+    def tabulate(self,points):
+        """
+        Sample the estimator over a grid and estimate the interpolation
+        error.
+
+        The error is reported two ways: self.error is the largest difference
+        between the estimator and the table half way between grid points,
+        and self.error_bound is the bound h^2/8*max|q''| of linear
+        interpolation with the curvature taken from second differences of
+        the table. Both are estimates for a smooth estimator; neither holds
+        for features narrower than the grid spacing.
+
+        Parameters
+        ----------
+        points : integer
+            Number of evenly spaced grid points.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.points=points;
+        self.P=np.linspace(self.P_min,self.P_max,points);
+        self.h=self.P[1]-self.P[0];
+        self.table=self._estimate(self.P);
+
+        # Scalar lookups are quicker on lists than on arrays.
+        self._table=self.table.tolist();
+
+        # Error half way between the grid points
+        mid=self.P[:-1]+self.h/2;
+        self.error=float(np.max(np.abs(self._estimate(mid)-np.interp(mid,self.P,self.table))));
+
+        # Bound from the curvature
+        curvature=np.abs(np.diff(self.table,2)) if points>2 else np.zeros(1);
+        self.error_bound=float(np.max(curvature)/8);
+
+    def _estimate(self,P):
+        """
+        Evaluate the callable estimator at the fixed time for an array of
+        pressures.
+        """
+        if self.vectorized:
+            return np.asarray(self.estimator(P,self.t),dtype=np.float64)*np.ones(len(P));
+        return np.vectorize(self.estimator,otypes=[np.float64])(P,self.t);
+
+    def q(self,P,t,samplingInterval=None):
+        """
+        The effect estimator @see EffectEstimator.q(). Within the grid and at
+        the tabulated time the estimate is interpolated from the table.
+
+        """
+        if(np.ndim(P) or np.ndim(t) or np.ndim(samplingInterval)):
+            return self._qArray(P,t,samplingInterval);
+
+        if(t!=self.t or not (self.P_min<=P<=self.P_max)):
+            return EffectEstimator.q(self,P,t,samplingInterval);
+
+        # Set the default for t.
+        samplingInterval=samplingInterval or t;
+
+        # Linear interpolation on the even grid
+        x=(P-self.P_min)/self.h;
+        i=min(int(x),self.points-2);
+        a=self._table[i];
+        q_e=a+(self._table[i+1]-a)*(x-i);
+
+        return q_e*samplingInterval;
+
+    def _qArray(self,P,t,samplingInterval=None):
+        """
+        Array version of self.q().
+
+        """
+        if(np.ndim(t) or t!=self.t):
+            return EffectEstimator._qArray(self,P,t,samplingInterval);
+
+        P=np.asarray(P,dtype=np.float64);
+
+        # Set the default for t.
+        if samplingInterval is None:
+            samplingInterval=t;
+        else:
+            samplingInterval=np.asarray(samplingInterval,dtype=np.float64);
+            samplingInterval=np.where(samplingInterval==0,t,samplingInterval);
+
+        q_e=np.interp(P,self.P,self.table);
+
+        # Pressures off the grid
+        off=(P<self.P_min)|(P>self.P_max);
+        if np.any(off):
+            q_e[off]=self._estimate(P[off]);
+
+        return q_e*samplingInterval;
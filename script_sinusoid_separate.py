@@ -10,6 +10,7 @@ from pmonitor.bank.TissueAveraging import TissueAveraging;
 from pmonitor.inc.PressureTimeThreshold import PressureTimeThreshold;
 from pmonitor.inc.EffectEstimator import EffectEstimator;
 from pmonitor.inc.Helpers import Helpers;
+from pmonitor.inc.Recorder import Recorder;
 
 
 
@@ -47,12 +48,8 @@ for n in range(0,nsteps):
 
 Ps[Ps<0]=0;# Remove zeros
 
-# Define vers for collecting state data
-data_tissue_fixed_h=[];
-data_tissue_inverse_h=[];
-data_tissue_continuous_h=[];
-data_tissue_linear_h=[];
-data_tissue_avg_h=[];
+# Recorder for collecting state data
+recorder=Recorder([tissueFixed,tissueInverse,tissueContinuous,tissueLinear,tissueAvg],dt,fields=('health',));
 
 # Run simulation
 for n in range(0,nsteps):
@@ -72,13 +69,17 @@ for n in range(0,nsteps):
     tissueAvg.step(dt);
     
     # Record state data
-    data_tissue_fixed_h.append(tissueFixed.health(dt));
-    data_tissue_inverse_h.append(tissueInverse.health(dt));
-    data_tissue_continuous_h.append(tissueContinuous.health(dt));
-    data_tissue_linear_h.append(tissueLinear.health(dt));
-    data_tissue_avg_h.append(tissueAvg.health(dt));
+    recorder.record();
 
 
+# Collected state data, one column per tissue
+health=recorder.column('health');
+data_tissue_fixed_h=health[:,0];
+data_tissue_inverse_h=health[:,1];
+data_tissue_continuous_h=health[:,2];
+data_tissue_linear_h=health[:,3];
+data_tissue_avg_h=health[:,4];
+
 # Plot results
 # Apply some scalling
 data_tissue_fixed_h=np.array(data_tissue_fixed_h)*1000;
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import os;
+import unittest;
+import tempfile;
+import numpy as np;
+from pmonitor.bank.Tissue import Tissue;
+from pmonitor.bank.TissueFixed import TissueFixed;
+from pmonitor.bank.TissueInverse import TissueInverse;
+from pmonitor.bank.TissueContinuous import TissueContinuous;
+from pmonitor.bank.TissueLinear import TissueLinear;
+from pmonitor.bank.TissueAveraging import TissueAveraging;
+from pmonitor.bank.TissueBinned import TissueBinned;
+from pmonitor.bank.TissueSpecial import TissueSpecial;
+from pmonitor.bank.TissueArray import TissueArray;
+from pmonitor.inc.PressureTimeThreshold import PressureTimeThreshold;
+from pmonitor.inc.EffectEstimator import EffectEstimator;
+from pmonitor.inc.Checkpoint import Checkpoint;
+
+dt=1;
+
+def tissues():
+    """
+    Two tissues of each class and a TissueArray of each method.
+    """
+    ptt=PressureTimeThreshold();
+    ee=EffectEstimator();
+    out=[];
+    for i in range(2):
+        out+=[Tissue('a'+str(i),ptt,ee,0.1,0.1,0.1,1,1,1),
+              TissueFixed('b'+str(i),ptt,ee,1,1,1),
+              TissueInverse('c'+str(i),ptt,ee,1,1,1),
+              TissueContinuous('d'+str(i),ptt,ee,0.1,0.1,0.1,1,1,1),
+              TissueLinear('e'+str(i),ptt,ee,0.01,0.01,0.01,1,1,1),
+              TissueAveraging('f'+str(i),ptt,ee,5,5,5,1,1,1),
+              TissueBinned('g'+str(i),ptt,ee,0.1,0.1,0.1,1,1,1),
+              TissueSpecial('h'+str(i),ptt,ee,0.1,0.1,0.1,1,0,1)];
+    for method in TissueArray.METHODS:
+        out.append(TissueArray(method,(2,3),ptt,ee,method,0.1,0.1,0.1,1,1,1));
+    return out;
+
+def run(tissues,P):
+    """
+    Step all tissues through a trace, returning the health after each sample.
+    """
+    out=[];
+    for p in P:
+        for n,t in enumerate(tissues):
+            t.setP(np.full(t.shape,p+n%3) if isinstance(t,TissueArray) else p+n%3);
+        for n,t in enumerate(tissues):
+            if(isinstance(t,TissueArray)):
+                t.step(dt);
+            else:
+                t.step(dt,[tissues[n-1]] if n else []);
+        out.append(np.concatenate([np.ravel(t.health(dt)) for t in tissues]));
+    return np.array(out,dtype=float);
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        P=np.clip(np.random.default_rng(0).normal(8,6,120),0,None);
+        P[40:60]=0;
+        self.P=P;
+        self.expected=run(tissues(),P);
+
+    def testRestore(self):
+        T=tissues();
+        run(T,self.P[:70]);
+        snapshot=Checkpoint.capture(T);
+        restored=tissues();
+        Checkpoint.restore(snapshot,restored);
+        np.testing.assert_array_equal(run(restored,self.P[70:]),self.expected[70:]);
+
+    def testLoadLatest(self):
+        directory=tempfile.mkdtemp();
+        T=tissues();
+        checkpoint=Checkpoint(T,directory,interval=None,full_every=3,keep=2);
+        for n in range(0,70,10):
+            run(T,self.P[n:n+10]);
+            checkpoint.checkpoint();
+            checkpoint.flush();
+        checkpoint.close(final=False);
+        self.assertEqual([f[1] for f in Checkpoint.files(directory)],[True,False,False,True]); # The last keep=2 full snapshots
+        
+        restored=tissues();
+        self.assertEqual(Checkpoint.loadLatest(directory,restored),6);
+        np.testing.assert_array_equal(run(restored,self.P[70:]),self.expected[70:]);
+
+    def testOtherTissues(self):
+        snapshot=Checkpoint.capture(tissues());
+        with self.assertRaises(Exception):
+            Checkpoint.restore(snapshot,tissues()[1:]);
+
+if __name__=='__main__':
+    unittest.main();
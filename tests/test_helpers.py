@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import unittest;
+import numpy as np;
+from pmonitor.inc.Helpers import Helpers;
+from pmonitor.inc.RingBuffer import RingBuffer;
+
+def sequence(N,seed=0):
+    """
+    Random samples with runs of zeros.
+    """
+    rng=np.random.default_rng(seed);
+    x=rng.uniform(-1,3,N);
+    x[np.repeat(rng.random(N//20+1)<0.4,20)[:N]]=0;
+    return x;
+
+class TestHelpers(unittest.TestCase):
+
+    def testRecurrence(self):
+        """
+        The scan matches the loop, for scalar and per sample coefficients
+        with zeros among them.
+        """
+        b=sequence(1000);
+        for a in (0.9,np.where(sequence(1000,1)>0,0.95,0.0)):
+            A=np.broadcast_to(a,b.shape);
+            y=[];
+            y0=2.5;
+            for n in range(len(b)):
+                y0=A[n]*y0+b[n];
+                y.append(y0);
+            np.testing.assert_allclose(Helpers.recurrence(a,b,2.5),y,rtol=1e-12,atol=1e-12);
+        self.assertEqual(len(Helpers.recurrence(0.5,[],1)),0);
+
+    def testRecurrencePower(self):
+        for a in (0.9,1.0):
+            y=1.5;
+            for n in range(37):
+                y=a*y+0.25;
+            self.assertAlmostEqual(Helpers.recurrencePower(a,0.25,1.5,37),y,places=12);
+
+    def testLindley(self):
+        x=sequence(1000);
+        y=[];
+        y0=0.5;
+        for v in x:
+            y0=max(y0+v,0);
+            y.append(y0);
+        np.testing.assert_allclose(Helpers.lindley(x,0.5),y,rtol=1e-12,atol=1e-12);
+
+    def testRollingMean(self):
+        """
+        The means match those of a RingBuffer, continued from its content.
+        """
+        x=np.abs(sequence(10000));
+        for length,live in ((1,1),(50,49),(7,None)):
+            buffer=RingBuffer(length,live);
+            buffer.extend(x[:100]);
+            initial=buffer.view();
+            means=[];
+            for v in x[100:]:
+                buffer.push(v);
+                means.append(buffer.mean());
+            y=Helpers.rollingMean(x[100:],length,live,initial);
+            np.testing.assert_allclose(y,means,rtol=1e-10,atol=1e-12);
+            self.assertTrue(np.array_equal(y==0,np.array(means)==0));
+
+    def testResetCumsum(self):
+        x=sequence(1000);
+        reset=sequence(1000,1)==0;
+        y=[];
+        s=1.5;
+        for v,r in zip(x,reset):
+            s=0.0 if r else s+v;
+            y.append(s);
+        np.testing.assert_array_equal(Helpers.resetCumsum(x,reset,1.5),y);
+
+    def testRunLength(self):
+        mask=sequence(1000)!=0;
+        mask[:5]=True;
+        y=[];
+        c=3;
+        for m in mask:
+            c=c+1 if m else 0;
+            y.append(c);
+        np.testing.assert_array_equal(Helpers.runLength(mask,3),y);
+
+if __name__=='__main__':
+    unittest.main();
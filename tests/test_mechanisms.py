@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+import unittest;
+import numpy as np;
+from pmonitor.bank.Tissue import Tissue;
+from pmonitor.bank.TissueFixed import TissueFixed;
+from pmonitor.bank.TissueInverse import TissueInverse;
+from pmonitor.bank.TissueContinuous import TissueContinuous;
+from pmonitor.bank.TissueLinear import TissueLinear;
+from pmonitor.bank.TissueAveraging import TissueAveraging;
+from pmonitor.bank.TissueBinned import TissueBinned;
+from pmonitor.bank.TissueSpecial import TissueSpecial;
+from pmonitor.inc.PressureTimeThreshold import PressureTimeThreshold;
+from pmonitor.inc.EffectEstimator import EffectEstimator;
+from pmonitor.inc.Helpers import Helpers;
+
+dt=0.1;
+
+def tissues():
+    """
+    One tissue of each class, with all mechanisms contributing.
+    """
+    ptt=PressureTimeThreshold();
+    ee=EffectEstimator();
+    b=Helpers.beta(30,dt);
+    lb=Helpers.linearBeta(30,dt);
+    return [Tissue('t',ptt,ee,b,b,b,0.5,0.3,0.2),
+            TissueFixed('t',ptt,ee,0.5,0.3,0.2,reliefTimeThreshold=2),
+            TissueInverse('t',ptt,ee,0.5,0.3,0.2),
+            TissueContinuous('t',ptt,ee,b,b,b,0.5,0.3,0.2),
+            TissueLinear('t',ptt,ee,lb,lb,lb,0.5,0.3,0.2),
+            TissueAveraging('t',ptt,ee,50,70,30,0.5,0.3,0.2),
+            TissueBinned('t',ptt,ee,b,b,b,0.5,0.3,0.2),
+            TissueSpecial('t',ptt,ee,b,b,b,0.5,0.3,0.2)];
+
+def pressure(N):
+    """
+    Loads of random length and magnitude separated by reliefs.
+    """
+    rng=np.random.default_rng(0);
+    on=np.repeat(rng.random(N//50)<0.6,50);
+    return np.where(on,5+40*rng.random(len(on)),0.0);
+
+class TestMechanisms(unittest.TestCase):
+
+    # k of each mechanism in each part of the run
+    K=[(0.5,0.3,0.2),(0,0.3,0),(0,0,0),(0.5,0.3,0.2)];
+
+    def setK(self,tissue,k):
+        tissue.k_iri,tissue.k_dpi,tissue.k_gi=k;
+
+    def testZeroKMidRunStep(self):
+        P=pressure(4000);
+        Pn=np.roll(P,-7)/2;
+        for a,b,na,nb in zip(tissues(),tissues(),tissues(),tissues()):
+            # The baseline computes all mechanisms whatever their k.
+            b.setMechanisms(Tissue.MECHANISMS);
+            
+            ha=[];
+            hb=[];
+            for n in range(len(P)):
+                if(n%1000==0):
+                    self.setK(a,self.K[n//1000]);
+                    self.setK(b,self.K[n//1000]);
+                for T,nbr,H in ((a,na,ha),(b,nb,hb)):
+                    T.setP(P[n]);
+                    nbr.setP(Pn[n]);
+                    T.step(dt,[nbr]);
+                    H.append([T.healthIri(),T.healthDpi(),T.healthGi()]);
+            
+            np.testing.assert_array_equal(np.array(ha,dtype=float),np.array(hb,dtype=float),err_msg=type(a).__name__);
+
+    def testZeroKMidRunSimulate(self):
+        P=pressure(4000);
+        Pn=np.roll(P,-7)[None]/2;
+        for a,b in zip(tissues(),tissues()):
+            b.setMechanisms(Tissue.MECHANISMS);
+            
+            for n in range(0,len(P),1000):
+                self.setK(a,self.K[n//1000]);
+                self.setK(b,self.K[n//1000]);
+                ra=a.simulate(P[n:n+1000],dt,Pn[:,n:n+1000]);
+                rb=b.simulate(P[n:n+1000],dt,Pn[:,n:n+1000]);
+                for key in ('iri','dpi','gi'):
+                    np.testing.assert_array_equal(ra[key],rb[key],err_msg=type(a).__name__+' '+key);
+
+    def testAtRestSkipped(self):
+        tissue=tissues()[1];
+        tissue.setP(40);
+        for n in range(100):
+            tissue.step(dt);
+        
+        # Relieved to zero with k=0, after which iri is no longer computed.
+        tissue.k_iri=0;
+        self.assertGreater(tissue.iri,0);
+        self.assertIn('iri',tissue.mechanisms);
+        tissue.setP(0);
+        for n in range(100):
+            tissue.step(dt);
+        self.assertEqual(tissue.iri,0);
+        self.assertNotIn('iri',tissue.mechanisms);
+
+    def testRestingReliefCounter(self):
+        P=pressure(2000);
+        Pn=np.roll(P,-7)/2;
+        for i in (1,2):
+            # TissueFixed and TissueInverse, with the default k_gi=0
+            a,b,na,nb=[tissues()[i] for j in range(4)];
+            a.k_gi=0;
+            b.k_gi=0;
+            b.setMechanisms(Tissue.MECHANISMS);
+            self.assertNotIn('gi',a.mechanisms);
+            
+            # Only the relief counter of gi is kept.
+            for n in range(len(P)):
+                for T,nbr in ((a,na),(b,nb)):
+                    T.setP(P[n]);
+                    nbr.setP(Pn[n]);
+                    T.step(dt,[nbr]);
+                self.assertEqual(a.reliefCounterGi,b.reliefCounterGi);
+            self.assertEqual(a.gi,0);
+            self.assertNotIn('gi',a.mechanisms);
+
+if __name__=='__main__':
+    unittest.main();
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+import unittest;
+import asyncio;
+import numpy as np;
+from pmonitor.inc.MonitorService import MonitorService;
+from pmonitor.bank.TissueArray import TissueArray;
+from pmonitor.inc.PressureTimeThreshold import PressureTimeThreshold;
+from pmonitor.inc.EffectEstimator import EffectEstimator;
+from pmonitor.inc.Helpers import Helpers;
+
+dt=0.1;
+
+def tissues():
+    b=Helpers.beta(300,dt);
+    return TissueArray('t',(4,4),PressureTimeThreshold(),EffectEstimator(),'exponential',b,b,b);
+
+class Failing:
+    """
+    Tissues whose step fails for a negative pressure.
+    """
+    P=0.0;
+
+    def setP(self,P):
+        self.P=P;
+
+    def step(self,dt):
+        if(self.P<0):
+            raise ValueError('Negative pressure');
+
+    def health(self,dt):
+        return self.P;
+
+class TestMonitorService(unittest.TestCase):
+
+    def setUp(self):
+        self.loop=asyncio.new_event_loop();
+
+    def tearDown(self):
+        self.loop.close();
+
+    def testMatchesStepping(self):
+        frames=np.random.default_rng(0).random((50,4,4))*80;
+        expected=tissues();
+        for frame in frames:
+            expected.setP(frame);
+            expected.step(dt);
+
+        async def main():
+            service=MonitorService(queue_size=4);
+            service.addPatient('a',tissues(),dt);
+            async with service:
+                self.assertEqual(await service.replay('a',frames),len(frames));
+                await service.join();
+            return service;
+        service=self.loop.run_until_complete(main());
+        np.testing.assert_array_equal(service.patients['a']['tissues'].dpi,expected.dpi);
+        self.assertEqual(service.stats('a')['frames'],len(frames));
+
+    def testBadFrames(self):
+        async def main():
+            service=MonitorService();
+            service.addPatient('a',tissues(),dt);
+            service.addPatient('b',Failing(),dt);
+            events=service.subscribe();
+            async with service:
+                self.assertFalse(await service.submit('a',0,np.zeros((3,3))));
+                self.assertFalse(service.submitNowait('a',0,np.zeros(5)));
+                for P in (1.0,-1.0,2.0):
+                    self.assertTrue(await service.submit('b',0,P));
+                await asyncio.wait_for(service.join(),5);
+            return service,[events.get_nowait()['type'] for i in range(events.qsize())];
+        service,types=self.loop.run_until_complete(main());
+        self.assertEqual(service.stats('a')['rejected'],2);
+        self.assertEqual(service.stats('b')['errors'],1);
+        self.assertEqual(service.stats('b')['frames'],2);
+        self.assertEqual(types,['health','error','health']);
+
+    def testAlertsKept(self):
+        async def main():
+            service=MonitorService();
+            service.addPatient('a',tissues(),dt,threshold=0.0);
+            events=service.subscribe(4);
+            async with service:
+                await service.replay('a',np.full((20,4,4),80.0));
+                await service.join();
+            return service,events,[events.get_nowait()['type'] for i in range(events.qsize())];
+        service,events,types=self.loop.run_until_complete(main());
+        self.assertIn('relief',types);
+        self.assertEqual(len(types),4);
+        self.assertEqual(service.dropped(events),17); # 20 health events and the alert
+
+    def testStopReleasesProducers(self):
+        async def main():
+            service=MonitorService(queue_size=2);
+            service.addPatient('a',tissues(),dt);
+            await service.start();
+            await service._cancel(service.patients['a']); # Nothing steps the frames
+            pending=[asyncio.ensure_future(service.submit('a',n,np.ones(16))) for n in range(6)];
+            await asyncio.sleep(0.01);
+            join=asyncio.ensure_future(service.join());
+            await service.stop();
+            results=await asyncio.wait_for(asyncio.gather(*pending),5);
+            await asyncio.wait_for(join,5);
+            return service,results;
+        service,results=self.loop.run_until_complete(main());
+        self.assertEqual(results,[True,True,False,False,False,False]);
+        self.assertEqual(service.stats('a')['queued'],0);
+        self.assertFalse(self.loop.run_until_complete(service.submit('a',0,np.ones(16))));
+
+    def testRemoveReleasesProducers(self):
+        async def main():
+            service=MonitorService(queue_size=2);
+            service.addPatient('a',tissues(),dt);
+            async with service:
+                await service._cancel(service.patients['a']);
+                pending=[asyncio.ensure_future(service.submit('a',n,np.ones(16))) for n in range(6)];
+                await asyncio.sleep(0.01);
+                await service.removePatient('a');
+                return await asyncio.wait_for(asyncio.gather(*pending),5);
+        results=self.loop.run_until_complete(main());
+        self.assertEqual(results,[True,True,False,False,False,False]);
+
+if __name__=='__main__':
+    unittest.main();
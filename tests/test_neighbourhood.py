@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import unittest;
+import numpy as np;
+from pmonitor.bank.TissueContinuous import TissueContinuous;
+from pmonitor.inc.PressureTimeThreshold import PressureTimeThreshold;
+from pmonitor.inc.EffectEstimator import EffectEstimator;
+from pmonitor.inc.Neighbourhood import Neighbourhood;
+
+def gridLists(shape,connectivity):
+    """
+    Neighbour lists of the cells of a grid.
+    """
+    rows,cols=shape;
+    out=[];
+    for i in range(rows):
+        for j in range(cols):
+            nb=[];
+            for r in range(max(i-1,0),min(i+2,rows)):
+                for c in range(max(j-1,0),min(j+2,cols)):
+                    if((r,c)!=(i,j) and (connectivity==8 or r==i or c==j)):
+                        nb.append(r*cols+c);
+            out.append(nb);
+    return out;
+
+class TestNeighbourhood(unittest.TestCase):
+
+    def testLayout(self):
+        """
+        The layout matches the dense adjacency of the distances, in order.
+        """
+        rng=np.random.default_rng(0);
+        for n,d,radius in [(1,2,1.0),(50,2,0.3),(200,1,0.05),(300,3,0.2),(100,2,0.0),(100,2,5.0),(0,2,1.0)]:
+            positions=rng.random((n,d));
+            if(n>=20):
+                # Coinciding sensors
+                positions[:10]=positions[10:20];
+            a=Neighbourhood.layout(positions,radius);
+            D=np.sqrt(np.sum((positions[:,None,:]-positions[None,:,:])**2,axis=2));
+            np.fill_diagonal(D,np.inf);
+            b=Neighbourhood.adjacency(D<=radius);
+            self.assertEqual(a.size,b.size);
+            np.testing.assert_array_equal(a.i,b.i);
+            np.testing.assert_array_equal(a.j,b.j);
+
+    def testGrid(self):
+        """
+        Grid gradients match those of neighbour lists.
+        """
+        P=np.random.default_rng(1).uniform(0,50,(5,7));
+        for connectivity in (4,8):
+            a=Neighbourhood.grid(P.shape,connectivity);
+            b=Neighbourhood.lists(gridLists(P.shape,connectivity));
+            np.testing.assert_allclose(a.gradient(P),b.gradient(P.ravel()).reshape(P.shape),rtol=1e-12);
+
+    def testApply(self):
+        """
+        Stepping after apply() matches stepping with the neighbour lists.
+        """
+        ptt=PressureTimeThreshold();
+        ee=EffectEstimator();
+        shape=(3,4);
+        lists=gridLists(shape,8);
+        nbh=Neighbourhood.grid(shape);
+        a=[TissueContinuous('a',ptt,ee,0.1,0.1,0.1,0.5,0.3,0.2) for nb in lists];
+        b=[TissueContinuous('b',ptt,ee,0.1,0.1,0.1,0.5,0.3,0.2) for nb in lists];
+        P=np.random.default_rng(2).uniform(0,50,(200,len(lists)));
+        for n in range(len(P)):
+            for Ta,Tb,p in zip(a,b,P[n]):
+                Ta.setP(p);
+                Tb.setP(p);
+            nbh.apply(a);
+            for Ta,Tb,nb in zip(a,b,lists):
+                Ta.step(1);
+                Tb.step(1,[b[m] for m in nb]);
+            np.testing.assert_allclose([T.health(1) for T in a],[T.health(1) for T in b],rtol=1e-12,atol=0);
+
+if __name__=='__main__':
+    unittest.main();
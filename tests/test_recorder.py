@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import shutil;
+import unittest;
+import tempfile;
+import numpy as np;
+from pmonitor.bank.Tissue import Tissue;
+from pmonitor.bank.TissueFixed import TissueFixed;
+from pmonitor.bank.TissueBinned import TissueBinned;
+from pmonitor.bank.TissueArray import TissueArray;
+from pmonitor.inc.PressureTimeThreshold import PressureTimeThreshold;
+from pmonitor.inc.EffectEstimator import EffectEstimator;
+from pmonitor.inc.Recorder import Recorder;
+
+dt=0.5;
+
+def tissues():
+    ptt=PressureTimeThreshold();
+    ee=EffectEstimator();
+    return {'a':Tissue('a',ptt,ee,0.1,0.1,0.1,1,1,1),
+            'b':TissueBinned('b',ptt,ee,0.1,0.1,0.1,1,1,1),
+            'c':TissueFixed('c',ptt,ee,1,1,1),
+            'm':TissueArray('m',(2,3),ptt,ee,'exponential',0.1,0.1,0.1,1,1,1)};
+
+def values(T):
+    """
+    Every field of the tissues, a column per cell.
+    """
+    return {'P':np.hstack([np.ravel(t.P) for t in T]),
+            'iri':np.hstack([np.ravel(t.healthIri()) for t in T]),
+            'dpi':np.hstack([np.ravel(t.healthDpi()) for t in T]),
+            'gi':np.hstack([np.ravel(t.healthGi()) for t in T]),
+            'health':np.hstack([np.ravel(t.health(dt)) for t in T]),
+            'reliefCounter':np.hstack([np.ravel(t.reliefCounter) for t in T])};
+
+class TestRecorder(unittest.TestCase):
+
+    def setUp(self):
+        self.dir=tempfile.mkdtemp();
+
+    def tearDown(self):
+        shutil.rmtree(self.dir);
+
+    def testRecord(self):
+        """
+        Recorded columns match the values of the tissues, in memory and on
+        disk, and after reopening.
+        """
+        P=np.clip(np.random.default_rng(0).normal(8,6,(500,6)),0,None);
+        fields=tuple(Recorder.FIELDS);
+        for format in ('npy','npz'):
+            for directory in (None,self.dir+'/'+format):
+                T=tissues();
+                recorder=Recorder(T,dt,fields,decimation=3,chunk_size=64,directory=directory,format=format);
+                expected=[];
+                for n,p in enumerate(P):
+                    for code,t in T.items():
+                        t.setP(p.reshape(2,3) if code=='m' else p[0]);
+                        t.step(dt);
+                    recorder.record();
+                    if(n%3==0):
+                        expected.append(values(T.values()));
+                recorder.close();
+                readers=[recorder]+([Recorder.open(directory)] if directory else []);
+                for r in readers:
+                    self.assertEqual(len(r),len(expected));
+                    for field in fields:
+                        np.testing.assert_array_equal(r.column(field),[e[field] for e in expected]);
+                    np.testing.assert_array_equal(r.column('sample'),np.arange(0,len(P),3));
+                    np.testing.assert_allclose(r.time(0,3),[0,1.5,3]);
+                    np.testing.assert_array_equal(r.column('health',100,130,r.cells('m')),[e['health'][3:] for e in expected[100:130]]);
+
+if __name__=='__main__':
+    unittest.main();
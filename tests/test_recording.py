@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import os;
+import shutil;
+import unittest;
+import tempfile;
+import numpy as np;
+from pmonitor.bank.Tissue import Tissue;
+from pmonitor.bank.TissueArray import TissueArray;
+from pmonitor.inc.PressureTimeThreshold import PressureTimeThreshold;
+from pmonitor.inc.EffectEstimator import EffectEstimator;
+from pmonitor.inc.Recording import Recording;
+
+class TestRecording(unittest.TestCase):
+
+    def setUp(self):
+        self.dir=tempfile.mkdtemp();
+        self.file=os.path.join(self.dir,'r.raw');
+        self.frames=np.random.default_rng(1).uniform(0,30,(100,4,5)).astype('<f4');
+        Recording.write(self.file,self.frames[:60]);
+        Recording.write(self.file,self.frames[60:],append=True);
+
+        # A partly written frame
+        with open(self.file,'ab') as f:
+            f.write(bytes(10));
+        self.recording=Recording(self.file,4,5,0.5,t0=10);
+
+    def tearDown(self):
+        self.recording.close();
+        shutil.rmtree(self.dir);
+
+    def testRead(self):
+        """
+        Windows, times, reads and chunks give the frames written.
+        """
+        r=self.recording;
+        F=self.frames;
+        self.assertEqual((len(r),r.shape,r.duration),(100,(100,4,5),50.0));
+        self.assertTrue(np.shares_memory(r.window(5,9),r.data));
+        np.testing.assert_array_equal(r.window(5,9),F[5:9]);
+        self.assertEqual([r.index(t) for t in (9,10,10.5,10.7,10+0.1*3,10+0.5*99,1e9)],[0,0,1,1,0,99,100]);
+        self.assertEqual(r.index(10+0.5*37*(1+1e-12)),37);
+        start,frames=r.between(12,13);
+        self.assertEqual(start,4);
+        np.testing.assert_array_equal(frames,F[4:6]);
+        r.seek(20);
+        np.testing.assert_array_equal(r.read(3),F[20:23]);
+        self.assertEqual(r.position,23);
+        r.position=98;
+        np.testing.assert_array_equal(r.read(3),F[98:]);
+        np.testing.assert_array_equal(np.concatenate([c for s,c in r.chunks(16,10,90)]),F[10:90]);
+        self.assertEqual([s for s,c in r.chunks(16,10,90)],list(range(10,90,16)));
+        np.testing.assert_array_equal(np.array(list(r.select([0,3],[1,4]))),F[:,[0,3]][:,:,[1,4]]);
+
+    def testTimestamps(self):
+        t=np.cumsum(np.random.default_rng(2).uniform(0.4,0.6,100));
+        r=Recording(self.file,4,5,0.5,timestamps=t);
+        self.assertEqual([r.index(x) for x in (t[50],t[50]-1e-6,0,t[-1]+1)],[50,49,0,100]);
+        self.assertEqual(r.time(5),t[5]);
+
+    def testReplay(self):
+        """
+        Stepping the frames read and simulating chunks of a trace match
+        stepping the frames written.
+        """
+        ptt=PressureTimeThreshold();
+        ee=EffectEstimator();
+        a=TissueArray('a',(4,5),ptt,ee,'exponential',0.1,0.1,0.1,1,1,1);
+        b=TissueArray('b',(4,5),ptt,ee,'exponential',0.1,0.1,0.1,1,1,1);
+        for frame in self.recording:
+            a.setP(frame);
+            a.step(0.5);
+        for frame in self.frames:
+            b.setP(frame);
+            b.step(0.5);
+        np.testing.assert_array_equal(a.health(0.5),b.health(0.5));
+        a=Tissue('a',ptt,ee,0.1,0.1,0.1,1,1,1);
+        b=Tissue('b',ptt,ee,0.1,0.1,0.1,1,1,1);
+        health=np.concatenate([a.simulate(c[:,2,3],0.5)['health'] for s,c in self.recording.chunks(30)]);
+        np.testing.assert_allclose(health,b.simulate(self.recording.trace(2,3),0.5)['health'],rtol=1e-12,atol=0);
+
+    def testSelectInteger(self):
+        """
+        Integer rows and columns keep their axis.
+        """
+        F=self.frames;
+        for rows,cols,expected in [(1,slice(None),F[:,1:2,:]),
+                                   (slice(None),-1,F[:,:,4:]),
+                                   (-1,[0,3],F[:,3:4][:,:,[0,3]]),
+                                   ([0,2],-2,F[:,[0,2],3:4]),
+                                   (2,3,F[:,2:3,3:4])]:
+            q=self.recording.select(rows,cols);
+            self.assertEqual(q.shape,expected.shape);
+            np.testing.assert_array_equal(q.window(0,len(q)),expected);
+            np.testing.assert_array_equal(q.trace(0,0),expected[:,0,0]);
+        q=self.recording.select(1);
+        self.assertTrue(np.shares_memory(q.window(0,3),self.recording.data));
+        np.testing.assert_array_equal(q.read(1)[0],F[0,1:2]);
+
+if __name__=='__main__':
+    unittest.main();
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+import unittest;
+import numpy as np;
+from pmonitor.bank.Tissue import Tissue;
+from pmonitor.bank.TissueFixed import TissueFixed;
+from pmonitor.bank.TissueInverse import TissueInverse;
+from pmonitor.bank.TissueContinuous import TissueContinuous;
+from pmonitor.bank.TissueLinear import TissueLinear;
+from pmonitor.bank.TissueAveraging import TissueAveraging;
+from pmonitor.bank.TissueBinned import TissueBinned;
+from pmonitor.bank.TissueSpecial import TissueSpecial;
+from pmonitor.inc.PressureTimeThreshold import PressureTimeThreshold;
+from pmonitor.inc.EffectEstimator import EffectEstimator;
+from pmonitor.inc.Helpers import Helpers;
+
+dt=0.1;
+
+def tissues():
+    """
+    Tissue factories, with all mechanisms contributing.
+    """
+    ptt=PressureTimeThreshold();
+    ee=EffectEstimator();
+    b=Helpers.beta(30,dt);
+    lb=Helpers.linearBeta(30,dt);
+    return {'Tissue':lambda:Tissue('t',ptt,ee,b,b,b,0.5,0.3,0.2),
+            'TissueFixed':lambda:TissueFixed('t',ptt,ee,0.5,0.3,0.2,reliefTimeThreshold=2),
+            'TissueInverse':lambda:TissueInverse('t',ptt,ee,0.5,0.3,0.2),
+            'TissueContinuous':lambda:TissueContinuous('t',ptt,ee,b,b,b,0.5,0.3,0.2),
+            'TissueLinear':lambda:TissueLinear('t',ptt,ee,lb,lb,lb,0.5,0.3,0.2),
+            'TissueAveraging':lambda:TissueAveraging('t',ptt,ee,50,70,30,0.5,0.3,0.2),
+            'TissueBinned':lambda:TissueBinned('t',ptt,ee,b,b,b,0.5,0.3,0.2),
+            'TissueSpecial':lambda:TissueSpecial('t',ptt,ee,b,b,b,0.5,0.3,0.2)};
+
+def pressure(N,seed=0):
+    """
+    Loads of random length and magnitude separated by reliefs.
+    """
+    rng=np.random.default_rng(seed);
+    on=np.repeat(rng.random(N//50+1)<0.6,50)[:N];
+    return np.where(on,5+40*rng.random(N),0.0);
+
+def neighbours(Pn):
+    """
+    Neighbouring tissues for the neighbour traces.
+    """
+    ptt=PressureTimeThreshold();
+    ee=EffectEstimator();
+    return [TissueContinuous('n',ptt,ee) for p in Pn];
+
+def health(tissue):
+    return [tissue.healthIri(),tissue.healthDpi(),tissue.healthGi(),tissue.health(dt)];
+
+def step(tissue,P,Pn):
+    """
+    Health of each mechanism after each sample, by stepping with neighbours
+    that take the neighbour traces.
+    """
+    Ts=neighbours(Pn);
+    out=[];
+    for n in range(len(P)):
+        tissue.setP(P[n]);
+        for T,p in zip(Ts,Pn):
+            T.setP(p[n]);
+        tissue.step(dt,Ts);
+        out.append(health(tissue));
+    return np.array(out,dtype=float);
+
+def simulate(tissue,P,Pn,chunks):
+    """
+    Health of each mechanism after each sample by simulating the trace in
+    chunks that end at the given samples.
+    """
+    out=[];
+    for a,b in zip([0]+chunks,chunks+[len(P)]):
+        r=tissue.simulate(P[a:b],dt,Pn[:,a:b] if len(Pn) else None);
+        out.append(np.c_[r['iri'],r['dpi'],r['gi'],r['health']]);
+    return np.concatenate(out);
+
+class TestSimulate(unittest.TestCase):
+
+    def testChunked(self):
+        """
+        Simulating whole or in chunks matches stepping, with and without
+        neighbours.
+        """
+        P=pressure(3000);
+        for Pn in (np.zeros((0,3000)),np.array([np.roll(P,-7)/2,pressure(3000,1)])):
+            for name,make in tissues().items():
+                stepped=make();
+                expected=step(stepped,P,Pn);
+                for chunks in ([],[1234],[1,700,701,2500]):
+                    simulated=make();
+                    np.testing.assert_allclose(simulate(simulated,P,Pn,chunks),expected,rtol=1e-8,atol=0,err_msg=name+' '+str(chunks));
+                    self.assertEqual((simulated.n,simulated.reliefCounter,simulated.P),(stepped.n,stepped.reliefCounter,stepped.P),name);
+                    np.testing.assert_array_equal(simulated.Ps.view(),stepped.Ps.view(),err_msg=name);
+
+    def testStepConstant(self):
+        """
+        stepConstant() and advance() match stepping with the pressure held.
+        """
+        segments=[(0,300),(20,80),(20,500),(5,30),(0,2000),(35,10),(12,700),(0,5)];
+        for name,make in tissues().items():
+            stepped=make();
+            advanced=make();
+            Ts=neighbours([7.0]);
+            Ts[0].setP(7.0);
+            held=None;
+            for P,k in segments:
+                for i in range(k):
+                    stepped.setP(P);
+                    stepped.step(dt,Ts);
+                if(P==held):
+                    advanced.advance(k,dt,Ts);
+                else:
+                    advanced.stepConstant(P,k,dt,Ts);
+                held=P;
+                np.testing.assert_allclose(health(advanced),health(stepped),rtol=1e-10,atol=0,err_msg=name+' '+str((P,k)));
+                self.assertEqual((advanced.n,advanced.reliefCounter),(stepped.n,stepped.reliefCounter),name);
+                np.testing.assert_allclose(advanced.Ps.view(),stepped.Ps.view(),rtol=1e-12,err_msg=name);
+
+if __name__=='__main__':
+    unittest.main();
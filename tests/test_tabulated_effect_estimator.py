@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import unittest;
+import warnings;
+import numpy as np;
+from pmonitor.inc.TabulatedEffectEstimator import TabulatedEffectEstimator;
+
+def estimator(P,t):
+    return np.sin(P/10)*t;
+
+class SmallTabulatedEffectEstimator(TabulatedEffectEstimator):
+    MAX_POINTS=65;
+
+class TestTabulatedEffectEstimator(unittest.TestCase):
+
+    def testTolerance(self):
+        """
+        The grid is refined to the tolerance of the estimate per minute.
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter('error');
+            e=TabulatedEffectEstimator(estimator,0.5,points=11,tolerance=1e-6,vectorized=True);
+        self.assertLessEqual(e.error,1e-6);
+        P=np.linspace(0,100,997);
+        np.testing.assert_allclose(e.q(P,0.5,2),estimator(P,0.5)*2,rtol=0,atol=2e-6);
+
+    def testToleranceNotMet(self):
+        """
+        A tolerance that needs more than MAX_POINTS warns.
+        """
+        with self.assertWarns(RuntimeWarning):
+            e=SmallTabulatedEffectEstimator(estimator,0.5,points=11,tolerance=1e-9,vectorized=True);
+        self.assertEqual(e.points,SmallTabulatedEffectEstimator.MAX_POINTS);
+        self.assertGreater(e.error,1e-9);
+
+if __name__=='__main__':
+    unittest.main();
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import unittest;
+import numpy as np;
+from pmonitor.bank.Tissue import Tissue;
+from pmonitor.bank.TissueFixed import TissueFixed;
+from pmonitor.bank.TissueInverse import TissueInverse;
+from pmonitor.bank.TissueContinuous import TissueContinuous;
+from pmonitor.bank.TissueLinear import TissueLinear;
+from pmonitor.bank.TissueAveraging import TissueAveraging;
+from pmonitor.bank.TissueBinned import TissueBinned;
+from pmonitor.bank.TissueSpecial import TissueSpecial;
+from pmonitor.bank.TissueArray import TissueArray;
+from pmonitor.inc.PressureTimeThreshold import PressureTimeThreshold;
+from pmonitor.inc.EffectEstimator import EffectEstimator;
+from pmonitor.inc.Neighbourhood import Neighbourhood;
+from pmonitor.inc.Helpers import Helpers;
+
+dt=30;
+shape=(3,4);
+
+def frames(N,seed=3):
+    """
+    Pressure and gradient frames with a spell of no pressure.
+    """
+    rng=np.random.default_rng(seed);
+    P=rng.uniform(0,80,(N,)+shape);
+    P[50:90]=0;
+    G=rng.uniform(0,10,(N,)+shape);
+    return P,G;
+
+def cells(method):
+    """
+    A TissueArray of a method and a factory of the Tissue it reproduces.
+    """
+    ptt=PressureTimeThreshold();
+    ee=EffectEstimator();
+    b=Helpers.beta(600,dt);
+    lb=Helpers.linearBeta(600,dt);
+    k=(0.5,0.3,0.2);
+    array=lambda *beta,**kw:TissueArray(method,shape,ptt,ee,method,*beta,*k,neighbourhood=8,**kw);
+    return {'exponential':(array(b,b,b),lambda:Tissue('c',ptt,ee,b,b,b,*k)),
+            'special':(array(b,b,b),lambda:TissueSpecial('c',ptt,ee,b,b,b,*k)),
+            'continuous':(array(b,b,b),lambda:TissueContinuous('c',ptt,ee,b,b,b,*k)),
+            'linear':(array(lb,lb,lb),lambda:TissueLinear('c',ptt,ee,lb,lb,lb,*k)),
+            'fixed':(array(1,1,1,reliefTimeThreshold=2),lambda:TissueFixed('c',ptt,ee,*k,reliefTimeThreshold=2)),
+            'inverse':(array(1,1,1),lambda:TissueInverse('c',ptt,ee,*k)),
+            'binned':(array(b,b,b),lambda:TissueBinned('c',ptt,ee,b,b,b,*k)),
+            'averaging':(array(1,1,1,len_dpi=5,len_iri=7,len_gi=3),lambda:TissueAveraging('c',ptt,ee,5,7,3,*k))}[method];
+
+class TestTissueArray(unittest.TestCase):
+
+    def testMethods(self):
+        """
+        Each method matches stepping a Tissue per cell with its grid
+        neighbours.
+        """
+        P,G=frames(300);
+        rows,cols=shape;
+        neighbours=[[r*cols+c for r in range(max(i-1,0),min(i+2,rows)) for c in range(max(j-1,0),min(j+2,cols)) if (r,c)!=(i,j)] for i in range(rows) for j in range(cols)];
+        for method in TissueArray.METHODS:
+            array,make=cells(method);
+            tissues=[make() for i in range(rows*cols)];
+            for n in range(len(P)):
+                array.setP(P[n]);
+                array.step(dt);
+                for T,p in zip(tissues,P[n].ravel()):
+                    T.setP(p);
+                for T,nb in zip(tissues,neighbours):
+                    T.step(dt,[tissues[m] for m in nb]);
+                expected=[T.health(dt) for T in tissues];
+                np.testing.assert_allclose(array.health(dt).ravel(),expected,rtol=1e-9,atol=0,err_msg=method+' '+str(n));
+
+    def testBinnedContinouseRelief(self):
+        """
+        The binned cells follow the continouse_relief of TissueBinned, for all
+        cells or each.
+        """
+        ptt=PressureTimeThreshold();
+        ee=EffectEstimator();
+        P,G=frames(300);
+        mixed=np.arange(np.prod(shape)).reshape(shape)%2==0;
+        for continouse_relief in (True,False,mixed):
+            array=TissueArray('x',shape,ptt,ee,'binned',0.1,0.2,0.3,1,0.5,0.7);
+            array.continouse_relief=continouse_relief;
+            cells=[TissueBinned('c',ptt,ee,0.1,0.2,0.3,1,0.5,0.7) for i in range(np.prod(shape))];
+            for cell,c in zip(cells,np.broadcast_to(continouse_relief,shape).ravel()):
+                cell.continouse_relief=bool(c);
+            for n in range(len(P)):
+                array.setP(P[n]);
+                array.step(dt,G[n]);
+                for cell,p,g in zip(cells,P[n].ravel(),G[n].ravel()):
+                    cell.setP(p);
+                    cell.setGradient(g);
+                    cell.step(dt);
+                expected=[cell.health(dt) for cell in cells];
+                np.testing.assert_array_equal(array.health(dt).ravel(),expected);
+
+if __name__=='__main__':
+    unittest.main();